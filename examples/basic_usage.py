@@ -48,6 +48,8 @@ async def example_usage():
 
     result = await api.run_async(criteria=search_criteria,
                                  strategy_name=strategy.get_name())
+    # Aynı api ile tekrar run_async çağrılırsa bağlantı havuzu yeniden kullanılır; iş bitince kapat
+    await api.close()
     # result = api.run_sync(criteria=search_criteria,
     # target=target_params,
     # strategy_name=strategy.get_name())
@@ -58,8 +60,9 @@ async def example_usage():
         # api.download_waveforms(result.value.selected_df)
         # Tekil bir dalga formu dosyasını indirme örneği
         # if not result.value.selected_df.empty:
-        #     first_file = result.value.selected_df.iloc[5]['FILE_NAME_H1']
-        #     download_result = api.download_single_waveforms(provider_name=result.value.selected_df.iloc[5]['PROVIDER'], filename=first_file)
+        #     record = result.value.selected_df.iloc[5]
+        #     first_file = record['FILE_NAME_H1']
+        #     download_result = api.download_single_waveforms(provider_name=record['PROVIDER'], filename=first_file)
         #     if download_result.success:
         #         print(f"Downloaded waveform for {first_file}")
         #     else:
@@ -73,7 +76,7 @@ async def example_usage():
         # print(f"Statistic = {result.value.report['statistics']} ")
         print(f"Columns: {list(result.value.selected_df.columns)}")
         print(result.value.selected_df[['PROVIDER','RSN','EVENT','YEAR','MAGNITUDE','SSN','STATION','VS30(m/s)','RRUP(km)',"RJB(km)",'MECHANISM','PGA(cm2/sec)','PGV(cm/sec)','T90_avg(sec)','SCORE','ENDPOINTSOURCE','FILE_NAME_H1']])
-        result.value.scored_df.to_excel("events.xlsx")
+        api.export(result.value.scored_df, "events.parquet")  # Excel gerekiyorsa: "events.xlsx"
         return result.value
     else:
         print(f"[ERROR]: {result.error}")
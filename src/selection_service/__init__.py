@@ -5,37 +5,68 @@ selection_service
 A Python library for earthquake ground motion selection and processing.
 """
 
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 __version__ = "1.0.1"
 
-# --- Core API ---
-from .core.LoggingConfig import setup_logging
+# Alt modüller ilk erişimde yüklenir (PEP 562); `import selection_service` pandas/aiohttp zincirini çekmez
+_LAZY_IMPORTS = {
+    # --- Core API ---
+    "setup_logging": ".core.LoggingConfig",
+    "EarthquakePipeline": ".core.Pipeline",
+    "EarthquakeAPI": ".core.Pipeline",
+    # --- Enums ---
+    "ProviderName": ".enums.Enums",
+    "DesignCode": ".enums.Enums",
+    # --- Providers ---
+    "IDataProvider": ".providers.IProvider",
+    "ProviderFactory": ".providers.ProvidersFactory",
+    # --- Processing ---
+    "SelectionConfig": ".processing.Selection",
+    "SearchCriteria": ".processing.Selection",
+    "BaseSelectionStrategy": ".processing.Selection",
+    "TBDYSelectionStrategy": ".processing.Selection",
+    "EurocodeSelectionStrategy": ".processing.Selection",
+    "ColumnMapperFactory": ".processing.Mappers",
+}
 
-# --- Enums ---
-from .enums.Enums import ProviderName, DesignCode
+if TYPE_CHECKING:
+    from .core.LoggingConfig import setup_logging
+    from .core.Pipeline import EarthquakePipeline, EarthquakeAPI
+    from .enums.Enums import ProviderName, DesignCode
+    from .providers.IProvider import IDataProvider
+    from .providers.ProvidersFactory import ProviderFactory
+    from .processing.Selection import (
+        SelectionConfig,
+        SearchCriteria,
+        BaseSelectionStrategy,
+        TBDYSelectionStrategy,
+        EurocodeSelectionStrategy
+    )
+    from .processing.Mappers import ColumnMapperFactory
 
-from .core.Pipeline import EarthquakePipeline, EarthquakeAPI
 
-# --- Providers ---
-from .providers.IProvider import IDataProvider
-from .providers.ProvidersFactory import ProviderFactory
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # Sonraki erişimler modül sözlüğünden gelir
+    return value
 
-# --- Processing ---
-from .processing.Selection import (
-    SelectionConfig,
-    SearchCriteria,
-    BaseSelectionStrategy,
-    TBDYSelectionStrategy,
-    EurocodeSelectionStrategy
-)
-from .processing.Mappers import ColumnMapperFactory
 
-__all__ = [
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
+
+__all__: tuple[str, ...] = (
     "__version__",
     "EarthquakePipeline", "EarthquakeAPI",
     "setup_logging",
     "ProviderName", "DesignCode",
-    "ProviderFactory", "IDataProvider"
+    "ProviderFactory", "IDataProvider",
     "SelectionConfig", "SearchCriteria", "BaseSelectionStrategy",
     "TBDYSelectionStrategy", "EurocodeSelectionStrategy",
-    "ColumnMapperFactory"
-]
+    "ColumnMapperFactory",
+)
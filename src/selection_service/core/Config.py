@@ -1,3 +1,10 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import os
+from pathlib import Path
+from types import MappingProxyType
+from typing import Literal, Mapping, Optional
+import numpy as np
 import pandas as pd
 # Config.py
 
@@ -8,87 +15,111 @@ import pandas as pd
 # sigma_strictness: Gaussian eğrisinin darlığı (Yüksek değer = Daha katı puanlama)
 # type: 'numeric' veya 'categorical'
 
-SCORING_MAP = {
-    'magnitude': {
-        'column': 'MAGNITUDE',
-        'weight': 5.0,
-        'sigma_strictness': 4.0,
-        'type': 'numeric'
-    },
-    'rjb': {
-        'column': 'RJB(km)',
-        'weight': 4.5,
-        'sigma_strictness': 3.0,
-        'type': 'numeric'
-    },
-    'rrup': {
-        'column': 'RRUP(km)',
-        'weight': 4.5,
-        'sigma_strictness': 3.0,
-        'type': 'numeric'
-    },
-    'repi': {
-        'column': 'REPI(km)',
-        'weight': 4.0,
-        'sigma_strictness': 3.0,
-        'type': 'numeric'
-    },
-    'vs30': {
-        'column': 'VS30(m/s)',
-        'weight': 4.0,
-        'sigma_strictness': 5.0,
-        'type': 'numeric'
-    },
-    'pga': {
-        'column': 'PGA(cm2/sec)',
-        'weight': 3.5,
-        'sigma_strictness': 4.0,
-        'type': 'numeric'
-    },
-    'pgv': {
-        'column': 'PGV(cm/sec)',
-        'weight': 3.0,
-        'sigma_strictness': 4.0,
-        'type': 'numeric'
-    },
-    'pgd': {
-        'column': 'PGD(cm)',
-        'weight': 2.5,
-        'sigma_strictness': 3.0,
-        'type': 'numeric'
-    },
-    't90': {
-        'column': 'T90_avg(sec)',
-        'weight': 3.0,
-        'sigma_strictness': 3.0,
-        'type': 'numeric'
-    },
-    'arias': {
-        'column': 'ARIAS_INTENSITY(m/sec)',
-        'weight': 2.0,
-        'sigma_strictness': 3.0,
-        'type': 'numeric'
-    },
-    'depth': {
-        'column': 'HYPO_DEPTH(km)',
-        'weight': 2.0,
-        'sigma_strictness': 2.0,
-        'type': 'numeric'
-    },
-    'mechanism': {
-        'column': 'MECHANISM',
-        'weight': 3.0,
-        'type': 'categorical' # Kategorik eşleşme
-    }
-}
-STANDARD_COLUMNS = ["PROVIDER","RSN","EVENT", "YEAR", "MAGNITUDE", "MAGNITUDE_TYPE", 
-                    "STATION","SSN","STATION_ID","STATION_LAT","STATION_LON","VS30(m/s)",
-                    "STRIKE1","DIP1","RAKE1","MECHANISM",
-                    "ENDPOINTSOURCE",
-                    "EPICENTER_DEPTH(km)","HYPOCENTER_DEPTH(km)","RJB(km)","RRUP(km)","HYPO_LAT","HYPO_LON","HYPO_DEPTH(km)",
-                    "T90_avg(sec)","ARIAS_INTENSITY(m/sec)","LOWFREQ(Hz)","FILE_NAME_H1","FILE_NAME_H2","FILE_NAME_V","PGA(cm2/sec)","PGV(cm/sec)","PGD(cm)",]
-
-MECHANISM_MAP = {
+@dataclass(frozen=True, slots=True)
+class ScoringEntry:
+    """Tek bir puanlama parametresinin salt okunur tanımı"""
+    column: str
+    weight: float
+    sigma_strictness: Optional[float] = None
+    type: Literal['numeric', 'categorical'] = 'numeric'
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.type == 'numeric'
+
+SCORING_MAP: Mapping[str, ScoringEntry] = MappingProxyType({
+    'magnitude': ScoringEntry('MAGNITUDE',              weight=5.0, sigma_strictness=4.0),
+    'rjb':       ScoringEntry('RJB(km)',                weight=4.5, sigma_strictness=3.0),
+    'rrup':      ScoringEntry('RRUP(km)',               weight=4.5, sigma_strictness=3.0),
+    'repi':      ScoringEntry('REPI(km)',               weight=4.0, sigma_strictness=3.0),
+    'vs30':      ScoringEntry('VS30(m/s)',              weight=4.0, sigma_strictness=5.0),
+    'pga':       ScoringEntry('PGA(cm2/sec)',           weight=3.5, sigma_strictness=4.0),
+    'pgv':       ScoringEntry('PGV(cm/sec)',            weight=3.0, sigma_strictness=4.0),
+    'pgd':       ScoringEntry('PGD(cm)',                weight=2.5, sigma_strictness=3.0),
+    't90':       ScoringEntry('T90_avg(sec)',           weight=3.0, sigma_strictness=3.0),
+    'arias':     ScoringEntry('ARIAS_INTENSITY(m/sec)', weight=2.0, sigma_strictness=3.0),
+    'depth':     ScoringEntry('HYPO_DEPTH(km)',         weight=2.0, sigma_strictness=2.0),
+    'mechanism': ScoringEntry('MECHANISM',              weight=3.0, type='categorical'), # Kategorik eşleşme
+})
+
+# Puanlama matrisinin veri tipi. Puanlar [0, 1] aralığında olduğundan float32 yeterli hassasiyettedir
+# ve float64'e göre bellek bant genişliğini yarıya indirir.
+SCORING_DTYPE = np.float32
+
+# SCORING_MAP'in sayısal parametreleri için SoA (Structure of Arrays) görünümü.
+# Aynı sıradaki elemanlar aynı parametreye aittir; puanlama motoru bunları tek matris işlemiyle kullanır.
+NUMERIC_SCORE_KEYS = tuple(k for k, v in SCORING_MAP.items() if v.is_numeric)
+NUMERIC_SCORE_COLUMNS = tuple(SCORING_MAP[k].column for k in NUMERIC_SCORE_KEYS)
+NUMERIC_SCORE_WEIGHTS = np.array([SCORING_MAP[k].weight for k in NUMERIC_SCORE_KEYS], dtype=SCORING_DTYPE)
+NUMERIC_SCORE_STRICTNESS = np.array([SCORING_MAP[k].sigma_strictness for k in NUMERIC_SCORE_KEYS], dtype=SCORING_DTYPE)
+
+# Kategorik eşleşme kademeleri: indeks 0 = eşleşme yok, 1 = kısmi eşleşme, 2 = tam eşleşme
+CATEGORICAL_TIER_SCORES = np.array([0.0, 0.7, 1.0], dtype=SCORING_DTYPE)
+
+# Normalize edilmiş toplam puanın üst sınırı (tüm aktif kriterler hedefe tam isabet)
+MAX_SCORE = 100.0
+
+STANDARD_COLUMNS: tuple[str, ...] = ("PROVIDER","RSN","EVENT", "YEAR", "MAGNITUDE", "MAGNITUDE_TYPE", 
+                                         "STATION","SSN","STATION_ID","STATION_LAT","STATION_LON","VS30(m/s)",
+                                         "STRIKE1","DIP1","RAKE1","MECHANISM",
+                                         "ENDPOINTSOURCE",
+                                         "EPICENTER_DEPTH(km)","HYPOCENTER_DEPTH(km)","RJB(km)","RRUP(km)","HYPO_LAT","HYPO_LON","HYPO_DEPTH(km)",
+                                         "T90_avg(sec)","ARIAS_INTENSITY(m/sec)","LOWFREQ(Hz)","FILE_NAME_H1","FILE_NAME_H2","FILE_NAME_V","PGA(cm2/sec)","PGV(cm/sec)","PGD(cm)",)
+# Kolon seçimi/reindex için önceden oluşturulmuş Index (her çağrıda yeniden kurulmaz)
+STANDARD_COLUMNS_INDEX = pd.Index(STANDARD_COLUMNS)
+
+# Provider sonuçlarının disk önbelleği ayarları
+CACHE_DIR: Path = Path(".cache")
+CACHE_TTL_SECONDS: int = 24 * 3600
+PARQUET_COMPRESSION: str = 'zstd'
+# Provider sonuç önbelleği Feather (Arrow IPC) olarak bu sıkıştırmayla yazılır
+CACHE_COMPRESSION: str = 'zstd'
+# Aynı süreçte tekrarlanan kriterler için bellekte tutulan en fazla sonuç (disk okumasını atlar)
+MEMORY_CACHE_SIZE: int = 32
+# Paket verisinin (istasyon Excel'i, flatfile CSV'si) Parquet kopyaları kullanıcı önbellek klasörüne yazılır,
+# çalışma dizinine dosya bırakılmaz; SELECTION_SERVICE_CACHE_DIR ortam değişkeniyle değiştirilebilir
+DATA_CACHE_DIR: Path = Path(os.environ.get("SELECTION_SERVICE_CACHE_DIR")
+                            or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "selection_service")
+# İstasyon Excel dosyası ilk okumada DATA_CACHE_DIR altına Parquet olarak saklanır
+STATION_PARQUET_CACHE: bool = True
+# NGA-West2 flatfile CSV'si de aynı şekilde DATA_CACHE_DIR altındaki Parquet kopyasından okunur (CSV ayrıştırması yalnızca ilk seferde)
+FLATFILE_PARQUET_CACHE: bool = True
+
+# numba kuruluysa puanlamada derlenmiş çekirdek kullanılır (kurulu değilse NumPy sürümü)
+USE_NUMBA: bool = True
+
+# Seçimde tam sıralama yerine önce en yüksek puanlı num_records * SELECTION_WINDOW_FACTOR kayıt denenir
+# (kota retleri için pay); pencere yetmezse tam sıralamaya dönülür
+SELECTION_WINDOW_FACTOR: int = 3
+
+# Pipeline'da aynı anda sorgulanan en fazla provider sayısı
+MAX_CONCURRENT_FETCHES: int = 4
+
+# Dalga formu indirmede provider başına eşzamanlı istek sayısı
+DOWNLOAD_MAX_WORKERS: int = 8
+
+# HTTP bağlantı havuzu ayarları (provider oturumları tarafından paylaşılır)
+HTTP_MAX_CONNECTIONS: int = 32
+HTTP_PER_HOST: int = 8
+HTTP_TIMEOUT_S: int = 30
+HTTP_KEEPALIVE_S: int = 30
+# Dalga formu zip indirmeleri diske bu boyutta parçalar halinde akıtılır (tüm içerik bellekte tutulmaz)
+DOWNLOAD_CHUNK_BYTES: int = 1 << 20
+# Content-Length bu sınırın altındaki tekil zip'ler diske yazılmadan bellekte açılır
+INMEMORY_ZIP_MAX_BYTES: int = 64 << 20
+# AFAD dalga formu partileri için aynı anda açık en fazla indirme isteği (sunucu yükünü sınırlar)
+AFAD_DOWNLOAD_WORKERS: int = 3
+# Başarısız indirmelerin yeniden denemeleri arasında üstel bekleme (2**deneme + rastgele sapma), saniye cinsinden üst sınır
+RETRY_BACKOFF_MAX_S: float = 60.0
+
+# Süreç içinde saklanan en fazla AFAD event detayı (aynı event tekrar istenirse ağa gidilmez)
+EVENT_DETAIL_CACHE_SIZE: int = 4096
+
+# Düşük kardinaliteli metin kolonları; category dtype ile tutulur (int kod + tekil etiket tablosu)
+CATEGORICAL_COLUMNS: tuple[str, ...] = ('PROVIDER', 'MAGNITUDE_TYPE', 'MECHANISM', 'EVENT')
+
+# Salt okunur eşlemeler; modül tek kaynaktır, içerik çalışma anında değiştirilemez
+MECHANISM_MAP = MappingProxyType({
     0: 'StrikeSlip',
     1: 'Normal', 
     2: 'Reverse',
@@ -96,28 +127,72 @@ MECHANISM_MAP = {
     4: 'Normal/Oblique',
     5: 'Oblique',
     -999: 'Unknown'
-}
-REVERSE_MECHANISM_MAP = {v: k for k, v in MECHANISM_MAP.items()}
+})
+REVERSE_MECHANISM_MAP = MappingProxyType({v: k for k, v in MECHANISM_MAP.items()})
+MECHANISM_NAMES = frozenset(REVERSE_MECHANISM_MAP)
+
+# Tüm provider'ların paylaştığı tek MECHANISM kategorisi. AFAD iki fay düzlemi farklı sınıfa düştüğünde
+# "Tip1-Tip2" birleşik etiketi ürettiği için ikili kombinasyonlar da kategoriye dahildir.
+MECHANISM_CATEGORIES: tuple[str, ...] = (*MECHANISM_MAP.values(),
+                                         *(f"{a}-{b}" for a in MECHANISM_MAP.values() for b in MECHANISM_MAP.values() if a != b))
+MECHANISM_DTYPE = pd.CategoricalDtype(categories=MECHANISM_CATEGORIES, ordered=False)
+
+# Kod -> etiket dizisi (0..5). Aralık dışı kodlar 'Unknown' olur.
+_MECH_LABELS = np.array([MECHANISM_MAP[code] for code in range(6)], dtype=object)
+_UNKNOWN = MECHANISM_MAP[-999]
+# Etiket -> kod tablosu; son eleman eşleşmeyen (-1) indeks için
+_MECH_NUMERIC_CATEGORIES = pd.Index(list(REVERSE_MECHANISM_MAP), dtype=object)
+_MECH_NUMERIC_LUT = np.array([*REVERSE_MECHANISM_MAP.values(), -999], dtype=int)
+
+ # ------- DTYPE UTILITY FUNCTIONS ------------
+
+def to_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """CATEGORICAL_COLUMNS içinde olup DataFrame'de bulunan kolonları category dtype'a çevir.
+    MECHANISM, tüm değerleri tanımlıysa ortak MECHANISM_DTYPE'ı kullanır."""
+    dtypes = {col: 'category' for col in CATEGORICAL_COLUMNS if col in df.columns}
+    if 'MECHANISM' in dtypes and df['MECHANISM'].dropna().isin(MECHANISM_CATEGORIES).all():
+        dtypes['MECHANISM'] = MECHANISM_DTYPE
+    return df.astype(dtypes)
+
+def constant_category(value: str, length: int) -> pd.Categorical:
+    """Tek değerli kolon (ör. PROVIDER) için N adet int8 kod + tek kategori; N kopya string tutulmaz"""
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[value])
+
+def extract_score_matrix(df: pd.DataFrame, columns=NUMERIC_SCORE_COLUMNS) -> np.ndarray:
+    """Sayısal puan kolonlarını tek seferde bitişik (N, M) SCORING_DTYPE matrisine çıkar. Eksik kolon/değer NaN olur."""
+    values = df.reindex(columns=list(columns)).to_numpy(dtype=SCORING_DTYPE, na_value=np.nan)
+    return np.ascontiguousarray(values)
 
  # ------- MECHANISM UTILITY FUNCTIONS ------------
 
 def convert_mechanism_to_text(df: pd.DataFrame, mechanism_col: str = 'MECHANISM') -> pd.DataFrame:
-    """Mekanizma sütununu sayısal değerlerden metin karşılıklarına dönüştür"""
-    df = df.copy()
-    df[mechanism_col] = df[mechanism_col].map(MECHANISM_MAP).fillna("Unknown")
-    return df
+    """Mekanizma sütununu sayısal değerlerden metin karşılıklarına dönüştür (vektörize, Categorical döner)"""
+    labels = get_mechanism_text_vec(df[mechanism_col])
+    return df.assign(**{mechanism_col: pd.Categorical(labels, dtype=MECHANISM_DTYPE)})
 
 def convert_mechanism_to_numeric(df: pd.DataFrame, mechanism_col: str = 'MECHANISM') -> pd.DataFrame:
     """Mekanizma sütununu metin değerlerinden sayısal karşılıklarına dönüştür"""
-    df = df.copy()
-    df[mechanism_col] = df[mechanism_col].map(REVERSE_MECHANISM_MAP).fillna(-999).astype(int)
-    return df
+    return df.assign(**{mechanism_col: get_mechanism_numeric_vec(df[mechanism_col])})
 
+# Tanım kümesi küçük; sınır yalnızca beklenmedik girdilerle önbelleğin büyümesini engeller
+@lru_cache(maxsize=256)
 def get_mechanism_text(numeric_value: int) -> str:
     """Sayısal mekanizma değerini metin karşılığına çevir"""
     return MECHANISM_MAP.get(numeric_value, 'Unknown')
 
+@lru_cache(maxsize=256)
 def get_mechanism_numeric(text_value: str) -> int:
     """Metin mekanizma değerini sayısal karşılığına çevir"""
     return REVERSE_MECHANISM_MAP.get(text_value, -999)
 
+def get_mechanism_text_vec(values) -> np.ndarray:
+    """get_mechanism_text'in toplu (vektörize) hali; Series/ndarray/list alır, object ndarray döner"""
+    codes = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = (codes >= 0) & (codes < len(_MECH_LABELS)) & (codes % 1 == 0)
+    return np.where(mask, _MECH_LABELS[np.where(mask, codes, 0).astype(np.intp)], _UNKNOWN)
+
+def get_mechanism_numeric_vec(values) -> np.ndarray:
+    """get_mechanism_numeric'in toplu (vektörize) hali; Series/ndarray/list alır, int ndarray döner"""
+    # Bilinmeyen etiketler -1 indeksini alır, LUT'un son elemanı (-999) ile eşleşir
+    codes = _MECH_NUMERIC_CATEGORIES.get_indexer(pd.Series(values, dtype=object))
+    return _MECH_NUMERIC_LUT[codes]
@@ -1,10 +1,17 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import cached_property
+import inspect
+import os
+from pathlib import Path
 import time
 from typing import Any, Callable, Dict, List, Optional
+import numpy as np
 import pandas as pd
 
 from ..providers.ProvidersFactory import ProviderFactory
+from ..core.Config import DOWNLOAD_MAX_WORKERS, MAX_CONCURRENT_FETCHES, PARQUET_COMPRESSION, to_categoricals
 
 from ..enums.Enums import ProviderName
 from ..providers.IProvider import IDataProvider
@@ -23,7 +30,7 @@ import logging
 # logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class PipelineResult:
     selected_df: pd.DataFrame
     scored_df: pd.DataFrame
@@ -31,8 +38,16 @@ class PipelineResult:
     execution_time: float
     failed_providers: List[str] = field(default_factory=list)
     logs: List[str] = field(default_factory=list)
+    _records: Optional[List[Dict[str, Any]]] = field(default=None, init=False, repr=False, compare=False)
 
-@dataclass
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        """Seçilen kayıtların satır bazlı dict listesi; ilk erişimde bir kez üretilir"""
+        if self._records is None:
+            self._records = self.selected_df.to_dict("records")
+        return self._records
+
+@dataclass(slots=True)
 class PipelineContext:
     providers       : List[IDataProvider]
     strategy        : ISelectionStrategy
@@ -44,10 +59,13 @@ class PipelineContext:
     failed_providers: List[str]              = field(default_factory=list)
     logs            : List[str]              = field(default_factory=list)
     start_time      : float                  = field(default_factory=time.time)
+    backend         : str                    = "pandas"
 
 class EarthquakePipeline:
     """Main pipeline engine (stateless) with Result Pattern"""
 
+    max_concurrent_fetches: int = MAX_CONCURRENT_FETCHES
+
     # ASENKRON methods
     async def execute_async(self,
                             providers: List[IDataProvider],
@@ -59,33 +77,38 @@ class EarthquakePipeline:
         context = PipelineContext(
             providers=providers,
             strategy=strategy,
-            search_criteria=search_criteria
+            search_criteria=search_criteria,
+            backend=self._get_backend(strategy)
         )
         return await self._execute_pipeline_async(context)
 
     async def _execute_pipeline_async(self, context: PipelineContext) -> Result[PipelineResult, PipelineError]:
         """Railway oriented pipeline execution"""
 
-        # Define the processing pipeline
-        result = await self._compose_async(
+        return await self._async_pipeline(context)
+
+    @cached_property
+    def _async_pipeline(self) -> Callable:
+        """Define the processing pipeline (örnek başına bir kez compose edilir)"""
+        return self._compose_async(
             self._validate_inputs_async,
             self._fetch_data_async,
             self._combine_data,
             self._apply_strategy,
             self._generate_final_result
-        )(context)
-
-        return result
+        )
 
     def _compose_async(self, *funcs: Callable) -> Callable:
         """Compose async and sync functions in railway pattern"""
-        import inspect
+        # sync/async ayrımı compose anında bir kez yapılır, her çalıştırmada tekrarlanmaz
+        steps = tuple((inspect.iscoroutinefunction(func), func) for func in funcs)
+
         async def composed(input: PipelineContext) -> Result[PipelineResult, PipelineError]:
             current_result = Result.ok(input)
             
-            for func in funcs:
+            for is_coroutine, func in steps:
                 if current_result.success:
-                    if inspect.iscoroutinefunction(func):
+                    if is_coroutine:
                         current_result = await func(current_result.value)
                     else:
                         current_result = func(current_result.value)
@@ -107,27 +130,51 @@ class EarthquakePipeline:
                                 context: PipelineContext) -> PipelineContext:
         """Fetch data from all providers asynchronously"""
 
+        # Aynı anda en fazla max_concurrent_fetches provider sorgulanır (soket/bellek sınırı)
+        semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+
         async def fetch_single_provider(provider: IDataProvider) -> Result[pd.DataFrame, ProviderError]:
-            try:
-                crit = provider.map_criteria(context.search_criteria)
-                data = await provider.fetch_data_async(criteria=crit)
-                return data
-            except Exception as e:
-                return Result.fail(ProviderError(provider.get_name(), e))
-
-        # Fetch data from all providers concurrently
-        tasks = [fetch_single_provider(provider) for provider in context.providers]
-        results = await asyncio.gather(*tasks)
-
-        # Process results
-        successful_data = []        
-        for result in results:
-            if result.success:
-                successful_data.append(result.value)
-                context.logs.append(f"[OK] {context.providers[len(successful_data)-1].get_name()} success")
-            else:
-                context.failed_providers.append(result.error.provider_name)
-                context.logs.append(f"[ERROR] {result.error}")
+            async with semaphore:
+                try:
+                    crit = provider.map_criteria(context.search_criteria)
+                    return await provider.fetch_data_async(criteria=crit)
+                except Exception as e:
+                    return Result.fail(ProviderError(provider.get_name(), e))
+
+        # Sonuçlar tamamlandıkça loglanır; veri yine provider sırasıyla birleştirilir (deterministik concat)
+        # Task'lar provider sırasıyla başlatılır; task -> provider indeksi eşlemesi tutulur
+        tasks = {asyncio.ensure_future(fetch_single_provider(provider)): index
+                 for index, provider in enumerate(context.providers)}
+        results: List[Optional[Result]] = [None] * len(tasks)
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.get):
+                    index = tasks[task]
+                    provider = context.providers[index]
+                    # İptal edilen / korumadan kaçan provider diğerlerini düşürmez, başarısız sayılır
+                    try:
+                        result = task.result()
+                    except (asyncio.CancelledError, Exception) as e:
+                        results[index] = Result.fail(ProviderError(provider.get_name(), e))
+                        context.failed_providers.append(provider.get_name())
+                        context.logs.append(f"[ERROR] {provider.get_name()}: {e!r}")
+                        continue
+                    results[index] = result
+                    if result.success:
+                        context.logs.append(f"[OK] {provider.get_name()} success")
+                    else:
+                        context.failed_providers.append(provider.get_name())
+                        context.logs.append(f"[ERROR] {result.error}")
+        finally:
+            # Döngü erken biterse (ör. pipeline iptal edildi) kalan task'lar askıda bırakılmaz
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        successful_data = [result.value for result in results if result.success]
 
         if not successful_data:
             raise NoDataError("No data received from any provider")
@@ -146,7 +193,8 @@ class EarthquakePipeline:
         context = PipelineContext(
             providers=providers,
             strategy=strategy,
-            search_criteria=search_criteria
+            search_criteria=search_criteria,
+            backend=self._get_backend(strategy)
         )
         return self._execute_pipeline_sync(context=context)
 
@@ -213,6 +261,51 @@ class EarthquakePipeline:
 
     # ORTAK metodlar (hem sync hem async için)
 
+    @staticmethod
+    def _get_backend(strategy: ISelectionStrategy) -> str:
+        """Stratejinin SelectionConfig'indeki veri backend'ini döndür (config yoksa 'pandas')"""
+        return getattr(getattr(strategy, "config", None), "backend", "pandas")
+
+    @staticmethod
+    def _drop_empty_columns(df: Any) -> Optional[pd.DataFrame]:
+        """Tümü NaN olan sütunları at; DataFrame değilse, boşsa veya hiç dolu sütunu yoksa None döndür"""
+        if not isinstance(df, pd.DataFrame) or df.empty:
+            return None
+        keep = df.notna().any(axis=0)
+        if not keep.any():
+            return None
+        return df if keep.all() else df.loc[:, keep]
+
+    @staticmethod
+    def _align_columns(dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
+        """Tüm df'leri ortak sütun birleşimine (ilk görülme sırasıyla) hizala.
+        Sütunları aynı olan df'lerde concat, blok bazlı hızlı yolu kullanır; sonuç pd.concat ile aynıdır."""
+        columns = dfs[0].columns
+        for df in dfs[1:]:
+            if not df.columns.equals(columns):
+                columns = columns.union(df.columns, sort=False)
+
+        # Eksik sütun, sahibi olan df'in dtype'ı ile boş (NA) oluşturulur; böylece birleşik dtype pd.concat ile aynı kalır
+        dtypes: Dict[str, Any] = {}
+        for df in dfs:
+            for col, dtype in df.dtypes.items():
+                dtypes.setdefault(col, dtype)
+
+        aligned = []
+        for df in dfs:
+            if df.columns.equals(columns):
+                aligned.append(df)
+                continue
+            missing = {}
+            for col in columns.difference(df.columns, sort=False):
+                dtype = dtypes[col]
+                if isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+                    # NA tutamayan tipler: pd.concat int -> float64, bool -> object yükseltmesini taklit et
+                    dtype = np.dtype('float64') if dtype.kind in 'iu' else np.dtype(object)
+                missing[col] = pd.Series(index=df.index, dtype=dtype)
+            aligned.append(df.assign(**missing)[columns])
+        return aligned
+
     @result_decorator
     def _combine_data(self, context: PipelineContext) -> PipelineContext:
         """Combine data from multiple providers"""
@@ -220,24 +313,64 @@ class EarthquakePipeline:
             raise NoDataError("No data to combine")
 
         #context type -->selection_service.ResultHandle.Result olduğu için value değerleri providerdan gelen dataframelerdir çünkü Result nesnesine çevrilip döndürülüyor.
-        # valid_dfs = [df for df in context.data if isinstance(df, pd.DataFrame) and not df.empty]
-        valid_dfs = [ df.dropna(axis=1, how='all')  
-                     for df in context.data 
-                     if isinstance(df, pd.DataFrame) and not df.empty and df.dropna(axis=1, how='all').shape[1] > 0]
+        # Her df için tek NaN taraması: tümü NaN olan sütunlar atılır, hiç dolu sütunu olmayan df elenir.
+        # Girdilerde tümü NaN sütun kalmadığından birleşik df'de de oluşamaz; concat sonrası ayrıca taranmaz.
+        # Provider df'leri birbirinden bağımsız; NumPy NaN taraması GIL'i bıraktığı için thread'lerde paralel temizlenir
+        if len(context.data) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(context.data), os.cpu_count() or 1)) as executor:
+                cleaned = list(executor.map(self._drop_empty_columns, context.data))
+        else:
+            cleaned = [self._drop_empty_columns(df) for df in context.data]
+        valid_dfs = [df for df in cleaned if df is not None]
         
         if not valid_dfs:
             raise NoDataError("No valid dataframes to combine")
         
-        context.combined_df = pd.concat(valid_dfs, ignore_index=True)
-        
-        # Tümü NaN olan sütunları temizle
-        context.combined_df = context.combined_df.dropna(axis=1, how='all')
-
-        # Kalan NaN değerleri doldur
-        context.combined_df = context.combined_df.fillna(0)  # Sayısal sütunlar için 0
-        # Object tipindeki sütunlarda hala NaN varsa boş string ile doldur
-        object_cols = context.combined_df.select_dtypes(include=['object']).columns
-        context.combined_df[object_cols] = context.combined_df[object_cols].fillna("")
+        if len(valid_dfs) == 1:
+            # Tek provider: concat kopyası gereksiz, yalnızca index sıfırlanır
+            context.combined_df = valid_dfs[0].reset_index(drop=True)
+        else:
+            context.combined_df = pd.concat(self._align_columns(valid_dfs), ignore_index=True)
+
+        # Kalan NaN değerleri tek geçişte, sütun tipine göre doldur: metin sütunları "", diğerleri 0.
+        # category kolonlarında da (ör. MECHANISM'i olmayan provider) doldurma değeri önce kategori olarak eklenir;
+        # böylece eksik etiket, eksik sayısal değer gibi puanlamaya katılır
+        fill_values = {}
+        categorical_fills = {}
+        for col, dtype in context.combined_df.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                column = context.combined_df[col]
+                if not column.hasnans:
+                    continue
+                fill = "" if pd.api.types.is_string_dtype(dtype.categories.dtype) or dtype.categories.dtype == object else 0
+                if fill not in dtype.categories:
+                    categorical_fills[col] = column.cat.add_categories([fill])
+                fill_values[col] = fill
+            else:
+                fill_values[col] = "" if pd.api.types.is_string_dtype(dtype) else 0
+        if categorical_fills:
+            context.combined_df = context.combined_df.assign(**categorical_fills)
+        context.combined_df = context.combined_df.fillna(fill_values)
+        object_cols = [col for col, dtype in context.combined_df.dtypes.items() if dtype == object]
+        # Yalnızca metin içeren object sütunları Arrow string'e çevrilir (bitişik buffer, vektörize karşılaştırma);
+        # karışık tipli sütunlar değer kaybı olmasın diye object kalır
+        string_cols = [col for col in object_cols
+                       if pd.api.types.infer_dtype(context.combined_df[col], skipna=True) == "string"]
+        if string_cols:
+            context.combined_df = context.combined_df.astype({col: "string[pyarrow]" for col in string_cols})
+
+        # Düşük kardinaliteli metin kolonları (PROVIDER, EVENT, ...) category olarak tutulur.
+        # Provider'lar arası concat farklı kategorileri object'e yükselttiği için dönüşüm birleştirmeden sonra yapılır.
+        context.combined_df = to_categoricals(context.combined_df)
+
+        # Arrow backend: string ağırlıklı kolonlar (EVENT, STATION, ...) kolon bazlı Arrow belleğinde tutulur,
+        # seçilen/puanlanan sonuçlar da Arrow tabanlı pandas DataFrame olarak döner
+        if context.backend == "pyarrow":
+            context.combined_df = context.combined_df.convert_dtypes(dtype_backend="pyarrow")
+        else:
+            # concat + sütun bazlı fillna/astype, her sütunu ayrı bloğa böler; tek kopya ile aynı dtype'lı
+            # sütunlar bitişik bloklarda birleştirilir (puan matrisi çıkarımı ve kolon erişimi hızlanır)
+            context.combined_df = context.combined_df.copy()
         
         context.logs.append(f"Combined {len(valid_dfs)} datasets, total {len(context.combined_df)} records")
         return context
@@ -289,6 +422,14 @@ class EarthquakePipeline:
         if selected_df.empty:
             return {"status": "warning", "message": "No records selected"}
 
+        # Tüm min/max istatistikleri tek agg çağrısında (kolon başına tek geçiş)
+        stat_cols = [col for col in ("MAGNITUDE", "RJB(km)", "SCORE") if col in selected_df.columns]
+        stats = selected_df[stat_cols].agg(["min", "max"])
+
+        def value_range(col: str):
+            # numpy skaleri yerine yerleşik float: rapor json/orjson ile doğrudan serileştirilebilir
+            return (float(stats.at["min", col]), float(stats.at["max", col])) if col in stats.columns else None
+
         return {
             "status": "success",
             "search_criteria": search_criteria,
@@ -296,11 +437,13 @@ class EarthquakePipeline:
             "total_considered": len(scored_df),
             "strategy": strategy.get_name(),
             "providers": [p.get_name() for p in providers],
-            "records": selected_df.to_dict("records"),
+            # Eski "records" listesinin yerine seçilen DataFrame'in kendisi (kopya/dönüşüm yok);
+            # satır bazlı dict listesi gerekiyorsa PipelineResult.records ilk erişimde üretir
+            "records_view": selected_df,
             "statistics": {
-                "magnitude_range": (selected_df["MAGNITUDE"].min(), selected_df["MAGNITUDE"].max()),
-                "distance_range": (selected_df["RJB(km)"].min(), selected_df["RJB(km)"].max()) if "RJB(km)" in selected_df else None,
-                "score_range": (selected_df["SCORE"].min(), selected_df["SCORE"].max())
+                "magnitude_range": value_range("MAGNITUDE"),
+                "distance_range": value_range("RJB(km)"),
+                "score_range": value_range("SCORE")
             }
         }
 
@@ -348,9 +491,48 @@ class EarthquakeAPI:
         if not strategy_result.success:
             return strategy_result
 
-        return await self.pipeline.execute_async(self.providers,
-                                                 strategy_result.value,
-                                                 criteria)
+        try:
+            return await self.pipeline.execute_async(self.providers,
+                                                     strategy_result.value,
+                                                     criteria)
+        finally:
+            # Paylaşılan aiohttp oturumu bu çağrının event loop'una bağlı; loop kapanmadan kapatılır
+            await self.close()
+
+    @result_decorator
+    def export(self, df: pd.DataFrame, path: str | Path) -> Path:
+        """Sonuç DataFrame'ini uzantıya göre dosyaya yaz (.parquet, .feather, .csv, .xlsx)"""
+        path = Path(path)
+        suffix = path.suffix.lower()
+        if suffix == '.parquet':
+            df.to_parquet(path, engine='pyarrow', compression=PARQUET_COMPRESSION, index=False)
+        elif suffix == '.feather':
+            df.reset_index(drop=True).to_feather(path, compression=PARQUET_COMPRESSION)
+        elif suffix == '.csv':
+            df.to_csv(path, index=False)
+        elif suffix == '.xlsx':
+            self._export_excel(df, path)
+        else:
+            raise ValueError(f"Desteklenmeyen dosya uzantısı: {suffix}. Geçerli uzantılar: .parquet, .feather, .csv, .xlsx")
+        return path
+
+    @staticmethod
+    def _export_excel(df: pd.DataFrame, path: Path) -> None:
+        """Excel çıktısı; xlsxwriter kuruluysa satırları bellekte tutmadan akış halinde yazar"""
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            df.to_excel(path, index=False)
+            return
+        with pd.ExcelWriter(path, engine='xlsxwriter', engine_kwargs={'options': {'constant_memory': True}}) as writer:
+            df.to_excel(writer, index=False)
+
+    async def close(self) -> None:
+        """Provider'ların paylaşılan HTTP oturumlarını kapat"""
+        for provider in self.providers:
+            close = getattr(provider, 'close', None)
+            if close is not None:
+                await close()
 
     def _get_strategy(self,
                       name: str) -> Result[ISelectionStrategy, ValueError]:
@@ -359,12 +541,14 @@ class EarthquakeAPI:
             return Result.fail(ValueError(f"Strategy {name} not found"))
         return Result.ok(self.strategies[name])
 
+    @cached_property
+    def _providers_by_name(self) -> Dict[str, IDataProvider]:
+        """Provider adları bir kez hesaplanır; ad -> provider eşlemesi"""
+        return {provider.get_name(): provider for provider in self.providers}
+
     def _get_provider_by_name(self, name: str) -> Optional[IDataProvider]:
         """Get provider by name"""
-        for provider in self.providers:
-            if provider.get_name() == name:
-                return provider
-        return None
+        return self._providers_by_name.get(name)
 
     def download_single_waveforms(self, provider_name: str, filename: str, **kwargs) -> Result[bool, ProviderError]:
         """Download single waveforms from a specific provider
@@ -387,26 +571,27 @@ class EarthquakeAPI:
         
     def download_waveforms(self, result_df : pd.DataFrame) -> Result[bool, ProviderError]:
         """Download waveforms for a specific event and station"""
-        for provider in self.providers:
+        # Satır satır iterrows yerine provider bazında gruplayıp kolonları numpy dizisi olarak dolaş
+        # Gruplar tek geçişte dolaşılır; groups.groups gibi tüm etiket->index sözlüğü kurulmaz
+        for name, group in result_df.groupby('PROVIDER', sort=False, observed=True):
+            provider = self._get_provider_by_name(name)
+            if provider is None:
+                continue
+            jobs = zip(group['FILE_NAME_H1'].to_numpy(),
+                       group['EVENT'].to_numpy(),
+                       group['SSN'].to_numpy())
             try:
-                # if provider.get_name() == ProviderName.PEER.value:
-                #     print(f"PEER veri setinde dalga formu dosyaları mevcut değil, bu fonksiyon sadece şablon amaçlı bırakılmıştır.")
-                #     continue
-
-                for _, row in result_df.iterrows():
-                    source = row['PROVIDER']
-                    if source != provider.get_name():
-                        continue
-                    filename = row['FILE_NAME_H1']
-                    event_id = row['EVENT']
-                    station_code = row['SSN']
-                    res = provider.download_single_waveforms(filename=filename, event_id=event_id, station_code=station_code)
-                    if not res.success:
-                        return res
-                else:
-                    Result.fail(ProviderError(provider.get_name()))
+                # İndirmeler I/O bağımlı; provider içindeki istekleri eşzamanlı çalıştır
+                with ThreadPoolExecutor(max_workers=DOWNLOAD_MAX_WORKERS) as executor:
+                    results = list(executor.map(
+                        lambda job: provider.download_single_waveforms(filename=job[0], event_id=job[1], station_code=job[2]),
+                        jobs))
             except Exception as e:
-                Result.fail(ProviderError(provider.get_name(), e, "Failed to download waveforms"))
-        
+                return Result.fail(ProviderError(name, e, "Failed to download waveforms"))
+
+            for res in results:
+                if not res.success:
+                    return res
+
         return Result.ok(True)
 
@@ -1,12 +1,87 @@
 from abc import ABC
-from math import atan2, cos, radians, sin, sqrt
-from typing import Dict, Protocol, Type
+from types import MappingProxyType
+from typing import Dict, Mapping, Protocol, Type
+import numpy as np
 import pandas as pd
 from functools import lru_cache
 
-from ..utility.path_utils import load_excel
+from ..utility.path_utils import load_excel, load_excel_cached
 from ..enums.Enums import ProviderName
-from ..core.Config import STANDARD_COLUMNS, MECHANISM_MAP
+from ..core.Config import STANDARD_COLUMNS_INDEX, MECHANISM_CATEGORIES, MECHANISM_DTYPE, MECHANISM_MAP, STATION_PARQUET_CACHE
+
+# (düzlem1 kodu, düzlem2 kodu) -> MECHANISM_DTYPE kategori kodu; aynı sınıf tek etiket, farklı sınıf "Tip1-Tip2"
+_FAULT_PAIR_CODES = np.array([[MECHANISM_CATEGORIES.index(MECHANISM_MAP[a] if a == b else f"{MECHANISM_MAP[a]}-{MECHANISM_MAP[b]}")
+                               for b in range(6)] for a in range(6)], dtype=np.int16)
+# (rake > 0) * 2 + (dip >= 30) -> Normal/Oblique, Normal, Reverse/Oblique, Reverse
+_DIP_SLIP_CODES = np.array([4, 1, 3, 2], dtype=np.int8)
+
+EARTH_RADIUS_KM = 6371.0
+# AFAD T90 bileşen kolonları (E, N, U)
+_T90_COLUMNS = ("t90e", "t90n", "t90u")
+_T90_COLUMN_SET = frozenset(_T90_COLUMNS)
+# df.attrs anahtarı: stationCode kolonu zaten temizlenmiş
+STATION_CODES_NORMALIZED = "stationCode_normalized"
+
+
+def haversine_vec(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Haversine mesafesi (km), dizi girdileri ile.
+    Broadcasting desteklenir: (M,) ve (N, 1) girdiler (N, M) mesafe matrisi verir.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(x) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def normalize_station_codes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ham AFAD yanıtındaki stationCode değerlerini yerinde (bir kez) temizler ve DataFrame'i işaretler;
+    AFADColumnMapper işaretli DataFrame'lerde bu adımı tekrarlamaz.
+    """
+    if "stationCode" in df.columns:
+        df["stationCode"] = df["stationCode"].astype(str).str.strip()
+        df.attrs[STATION_CODES_NORMALIZED] = True
+    return df
+
+
+def _unit_vectors(lat_deg: np.ndarray, lon_deg: np.ndarray) -> np.ndarray:
+    """Enlem/boylamı (derece) birim küre üzerinde (N, 3) kartezyen koordinatlara çevirir"""
+    lat, lon = np.radians(lat_deg), np.radians(lon_deg)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+@lru_cache(maxsize=4)
+def _load_station_info_df(filename: str, max_distance_km: float) -> pd.DataFrame:
+    """
+    İstasyon dosyasını okuyup eksik Vs30'ları doldurur.
+    Sonuç süreç boyunca önbelleklenir; mapper örnekleri Excel'i tekrar okumaz. Hata durumunda önbelleğe alınmaz.
+    """
+    df = load_excel_cached(filename) if STATION_PARQUET_CACHE else load_excel(filename)
+    df["Code"] = df["Code"].astype(str).str.strip()
+    
+    # Eksik Vs30'ları doldurma - vektörize versiyon
+    missing_mask = (df["Vs30"].isna()) | (df["Vs30"] == 0)
+    if missing_mask.any():
+        valid_stations = df[~missing_mask]
+        if not valid_stations.empty:
+            # KDTree ile en yakın komşu arama (çok daha hızlı)
+            from scipy.spatial import KDTree
+            
+            # Birim küre üzerindeki 3B noktalar: kiriş mesafesi büyük daire mesafesiyle aynı sırayı verir
+            valid_coords = valid_stations[['Latitude', 'Longitude']].to_numpy(dtype=float)
+            tree = KDTree(_unit_vectors(valid_coords[:, 0], valid_coords[:, 1]))
+            
+            missing_coords = df.loc[missing_mask, ['Latitude', 'Longitude']].to_numpy(dtype=float)
+            _, indices = tree.query(_unit_vectors(missing_coords[:, 0], missing_coords[:, 1]), k=1, workers=-1)
+            nearest_coords = valid_coords[indices]
+            distances = haversine_vec(missing_coords[:, 0], missing_coords[:, 1],
+                                      nearest_coords[:, 0], nearest_coords[:, 1])
+            
+            # Mesafe eşiğini aşanlar 0.0; tek seferde atama
+            nearest_vs30 = valid_stations['Vs30'].to_numpy(dtype=float)[indices]
+            df.loc[missing_mask, 'Vs30'] = np.where(distances <= max_distance_km, nearest_vs30, 0.0)
+    return df
 
 
 class IColumnMapper(Protocol):
@@ -28,76 +103,90 @@ class IColumnMapper(Protocol):
 class BaseColumnMapper(IColumnMapper, ABC):
     """Temel kolon eşleyici sınıfı"""
 
-    def __init__(self, column_mappings: Dict[str, str], **kwargs):
-        #
+    def __init__(self, column_mappings: Mapping[str, str] = MappingProxyType({}), **kwargs):
+        # Paylaşılan (salt okunur) eşlemeler kopyalanmaz
         self.column_mappings = column_mappings
+        # Aynı şemadaki tekrar çağrılar için kolon tuple'ı -> mevcut eşlemeler
+        self._present_mappings = lru_cache(maxsize=8)(self._select_present_mappings)
 
     def map_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Temel eşleme işlemi"""
-        df = df.copy()
-        df = df.rename(columns=self.column_mappings)
+        """Temel eşleme işlemi (girdi değiştirilmez; veri kopyalanmadan sığ kopya üzerinde çalışılır)"""
+        df = df.copy(deep=False)
+        present = self._present_mappings(tuple(df.columns))
+        if present:
+            df.rename(columns=present, inplace=True)
         return self._ensure_standard_columns(df)
 
+    def _select_present_mappings(self, columns: tuple) -> Dict[str, str]:
+        """Sadece DataFrame'de bulunan kolonların eşlemesi"""
+        present = set(columns)
+        return {k: v for k, v in self.column_mappings.items() if k in present}
+
     def _ensure_standard_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Eksik standart kolonları ekle"""
-        for col in STANDARD_COLUMNS:
-            if col not in df.columns:
-                df[col] = None
-        return df[STANDARD_COLUMNS]
+        """Eksik standart kolonları ekle (tek reindex ile; eksikler NaN olur)"""
+        return df.reindex(columns=STANDARD_COLUMNS_INDEX)
 
 # ==================== PROVIDER-SPECIFIC MAPPERS ====================
 
 
+# AFAD TDVMS yanıt kolonları
+_AFAD_MAP = MappingProxyType({
+    "waveformId"                : "RSN"           ,
+    "eventId"                   : "EVENT"         ,
+    "mvalue"                    : "MAGNITUDE"     ,
+    "mtype"                     : "MAGNITUDE_TYPE",
+    "rjb"                       : "RJB(km)"       , 
+    "rrup"                      : "RRUP(km)"      ,
+    "repi"                      : "REPI(km)"      , 
+    "rhyp"                      : "RHYP(km)"      ,   
+    "relatedEarthquakeLatitude" : "HYPO_LAT"      ,   
+    "relatedEarthquakeLongitude": "HYPO_LON"      ,
+    "stationCode"               : "SSN"           , #Station Sequence Number olarak kullanacağız, bu kod üzerinden ilgili depreme ait kayıtlar listeleniyor.  
+    "stationId"                 : "STATION_ID"    ,  
+    "relatedStationLatitude"    : "STATION_LAT"   ,   
+    "relatedStationLongitude"   : "STATION_LON"   ,    
+    "pga"                       : "PGA(cm2/sec)"  ,    
+    "pgv"                       : "PGV(cm/sec)"   ,    
+    "pgd"                       : "PGD(cm)"       ,        
+    "relatedStrike1"            : "STRIKE1"       ,      
+    "relatedDip1"               : "DIP1"          ,     
+    "relatedRake1"              : "RAKE1"         ,  
+    "relatedStrike2"            : "STRIKE2"       ,   
+    "relatedDip2"               : "DIP2"          ,
+    "relatedRake2"              : "RAKE2"         ,
+    "t90e"                      : "T90_E",
+    "t90n"                      : "T90_N", 
+    "t90u"                      : "T90_U"
+    # None                        :      "HYPO_DEPTH(km)",   
+    # None                        :      "FAULT_NAME"    ,   
+    # None                        :      "SLIP_RATE"     , 
+    # None,                       :      "LOWFREQ(Hz)"   ,
+    # "t90e"                      :      "T90_avg(sec)"  ,
+    # "stationId"                 :      "SSN"           ,
+})
+
+
 class AFADColumnMapper(BaseColumnMapper):
     """AFAD mapper"""
+
+    # map_columns'un okuduğu ham AFAD alanları; sağlayıcı yanıt tablosunu yalnızca bunlarla kurar
+    source_columns: tuple[str, ...] = (*_AFAD_MAP, "eventDate", "recordFilename")
     
     def __init__(self, **kwargs):
-        mappings = {
-            "waveformId"                : "RSN"           ,
-            "eventId"                   : "EVENT"         ,
-            "mvalue"                    : "MAGNITUDE"     ,
-            "mtype"                     : "MAGNITUDE_TYPE",
-            "rjb"                       : "RJB(km)"       , 
-            "rrup"                      : "RRUP(km)"      ,
-            "repi"                      : "REPI(km)"      , 
-            "rhyp"                      : "RHYP(km)"      ,   
-            "relatedEarthquakeLatitude" : "HYPO_LAT"      ,   
-            "relatedEarthquakeLongitude": "HYPO_LON"      ,
-            "stationCode"               : "SSN"           , #Station Sequence Number olarak kullanacağız, bu kod üzerinden ilgili depreme ait kayıtlar listeleniyor.  
-            "stationId"                 : "STATION_ID"    ,  
-            "relatedStationLatitude"    : "STATION_LAT"   ,   
-            "relatedStationLongitude"   : "STATION_LON"   ,    
-            "pga"                       : "PGA(cm2/sec)"  ,    
-            "pgv"                       : "PGV(cm/sec)"   ,    
-            "pgd"                       : "PGD(cm)"       ,        
-            "relatedStrike1"            : "STRIKE1"       ,      
-            "relatedDip1"               : "DIP1"          ,     
-            "relatedRake1"              : "RAKE1"         ,  
-            "relatedStrike2"            : "STRIKE2"       ,   
-            "relatedDip2"               : "DIP2"          ,
-            "relatedRake2"              : "RAKE2"         ,
-            "t90e"                      : "T90_E",
-            "t90n"                      : "T90_N", 
-            "t90u"                      : "T90_U"
-        }
-         
-            # None                        :      "HYPO_DEPTH(km)",   
-            # None                        :      "FAULT_NAME"    ,   
-            # None                        :      "SLIP_RATE"     , 
-            # None,                       :      "LOWFREQ(Hz)"   ,
-            # "t90e"                      :      "T90_avg(sec)"  ,
-            # "stationId"                 :      "SSN"           , 
-            
-        super().__init__(mappings)
+        super().__init__(_AFAD_MAP)
         self.station_df = self._build_station_info_df()
+        # İstasyon kodları + tamsayı kodla erişilen değer tabloları (son eleman: eşleşmeyen kodlar için varsayılan)
+        self._station_codes, self._vs30_lut, self._location_lut = self._build_station_lookups(self.station_df)
     
     def map_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """AFAD'a özel ek işlemler"""
-        df = df.copy()
+        # Sığ kopya: yeni/yeniden atanan kolonlar çağıranın DataFrame'ine yansımaz
+        df = df.copy(deep=False)
         
         # 1. YEAR dönüşümü
         if "eventDate" in df.columns:
-            df["YEAR"] = df["eventDate"].str[:4].astype(int)
+            # cache=True: aynı depremin tarihleri her istasyon için tekrarlanır, tekil değerler bir kez parse edilir
+            df["YEAR"] = pd.to_datetime(df["eventDate"], format="ISO8601", errors="coerce", cache=True).dt.year.astype("Int32")
         
         # 2. Özel alanlar için işlemler
         df = self._handle_record_filenames(df)
@@ -119,19 +208,14 @@ class AFADColumnMapper(BaseColumnMapper):
     def _handle_station_infos(self, df: pd.DataFrame) -> pd.DataFrame:
         """İstasyon bilgilerini işle"""
         if "stationCode" in df.columns:
-            # İstasyon kodlarını temizle
-            df["stationCode"] = df["stationCode"].astype(str).str.strip()
+            # İstasyon kodlarını temizle (sağlayıcı yüklerken temizlediyse atla)
+            if not df.attrs.get(STATION_CODES_NORMALIZED):
+                df["stationCode"] = df["stationCode"].astype(str).str.strip()
             
-            # Dict ile hızlı lookup
-            vs30_map = dict(zip(self.station_df["Code"], self.station_df["Vs30"]))
-            location_map = dict(zip(self.station_df["Code"], self.station_df["Location"]))
-            # station_lat_map = dict(zip(self.station_df["Code"], self.station_df["Latitude"]))
-            # station_lon_map = dict(zip(self.station_df["Code"], self.station_df["Longitude"]))
-            # station_id_map  = dict(zip(self.station_df["Code"], self.station_df["Location"]))
-            
-            # Eşleme yap
-            df["VS30(m/s)"] = df["stationCode"].map(vs30_map).fillna(0.0)
-            df["STATION"] = df["stationCode"].map(location_map).fillna("")
+            # Eşleme yap: istasyon indeksindeki konumlar (-1 = bilinmeyen) ile tamsayı gather
+            codes = self._station_codes.get_indexer(df["stationCode"])
+            df["VS30(m/s)"] = self._vs30_lut[codes]
+            df["STATION"] = self._location_lut[codes]
             
             # SSN için stationId kullan
             # if "STATION_ID" in df.columns:
@@ -141,82 +225,64 @@ class AFADColumnMapper(BaseColumnMapper):
 
     def _handle_mechanisms(self, df: pd.DataFrame) -> pd.DataFrame:
         """Mekanizma bilgisini işle"""
-        # Vektörize hesaplama için
-        dip1 = df.get("relatedDip1", 0)
-        rake1 = df.get("relatedRake1", 0) 
-        dip2 = df.get("relatedDip2", 0)
-        rake2 = df.get("relatedRake2", 0)
-        
-        # Her satır için mekanizma hesapla
-        mechanisms = []
-        for i in range(len(df)):
-            mechanism = self._classify_fault_planes(
-                dip1.iloc[i] if not pd.isna(dip1.iloc[i]) else 0,
-                rake1.iloc[i] if not pd.isna(rake1.iloc[i]) else 0,
-                dip2.iloc[i] if not pd.isna(dip2.iloc[i]) else 0, 
-                rake2.iloc[i] if not pd.isna(rake2.iloc[i]) else 0
-            )
-            mechanisms.append(mechanism)
-        
-        df["MECHANISM"] = mechanisms
+        # Eksik kolon/değerler 0 kabul edilir (satır bazlı sürümle aynı)
+        dip1, rake1, dip2, rake2 = (
+            np.nan_to_num(pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float), nan=0.0)
+            if col in df.columns else np.zeros(len(df))
+            for col in ("relatedDip1", "relatedRake1", "relatedDip2", "relatedRake2"))
+
+        # İki düzlem tek geçişte sınıflanır (0..5) -> birleşik etiketin MECHANISM_DTYPE kategori kodu
+        plane_codes = self._classify_fault_type_vec(np.stack((dip1, dip2)), np.stack((rake1, rake2)))
+        codes = _FAULT_PAIR_CODES[plane_codes[0], plane_codes[1]]
+        df["MECHANISM"] = pd.Categorical.from_codes(codes, dtype=MECHANISM_DTYPE)
         return df
 
     def _handle_t90_duration(self, df: pd.DataFrame) -> pd.DataFrame:
         """T90 sürelerini işle"""
         # t90_cols = ["T90_E", "T90_N", "T90_U"]
-        t90_cols = ["t90e", "t90n", "t90u"]
-        if all(col in df.columns for col in t90_cols):
-            # Ortalama hesapla
-            df["T90_avg(sec)"] = df[t90_cols].mean(axis=1)
+        t90_cols = _T90_COLUMNS
+        if _T90_COLUMN_SET.issubset(df.columns):
+            # Ortalama hesapla (NaN'ler atlanır; süreler için float32 yeterli); ara DataFrame kurulmaz
+            t90 = np.column_stack([df[col].to_numpy(dtype=np.float32, na_value=np.nan) for col in t90_cols])
+            valid = ~np.isnan(t90)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                df["T90_avg(sec)"] = np.where(valid, t90, 0).sum(axis=1) / valid.sum(axis=1, dtype=np.float32)
             # Opsiyonel: Individual kolonları temizle
             # df = df.drop(columns=t90_cols, errors='ignore')
         
         return df
 
     # ------- STATION UTILITY FUNCTIONS ------------
+    @staticmethod
+    def _build_station_lookups(station_df: pd.DataFrame) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+        """
+        Tekil istasyon kodları ile aynı sıradaki Vs30 (float32) ve Location dizileri (tekrarlı kodlarda son kayıt geçerli).
+        Dizilerin sonuna eşleşmeyen kodlar (-1) için 0.0 / "" eklenir.
+        """
+        if station_df.empty or "Code" not in station_df.columns:
+            return pd.Index([], dtype=object), np.zeros(1, dtype=np.float32), np.array([""], dtype=object)
+        # merge(validate="m:1") karşılığı: tekrarlı kodlar veri hatasıdır, görünür kılınır
+        duplicated = station_df["Code"].duplicated(keep="last")
+        if duplicated.any():
+            print(f"Uyarı: istasyon dosyasında tekrarlı kodlar var, son kayıt kullanılacak: "
+                  f"{sorted(station_df.loc[duplicated, 'Code'].unique())}")
+        lookup = station_df[~duplicated]
+        vs30 = np.append(lookup["Vs30"].fillna(0.0).to_numpy(dtype=np.float32), np.float32(0.0))
+        location = np.append(lookup["Location"].fillna("").to_numpy(dtype=object), "")
+        return pd.Index(lookup["Code"]), vs30, location
+
     def _haversine(self, lat1, lon1, lat2, lon2):
         """
         İki nokta arasındaki mesafeyi km cinsinden döndürür (Haversine formülü).
         """
-        R = 6371.0  # Dünya yarıçapı (km)
-
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-
-        return R * c
+        return float(haversine_vec(lat1, lon1, lat2, lon2))
 
     # AFADDataProvider'da istasyon eşleme iyileştirmesi
-    @lru_cache(maxsize=1)
     def _build_station_info_df(self, max_distance_km: float = 30.0) -> pd.DataFrame:
-        """Daha hızlı istasyon bilgisi yükleme"""
+        """Daha hızlı istasyon bilgisi yükleme (örnekler arası önbellekli)"""
         try:
-            df = load_excel("stations.xlsx")
-            df["Code"] = df["Code"].astype(str).str.strip()
-            
-            # Eksik Vs30'ları doldurma - vektörize versiyon
-            missing_mask = (df["Vs30"].isna()) | (df["Vs30"] == 0)
-            if missing_mask.any():
-                valid_stations = df[~missing_mask]
-                if not valid_stations.empty:
-                    # KDTree ile en yakın komşu arama (çok daha hızlı)
-                    from scipy.spatial import KDTree
-                    
-                    valid_coords = valid_stations[['Latitude', 'Longitude']].values
-                    tree = KDTree(valid_coords)
-                    
-                    missing_coords = df.loc[missing_mask, ['Latitude', 'Longitude']].values
-                    distances, indices = tree.query(missing_coords, k=1)
-                    
-                    for i, (idx, distance) in enumerate(zip(missing_mask[missing_mask].index, distances)):
-                        if distance <= max_distance_km:
-                            df.loc[idx, 'Vs30'] = valid_stations.iloc[indices[i]]['Vs30']
-                        else:
-                            df.loc[idx, 'Vs30'] = 0.0
-            return df
+            # Önbellekteki tablonun yanlışlıkla değiştirilmemesi için kopya
+            return _load_station_info_df("stations.xlsx", max_distance_km).copy()
             
         except Exception as e:
             print(f"İstasyon dosyası yükleme hatası: {e}")
@@ -258,6 +324,19 @@ class AFADColumnMapper(BaseColumnMapper):
         else:
             return MECHANISM_MAP[5]
 
+    @staticmethod
+    def _classify_fault_type_vec(dip: np.ndarray, rake: np.ndarray) -> np.ndarray:
+        """_classify_fault_type'ın dizi hali; MECHANISM_MAP kodlarını (0..5, int8) döndürür"""
+        rake_norm = ((rake + 180) % 360) - 180
+        abs_rake = np.abs(rake_norm)
+        codes = np.full(rake_norm.shape, 5, dtype=np.int8)
+
+        # 60 <= |rake| <= 120: işaret ters/normal, dip < 30 oblik varyantını seçer
+        dip_slip = (abs_rake >= 60) & (abs_rake <= 120)
+        codes[dip_slip] = _DIP_SLIP_CODES[(rake_norm[dip_slip] > 0) * 2 + (dip[dip_slip] >= 30)]
+        codes[(abs_rake <= 30) | (abs_rake >= 150)] = 0
+        return codes
+
     def _classify_fault_planes(self, dip1, rake1, dip2, rake2) -> str:
         """
         İki fay düzlemi için sınıflandırma yapar.
@@ -269,53 +348,58 @@ class AFADColumnMapper(BaseColumnMapper):
         return f1 if f1 == f2 else f"{f1}-{f2}"
 
 
+# PEER NGA-West2 flatfile kolonları (FDSN de aynı şemayı kullanır)
+_PEER_MAP = MappingProxyType({
+    "Record Sequence Number"                    : "RSN",
+    "Earthquake Name"                           : "EVENT",
+    "YEAR"                                      : "YEAR", 
+    "Earthquake Magnitude"                      : "MAGNITUDE",
+    "Magnitude Type"                            : "MAGNITUDE_TYPE",
+    "Station Name"                              : "STATION",
+    "Station Sequence Number"                   : "SSN",
+    "Station ID  No."                           : "STATION_ID",
+    "Station Latitude"                          : "STATIN_LAT",
+    "Station Longitude"                         : "STATIN_LON",
+    "Vs30 (m/s) selected for analysis"          : "VS30(m/s)",
+    "Strike (deg)"                              : "STRIKE1",
+    "Dip (deg)"                                 : "DIP1",
+    "Rake Angle (deg)"                          : "RAKE1",
+    "Mechanism Based on Rake Angle"             : "MECHANISM",
+    "EpiD (km)"                                 : "EPICENTER_DEPTH(km)",
+    "HypD (km)"                                 : "HYPOCENTER_DEPTH(km)",
+    "Joyner-Boore Dist. (km)"                   : "RJB(km)",
+    "ClstD (km)"                                : "RRUP(km)",
+    "Hypocenter Latitude (deg)"                 : "HYPO_LAT",
+    "Hypocenter Longitude (deg)"                : "HYPO_LON",
+    "Hypocenter Depth (km)"                     : "HYPO_DEPTH(km)",
+    "Lowest Usable Freq - Ave. Component (Hz)"  : "LOWFREQ(Hz)",
+    "File Name (Horizontal 1)"                  : "FILE_NAME_H1",
+    "File Name (Horizontal 2)"                  : "FILE_NAME_H2",
+    "File Name (Vertical)"                      : "FILE_NAME_V",
+    "PGA(g)"                                    : "PGA(cm2/sec)",
+    "PGV (cm/sec)"                              : "PGV(cm/sec)",
+    "PGD (cm)"                                  : "PGD(cm)",
+    "5-95%Duration(sec)"                        : "T90(sec)", 
+    "AriasIntensity(m/sec)"                     : "ARIAS_INTENSITY(m/sec)"
+})
+
+
 class PEERColumnMapper(BaseColumnMapper):
     """PEER kolon eşleyici"""
     
     def __init__(self, **kwargs):
-        mappings = {
-            "Record Sequence Number"                    : "RSN",
-            "Earthquake Name"                           : "EVENT",
-            "YEAR"                                      : "YEAR", 
-            "Earthquake Magnitude"                      : "MAGNITUDE",
-            "Magnitude Type"                            : "MAGNITUDE_TYPE",
-            "Station Name"                              : "STATION",
-            "Station Sequence Number"                   : "SSN",
-            "Station ID  No."                           : "STATION_ID",
-            "Station Latitude"                          : "STATIN_LAT",
-            "Station Longitude"                         : "STATIN_LON",
-            "Vs30 (m/s) selected for analysis"          : "VS30(m/s)",
-            "Strike (deg)"                              : "STRIKE1",
-            "Dip (deg)"                                 : "DIP1",
-            "Rake Angle (deg)"                          : "RAKE1",
-            "Mechanism Based on Rake Angle"             : "MECHANISM",
-            "EpiD (km)"                                 : "EPICENTER_DEPTH(km)",
-            "HypD (km)"                                 : "HYPOCENTER_DEPTH(km)",
-            "Joyner-Boore Dist. (km)"                   : "RJB(km)",
-            "ClstD (km)"                                : "RRUP(km)",
-            "Hypocenter Latitude (deg)"                 : "HYPO_LAT",
-            "Hypocenter Longitude (deg)"                : "HYPO_LON",
-            "Hypocenter Depth (km)"                     : "HYPO_DEPTH(km)",
-            "Lowest Usable Freq - Ave. Component (Hz)"  : "LOWFREQ(Hz)",
-            "File Name (Horizontal 1)"                  : "FILE_NAME_H1",
-            "File Name (Horizontal 2)"                  : "FILE_NAME_H2",
-            "File Name (Vertical)"                      : "FILE_NAME_V",
-            "PGA(g)"                                    : "PGA(cm2/sec)",
-            "PGV (cm/sec)"                              : "PGV(cm/sec)",
-            "PGD (cm)"                                  : "PGD(cm)",
-            "5-95%Duration(sec)"                        : "T90(sec)", 
-            "AriasIntensity(m/sec)"                     : "ARIAS_INTENSITY(m/sec)"
-        }
-        super().__init__(mappings)
+        super().__init__(_PEER_MAP)
     
     def map_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """PEER'a özel ek işlemler"""
-        df = df.copy()
         df = super().map_columns(df)
         
-        # PGA birim dönüşümü (g → cm/s²)
-        if "PGA(cm2/sec)" in df.columns:
-            df["PGA(cm2/sec)"] = df["PGA(cm2/sec)"] * 980.665
+        # PGA birim dönüşümü (g → cm/s²); sayısal kolonda float32 yeterli
+        pga = df.get("PGA(cm2/sec)")
+        if pga is not None and pd.api.types.is_numeric_dtype(pga.dtype):
+            df["PGA(cm2/sec)"] = pga.to_numpy(dtype=np.float32, na_value=np.nan) * np.float32(980.665)
+        elif pga is not None:
+            df["PGA(cm2/sec)"] = pga * 980.665
         
         return df
 
@@ -326,41 +410,8 @@ class FDSNColumnMapper(BaseColumnMapper):
     """FDSN kolon eşleyici"""
 
     def __init__(self, **kwargs):
-        mappings = {
-            # FDSN spesifik kolon eşlemeleri buraya eklenebilir
-            "Record Sequence Number"                    : "RSN",
-            "Earthquake Name"                           : "EVENT",
-            "YEAR"                                      : "YEAR", 
-            "Earthquake Magnitude"                      : "MAGNITUDE",
-            "Magnitude Type"                            : "MAGNITUDE_TYPE",
-            "Station Name"                              : "STATION",
-            "Station Sequence Number"                   : "SSN",
-            "Station ID  No."                           : "STATION_ID",
-            "Station Latitude"                          : "STATIN_LAT",
-            "Station Longitude"                         : "STATIN_LON",
-            "Vs30 (m/s) selected for analysis"          : "VS30(m/s)",
-            "Strike (deg)"                              : "STRIKE1",
-            "Dip (deg)"                                 : "DIP1",
-            "Rake Angle (deg)"                          : "RAKE1",
-            "Mechanism Based on Rake Angle"             : "MECHANISM",
-            "EpiD (km)"                                 : "EPICENTER_DEPTH(km)",
-            "HypD (km)"                                 : "HYPOCENTER_DEPTH(km)",
-            "Joyner-Boore Dist. (km)"                   : "RJB(km)",
-            "ClstD (km)"                                : "RRUP(km)",
-            "Hypocenter Latitude (deg)"                 : "HYPO_LAT",
-            "Hypocenter Longitude (deg)"                : "HYPO_LON",
-            "Hypocenter Depth (km)"                     : "HYPO_DEPTH(km)",
-            "Lowest Usable Freq - Ave. Component (Hz)"  : "LOWFREQ(Hz)",
-            "File Name (Horizontal 1)"                  : "FILE_NAME_H1",
-            "File Name (Horizontal 2)"                  : "FILE_NAME_H2",
-            "File Name (Vertical)"                      : "FILE_NAME_V",
-            "PGA(g)"                                    : "PGA(cm2/sec)",
-            "PGV (cm/sec)"                              : "PGV(cm/sec)",
-            "PGD (cm)"                                  : "PGD(cm)",
-            "5-95%Duration(sec)"                        : "T90(sec)", 
-            "AriasIntensity(m/sec)"                     : "ARIAS_INTENSITY(m/sec)"
-        }
-        super().__init__(mappings)
+        # FDSN spesifik kolon eşlemeleri buraya eklenebilir
+        super().__init__(_PEER_MAP)
 
 
 class ColumnMapperFactory:
@@ -369,12 +420,13 @@ class ColumnMapperFactory:
     _mappers = {
         ProviderName.AFAD: AFADColumnMapper,
         ProviderName.PEER: PEERColumnMapper,
-        # ProviderName.FDSN: BaseColumnMapper,
+        # ProviderName.FDSN: FDSNColumnMapper,  # Enums'ta FDSN açıldığında
     }
     
     @classmethod
+    @lru_cache(maxsize=None)
     def get_mapper(cls, provider: ProviderName) -> IColumnMapper:
-        """Provider'a göre uygun eşleyiciyi döndür"""
+        """Provider'a göre uygun eşleyiciyi döndür (provider başına tek örnek)"""
         mapper_class = cls._mappers.get(provider, BaseColumnMapper)
         return mapper_class()
     
@@ -382,12 +434,9 @@ class ColumnMapperFactory:
     def register_mapper(cls, provider: ProviderName, mapper_class: Type[IColumnMapper]):
         """Yeni eşleyici kaydet"""
         cls._mappers[provider] = mapper_class
+        cls.get_mapper.cache_clear()
 
     @classmethod
     def create_mapper(cls, provider_Name, **kwargs) -> IColumnMapper:
-        if provider_Name == ProviderName.AFAD:
-            return AFADColumnMapper(**kwargs)
-        if provider_Name == ProviderName.PEER:
-            return PEERColumnMapper(**kwargs)
-        else:
-            return BaseColumnMapper(column_mappings={}, **kwargs)
+        """Provider'a göre yeni eşleyici oluştur (kayıtlı değilse eşlemesiz temel eşleyici)"""
+        return cls._mappers.get(provider_Name, BaseColumnMapper)(**kwargs)
@@ -11,7 +11,7 @@ T = TypeVar('T')
 E = TypeVar('E', bound=Exception)
 
 # Result Pattern Implementation
-@dataclass
+@dataclass(slots=True)
 class Result(Generic[T, E]):
     success: bool
     value: Optional[T] = None
@@ -0,0 +1,75 @@
+"""
+Numba ile derlenen puanlama çekirdeği (opsiyonel).
+
+Bu modül numba kuruluysa Selection tarafından tembel (lazy) olarak içe aktarılır;
+kurulu değilse NumPy sürümü kullanılır.
+"""
+import numba
+import numpy as np
+
+# 'nnan' bilinçli olarak yok: eksik değerler NaN ile işaretli ve isnan kontrolü korunmalı
+_FASTMATH_FLAGS = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+@numba.njit(parallel=True, fastmath=_FASTMATH_FLAGS, cache=True)
+def gaussian_weighted_scores(values: np.ndarray, targets: np.ndarray, neg_inv_two_sigma_sq: np.ndarray,
+                             weights: np.ndarray, out_score: np.ndarray, out_weight: np.ndarray) -> None:
+    """
+    Tüm sayısal kriterler için ağırlıklı Gaussian puanı tek geçişte hesaplar.
+
+    Args:
+        values (np.ndarray): (N, M) kayıt değerleri (NaN = değer yok)
+        targets (np.ndarray): (M,) hedef değerler
+        neg_inv_two_sigma_sq (np.ndarray): (M,) -1 / (2 * sigma^2)
+        weights (np.ndarray): (M,) ağırlıklar
+        out_score (np.ndarray): (N,) ağırlıklı puan toplamı (eklenir)
+        out_weight (np.ndarray): (N,) değeri olan kriterlerin ağırlık toplamı (eklenir)
+    """
+    n_rows, n_keys = values.shape
+    for i in numba.prange(n_rows):
+        score = 0.0
+        weight = 0.0
+        for k in range(n_keys):
+            v = values[i, k]
+            if not np.isnan(v):
+                d = v - targets[k]
+                score += weights[k] * np.exp(d * d * neg_inv_two_sigma_sq[k])
+                weight += weights[k]
+        out_score[i] += score
+        out_weight[i] += weight
+
+
+@numba.njit(cache=True)
+def select_with_quotas(station_codes: np.ndarray, event_codes: np.ndarray, n_stations: int, n_events: int,
+                       num_records: int, max_per_station: int, max_per_event: int) -> np.ndarray:
+    """
+    Puana göre sıralı kayıtlar üzerinde istasyon/deprem kotalı açgözlü seçim.
+
+    Args:
+        station_codes (np.ndarray): (N,) sıralı kayıtların istasyon kodları (0..n_stations-1)
+        event_codes (np.ndarray): (N,) sıralı kayıtların deprem kodları (0..n_events-1)
+        n_stations (int): farklı istasyon sayısı
+        n_events (int): farklı deprem sayısı
+        num_records (int): seçilecek en fazla kayıt
+        max_per_station (int): istasyon başına en fazla kayıt
+        max_per_event (int): deprem başına en fazla kayıt
+
+    Returns:
+        np.ndarray: seçilen kayıtların sıralı dizideki pozisyonları
+    """
+    station_counts = np.zeros(n_stations, dtype=np.int64)
+    event_counts = np.zeros(n_events, dtype=np.int64)
+    selected = np.empty(min(num_records, station_codes.shape[0]), dtype=np.int64)
+    n_selected = 0
+    for position in range(station_codes.shape[0]):
+        if n_selected >= selected.shape[0]:
+            break
+        station = station_codes[position]
+        event = event_codes[position]
+        if station_counts[station] >= max_per_station or event_counts[event] >= max_per_event:
+            continue
+        selected[n_selected] = position
+        n_selected += 1
+        station_counts[station] += 1
+        event_counts[event] += 1
+    return selected[:n_selected]
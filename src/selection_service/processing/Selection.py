@@ -1,13 +1,78 @@
 from abc import ABC, abstractmethod
+import re
 from dataclasses import dataclass
 from datetime import datetime
-import math
-from typing import Any, Dict, List, Optional, Protocol, Tuple
+from functools import lru_cache
+from typing import Annotated, Any, Dict, List, Literal, Optional, Protocol, Tuple
 from obspy import UTCDateTime
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, Field, model_validator
 from ..enums.Enums import DesignCode
-from ..core.Config import MECHANISM_MAP,REVERSE_MECHANISM_MAP, SCORING_MAP, get_mechanism_numeric
+from ..core.Config import (MECHANISM_NAMES, REVERSE_MECHANISM_MAP, SCORING_MAP, SCORING_DTYPE,
+                           NUMERIC_SCORE_KEYS, NUMERIC_SCORE_COLUMNS, CATEGORICAL_TIER_SCORES, MAX_SCORE, SELECTION_WINDOW_FACTOR, USE_NUMBA,
+                           extract_score_matrix, get_mechanism_numeric_vec)
+
+@lru_cache(maxsize=1)
+def _load_numba_score_kernel():
+    """Numba kuruluysa derlenmiş puanlama çekirdeğini, değilse None döndürür (ilk çağrıda içe aktarılır)"""
+    try:
+        from .ScoreKernel import gaussian_weighted_scores
+    except ImportError:
+        return None
+    return gaussian_weighted_scores
+
+
+@lru_cache(maxsize=1)
+def _load_numba_selection_kernel():
+    """Numba kuruluysa derlenmiş kotalı seçim çekirdeğini, değilse None döndürür"""
+    try:
+        from .ScoreKernel import select_with_quotas
+    except ImportError:
+        return None
+    return select_with_quotas
+
+
+def _select_with_quotas(station_codes: np.ndarray, event_codes: np.ndarray, n_stations: int, n_events: int,
+                        num_records: int, max_per_station: int, max_per_event: int) -> np.ndarray:
+    """ScoreKernel.select_with_quotas ile aynı açgözlü seçim; numba yokken kullanılır"""
+    station_counts = [0] * n_stations
+    event_counts = [0] * n_events
+    selected = []
+    for position, (station, event) in enumerate(zip(station_codes.tolist(), event_codes.tolist())):
+        if len(selected) >= num_records:
+            break
+        if station_counts[station] >= max_per_station or event_counts[event] >= max_per_event:
+            continue
+        selected.append(position)
+        station_counts[station] += 1
+        event_counts[event] += 1
+    return np.asarray(selected, dtype=np.int64)
+
+
+def _single_quota_positions(group_codes: np.ndarray, max_per_group: int, num_records: int) -> np.ndarray:
+    """Tek kota bağlayıcıyken açgözlü seçimin karşılığı: her grubun ilk max_per_group kaydı, toplamda num_records"""
+    rank_in_group = pd.Series(group_codes).groupby(group_codes, sort=False).cumcount().to_numpy()
+    return np.flatnonzero(rank_in_group < max_per_group)[:num_records]
+
+
+@lru_cache(maxsize=32)
+def _substring_pattern(targets: Tuple[str, ...]) -> "re.Pattern[str]":
+    """Hedeflerden herhangi birini içeren metni tek geçişte bulan derlenmiş alternation regex'i"""
+    return re.compile("|".join(map(re.escape, targets)))
+
+
+@lru_cache(maxsize=256)
+def _parse_iso_date(value: str) -> datetime:
+    """ISO-8601 tarih metnini bir kez çözümler (aynı tarih metinleri tekrar parse edilmez)"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+@lru_cache(maxsize=256)
+def _parse_utc_datetime(value: str) -> UTCDateTime:
+    """FDSN istekleri için UTCDateTime önbelleği"""
+    return UTCDateTime(value)
+
 
 class ScoringWeights(BaseModel):
     """
@@ -16,18 +81,18 @@ class ScoringWeights(BaseModel):
     """
     # Config'deki her anahtar için dinamik alan oluşturuyoruz
     # (Burayı manuel de yazabilirsiniz ama Pydantic ile dinamik de yönetilebilir)
-    magnitude: float = SCORING_MAP['magnitude']['weight']
-    rjb: float = SCORING_MAP['rjb']['weight']
-    rrup: float = SCORING_MAP['rrup']['weight']
-    repi: float = SCORING_MAP['repi']['weight']
-    vs30: float = SCORING_MAP['vs30']['weight']
-    pga: float = SCORING_MAP['pga']['weight']
-    pgv: float = SCORING_MAP['pgv']['weight']
-    pgd: float = SCORING_MAP['pgd']['weight']
-    t90: float = SCORING_MAP['t90']['weight']
-    arias: float = SCORING_MAP['arias']['weight']
-    depth: float = SCORING_MAP['depth']['weight']
-    mechanism: float = SCORING_MAP['mechanism']['weight']
+    magnitude: float = SCORING_MAP['magnitude'].weight
+    rjb: float = SCORING_MAP['rjb'].weight
+    rrup: float = SCORING_MAP['rrup'].weight
+    repi: float = SCORING_MAP['repi'].weight
+    vs30: float = SCORING_MAP['vs30'].weight
+    pga: float = SCORING_MAP['pga'].weight
+    pgv: float = SCORING_MAP['pgv'].weight
+    pgd: float = SCORING_MAP['pgd'].weight
+    t90: float = SCORING_MAP['t90'].weight
+    arias: float = SCORING_MAP['arias'].weight
+    depth: float = SCORING_MAP['depth'].weight
+    mechanism: float = SCORING_MAP['mechanism'].weight
 
     def get_weight(self, key: str) -> float:
         return getattr(self, key, 0.0)
@@ -40,15 +105,62 @@ class SelectionConfig:
     max_per_event: int = 3
     min_score: float = 50.0
     required_components: List[str] = Field(default_factory=list)
+    backend: Literal["pandas", "pyarrow"] = "pandas"  # "pyarrow": birleşik veri Arrow tabanlı dtype'larla tutulur
+
+# Mutlak sınırlar alan seviyesinde (pydantic-core) kontrol edilir; Python tarafında yalnızca alanlar arası kurallar kalır
+_Magnitude = Optional[Annotated[float, Field(ge=0, le=10)]]
+_Vs30 = Optional[Annotated[float, Field(ge=0, le=3000)]]
+_Depth = Optional[Annotated[float, Field(ge=0, le=700)]]
+_Pga = Optional[Annotated[float, Field(ge=0, le=10000)]]
+_PgvPgd = Optional[Annotated[float, Field(ge=0, le=1000)]]
+_Distance = Optional[Annotated[float, Field(ge=0)]]
+_Latitude = Optional[Annotated[float, Field(ge=-90, le=90)]]
+_Longitude = Optional[Annotated[float, Field(ge=-180, le=180)]]
+
+# SearchCriteria sıra kuralları: (min alanı, max alanı, hata mesajı)
+_ORDER_RULES: Tuple[Tuple[str, str, str], ...] = (
+    ("min_magnitude", "max_magnitude", "Min büyüklük Max büyüklükten büyük olamaz."),
+    ("min_vs30", "max_vs30", "Minimum VS30 maksimum VS30'dan büyük olamaz."),
+    ("min_depth", "max_depth", "Minimum derinlik maksimum derinlikten büyük olamaz."),
+    ("min_pga", "max_pga", "Minimum PGA maksimum PGA'dan büyük olamaz."),
+    ("min_pgv", "max_pgv", "Minimum PGV maksimum PGV'den büyük olamaz."),
+    ("min_pgd", "max_pgd", "Minimum PGD maksimum PGD'den büyük olamaz."),
+    *((f"min_{d}", f"max_{d}", f"min_{d} max_{d}'den büyük olamaz.") for d in ("Repi", "Rhyp", "Rjb", "Rrup")),
+)
+
+# AFAD API parametreleri: (API anahtarı, SearchCriteria alanı); None değerler istekten düşülür
+_AFAD_PARAM_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("fromLatitude", "min_latitude"), ("toLatitude", "max_latitude"),
+    ("fromLongitude", "min_longitude"), ("toLongitude", "max_longitude"),
+    ("fromMagnitude", "min_magnitude"), ("toMagnitude", "max_magnitude"),
+    ("from_depth", "min_depth"), ("to_depth", "max_depth"),
+    ("fromRepi", "min_Repi"), ("toRepi", "max_Repi"),
+    ("fromRhyp", "min_Rhyp"), ("toRhyp", "max_Rhyp"),
+    ("fromRjb", "min_Rjb"), ("toRjb", "max_Rjb"),
+    ("fromRrup", "min_Rrup"), ("toRrup", "max_Rrup"),
+    ("fromVs30", "min_vs30"), ("toVs30", "max_vs30"),
+    ("fromPGA", "min_pga"), ("toPGA", "max_pga"),
+    ("fromPGV", "min_pgv"), ("toPGV", "max_pgv"),
+    ("fromPgd", "min_pgd"), ("toPgd", "max_pgd"),
+    ("country", "country"), ("province", "province"), ("district", "district"),
+)
+
+# AFAD fay mekanizması parametrelerine dönüşüm
+_AFAD_MECHANISM_CODES: Dict[str, str] = {
+    "StrikeSlip": "SS",
+    "Reverse": "R",
+    "Normal": "N",
+    "Oblique": "T",
+}
 
 class SearchCriteria(BaseModel):
     """Arama kriterleri - Tüm sağlayıcılar için ortak kriterler"""
     start_date: str                          # from_date: Başlangıç tarihi (ISO format: "2023-02-06T01:16:00.000Z")  
     end_date: str                            # to_date: Bitiş tarihi (ISO format: "2023-02-06T01:18:41.000Z")
-    min_magnitude: Optional[float] = None    # from_mw: Minimum Mw büyüklüğü
-    max_magnitude: Optional[float] = None    # to_mw: Maksimum Mw büyüklüğü
-    min_depth: Optional[float] = None        # min_depth: Minimum derinlik
-    max_depth: Optional[float] = None        # max_depth: Maksimum derinlik
+    min_magnitude: _Magnitude = None         # from_mw: Minimum Mw büyüklüğü
+    max_magnitude: _Magnitude = None         # to_mw: Maksimum Mw büyüklüğü
+    min_depth: _Depth = None                 # min_depth: Minimum derinlik
+    max_depth: _Depth = None                 # max_depth: Maksimum derinlik
     station_code: Optional[str] = None       # station_code: İstasyon kodu
     network: Optional[str] = None            # network: Ağ bilgisi
     country: Optional[str] = None            # Ülke
@@ -59,27 +171,27 @@ class SearchCriteria(BaseModel):
     max_latitude: Optional[float] = None     # Maksimum enlem for box search
     min_longitude: Optional[float] = None    # Minimum boylam for box search
     max_longitude: Optional[float] = None    # Maksimum boylam for box search
-    circleLatitude: Optional[float] = None   # circleLatitude: for circle search
-    circleLongitude: Optional[float] = None  # circleLongitude: for circle search
-    circleRadius: Optional[float] = None     # circleRadius: for circle search
-    min_pga: Optional[float] = None          # Minimum PGA değeri
-    max_pga: Optional[float] = None          # Maksimum PGA değeri
-    min_pgv: Optional[float] = None          # Minimum PGV değeri
-    max_pgv: Optional[float] = None          # Maksimum PGV değeri
-    min_pgd: Optional[float] = None          # Minimum PGD değeri
-    max_pgd: Optional[float] = None          # Maksimum PGD değeri
+    circleLatitude: _Latitude = None         # circleLatitude: for circle search
+    circleLongitude: _Longitude = None       # circleLongitude: for circle search
+    circleRadius: _Distance = None           # circleRadius: for circle search
+    min_pga: _Pga = None                     # Minimum PGA değeri
+    max_pga: _Pga = None                     # Maksimum PGA değeri
+    min_pgv: _PgvPgd = None                  # Minimum PGV değeri
+    max_pgv: _PgvPgd = None                  # Maksimum PGV değeri
+    min_pgd: _PgvPgd = None                  # Minimum PGD değeri
+    max_pgd: _PgvPgd = None                  # Maksimum PGD değeri
     fault_type: Optional[str] = None         # Fay tipi
     event_name: Optional[str] = None         # Event ismi
-    min_Repi: Optional[float] = None         # Minimum Repi değeri Repicentral distance (Deprem merkez üssüne olan uzaklık) 
-    max_Repi: Optional[float] = None         # Maksimum Repi değeri Repicentral distance (Deprem merkez üssüne olan uzaklık)
-    min_Rhyp: Optional[float] = None         # Minimum Rhyp değeri Hypocentral distance (Deprem hiposantrına olan uzaklık)
-    max_Rhyp: Optional[float] = None         # Maksimum Rhyp değeri Hypocentral distance (Deprem hiposantrına olan uzaklık)
-    min_Rjb: Optional[float] = None          # Minimum Rjb değeri Joyner-Boore distance (Yüzeye izdüşüm uzaklığı)
-    max_Rjb: Optional[float] = None          # Maksimum Rjb değeri Joyner-Boore distance (Yüzeye izdüşüm uzaklığı)
-    min_Rrup: Optional[float] = None         # Minimum Rrup değeri Rupture distance (Kırılma uzaklığı)
-    max_Rrup: Optional[float] = None         # Maksimum Rrup değeri Rupture distance (Kırılma uzaklığı)
-    min_vs30: Optional[float] = None         # Minimum Vs30 değeri
-    max_vs30: Optional[float] = None         # Maksimum Vs30 değeri
+    min_Repi: _Distance = None               # Minimum Repi değeri Repicentral distance (Deprem merkez üssüne olan uzaklık) 
+    max_Repi: _Distance = None               # Maksimum Repi değeri Repicentral distance (Deprem merkez üssüne olan uzaklık)
+    min_Rhyp: _Distance = None               # Minimum Rhyp değeri Hypocentral distance (Deprem hiposantrına olan uzaklık)
+    max_Rhyp: _Distance = None               # Maksimum Rhyp değeri Hypocentral distance (Deprem hiposantrına olan uzaklık)
+    min_Rjb: _Distance = None                # Minimum Rjb değeri Joyner-Boore distance (Yüzeye izdüşüm uzaklığı)
+    max_Rjb: _Distance = None                # Maksimum Rjb değeri Joyner-Boore distance (Yüzeye izdüşüm uzaklığı)
+    min_Rrup: _Distance = None               # Minimum Rrup değeri Rupture distance (Kırılma uzaklığı)
+    max_Rrup: _Distance = None               # Maksimum Rrup değeri Rupture distance (Kırılma uzaklığı)
+    min_vs30: _Vs30 = None                   # Minimum Vs30 değeri
+    max_vs30: _Vs30 = None                   # Maksimum Vs30 değeri
     mechanisms: Optional[List[str]] = Field(default_factory=list) # Fay mekanizması (ör: StrikeSlip, Normal, Reverse, Oblique)
     region: Optional[str] = None       # Bölge adı (örn: "Marmara", "Ege", "Doğu Anadolu" gibi AFAD'ın bölge tanımlarından biri)
     bbox: Optional[Tuple[float, float, float, float]] = Field(default_factory=tuple) # BBox formatı: (min_lat, max_lat, min_lon, max_lon)
@@ -126,8 +238,8 @@ class SearchCriteria(BaseModel):
 
     def get_sigma(self, key: str) -> float:
         """Config dosyasından o parametre için belirlenen katılık (strictness) değerini kullanarak sigma hesaplar."""
-        config = SCORING_MAP.get(key, {})
-        strictness = config.get('sigma_strictness', 4.0)
+        entry = SCORING_MAP.get(key)
+        strictness = entry.sigma_strictness if entry is not None and entry.sigma_strictness is not None else 4.0
         
         # Eğer kullanıcının bir aralığı varsa, aralığı baz al
         min_val = getattr(self, f"min_{key}", None)
@@ -143,58 +255,21 @@ class SearchCriteria(BaseModel):
     
     def to_afad_params(self) -> Dict[str, Any]:
         """AFAD API'sine özel parametre dönüşümü"""
-        params = {
-            "startDate"     : f"{self.start_date}T00:00:00.000Z" if self.start_date else None,
-            "endDate"       : f"{self.end_date}T23:59:59.999Z" if self.end_date else None,
-            
-            "fromLatitude"  : self.min_latitude,
-            "toLatitude"    : self.max_latitude,
-            "fromLongitude" : self.min_longitude,
-            "toLongitude"   : self.max_longitude,
-            
-            "fromMagnitude" : self.min_magnitude,
-            "toMagnitude"   : self.max_magnitude,
-            
-            "from_depth"    : self.min_depth,  
-            "to_depth"      : self.max_depth, 
-            "fromRepi"      : self.min_Repi,
-            "toRepi"        : self.max_Repi,
-            "fromRhyp"      : self.min_Rhyp,
-            "toRhyp"        : self.max_Rhyp,
-            "fromRjb"       : self.min_Rjb,
-            "toRjb"         : self.max_Rjb,
-            "fromRrup"      : self.min_Rrup,
-            "toRrup"        : self.max_Rrup,
-            "fromVs30"      : self.min_vs30,
-            "toVs30"        : self.max_vs30,
-            "fromPGA"       : self.min_pga,
-            "toPGA"         : self.max_pga,
-            "fromPGV"       : self.min_pgv,
-            "toPGV"         : self.max_pgv,
-            "fromPgd"       : self.min_pgd,
-            "toPgd"         : self.max_pgd,
-            
-            
-            "fromT90"       : None,            
-            "country"       : self.country,  
-            "province"      : self.province,  
-            "district"      : self.district,  
-        }
+        params = {}
+        if self.start_date:
+            params["startDate"] = f"{self.start_date}T00:00:00.000Z"
+        if self.end_date:
+            params["endDate"] = f"{self.end_date}T23:59:59.999Z"
+        for key, field in _AFAD_PARAM_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                params[key] = value
         
         # if self.region:
         #     params["region"] = self.region
             
         if self.mechanisms:
-            # AFAD fay mekanizması parametrelerine dönüşüm
-            mechanism_map = {
-                "StrikeSlip": "SS",
-                "Reverse": "R",
-                "Normal": "N",
-                "Oblique": "T"
-            }
-            mechParams = [mechanism_map.get(m, m) for m in self.mechanisms]
-            params["faultType"] = mechParams[0]
-        params = {k: v for k, v in params.items() if v is not None}
+            params["faultType"] = _AFAD_MECHANISM_CODES.get(self.mechanisms[0], self.mechanisms[0])
         return params
     
     def to_peer_params(self) -> Dict[str, Any]:
@@ -222,7 +297,7 @@ class SearchCriteria(BaseModel):
         }
         
         if self.mechanisms:
-            params["mechanisms"] = [get_mechanism_numeric(m) for m in self.mechanisms if m in REVERSE_MECHANISM_MAP]
+            params["mechanisms"] = get_mechanism_numeric_vec([m for m in self.mechanisms if m in REVERSE_MECHANISM_MAP]).tolist()
             
         return params
     
@@ -258,8 +333,8 @@ class SearchCriteria(BaseModel):
             **kwargs
         """
         params = {
-            "starttime": UTCDateTime(self.start_date),
-            "endtime": UTCDateTime(self.end_date),
+            "starttime": _parse_utc_datetime(self.start_date),
+            "endtime": _parse_utc_datetime(self.end_date),
             "minmagnitude": self.min_magnitude,
             "maxmagnitude": self.max_magnitude,
             "latitude": self.min_latitude,
@@ -273,113 +348,49 @@ class SearchCriteria(BaseModel):
         return params
 
     @model_validator(mode='after')
-    def check_magnitudes(self):
-        if self.min_magnitude > self.max_magnitude:
-            raise ValueError("Min büyüklük Max büyüklükten büyük olamaz.")
-        if self.min_magnitude < 0 or self.max_magnitude > 10:
-            raise ValueError("Büyüklük değerleri 0-10 aralığında olmalıdır")
-        return self
-
-    @model_validator(mode='after')
-    def check_dates(self):
+    def check_criteria(self):
+        """Alanlar arası kurallar (tarih sırası, mekanizma, min/max sırası, bbox, dairesel arama) tek geçişte; bütün hatalar birlikte raporlanır."""
+        errors = []
         try:
-            start = datetime.fromisoformat(self.start_date.replace('Z', '+00:00'))
-            end = datetime.fromisoformat(self.end_date.replace('Z', '+00:00'))
-            if start > end:
-                raise ValueError("Başlangıç tarihi bitiş tarihinden sonra olamaz.")
+            if _parse_iso_date(self.start_date) > _parse_iso_date(self.end_date):
+                errors.append("Başlangıç tarihi bitiş tarihinden sonra olamaz.")
         except ValueError as e:
-            raise ValueError(f"Geçersiz tarih formatı: {e}")
-        return self
+            errors.append(f"Geçersiz tarih formatı: {e}")
+
+        if self.mechanisms and not MECHANISM_NAMES.issuperset(self.mechanisms):
+            invalid = [m for m in self.mechanisms if m not in MECHANISM_NAMES]
+            errors.append(f"Geçersiz mekanizma: {', '.join(invalid)}. Geçerli mekanizmalar: {list(MECHANISM_NAMES)}")
+
+        for min_field, max_field, order_msg in _ORDER_RULES:
+            min_val = getattr(self, min_field)
+            max_val = getattr(self, max_field)
+            if min_val is not None and max_val is not None and min_val > max_val:
+                errors.append(order_msg)
 
-    @model_validator(mode='after')
-    def check_bbox(self):
         if self.bbox:
             min_lat, max_lat, min_lon, max_lon = self.bbox
             if not (-90 <= min_lat <= 90) or not (-90 <= max_lat <= 90):
-                raise ValueError("Enlem değerleri -90 ile 90 arasında olmalıdır.")
+                errors.append("Enlem değerleri -90 ile 90 arasında olmalıdır.")
             if not (-180 <= min_lon <= 180) or not (-180 <= max_lon <= 180):
-                raise ValueError("Boylam değerleri -180 ile 180 arasında olmalıdır.")
+                errors.append("Boylam değerleri -180 ile 180 arasında olmalıdır.")
             if min_lat > max_lat or min_lon > max_lon:
-                raise ValueError("Bbox koordinatları doğru sırada olmalıdır (min_lat, max_lat, min_lon, max_lon).")
-        return self
+                errors.append("Bbox koordinatları doğru sırada olmalıdır (min_lat, max_lat, min_lon, max_lon).")
 
-    @model_validator(mode='after')
-    def check_vs30(self):
-        if self.min_vs30 is not None and self.max_vs30 is not None:
-            if self.min_vs30 > self.max_vs30:
-                raise ValueError("Minimum VS30 maksimum VS30'dan büyük olamaz.")
-            if self.min_vs30 < 0 or self.max_vs30 > 3000:
-                raise ValueError("VS30 değerleri 0-3000 m/s aralığında olmalıdır.")
-        return self
+        circle = (self.circleLatitude, self.circleLongitude, self.circleRadius)
+        if any(v is not None for v in circle) and any(v is None for v in circle):
+            errors.append("Dairesel arama için circleLatitude, circleLongitude ve circleRadius birlikte sağlanmalıdır.")
 
-    @model_validator(mode='after')
-    def check_mechanisms(self):
-        if self.mechanisms:
-            valid_mechanisms = set(MECHANISM_MAP.values())
-            for mechanism in self.mechanisms:
-                if mechanism not in valid_mechanisms:
-                    raise ValueError(f"Geçersiz mekanizma: {mechanism}. Geçerli mekanizmalar: {list(valid_mechanisms)}")
+        if errors:
+            raise ValueError(" ".join(errors))
         return self
 
-    @model_validator(mode='after')
-    def check_distances(self):
-        distance_fields = [
-            ('min_Repi', 'max_Repi'), ('min_Rhyp', 'max_Rhyp'),
-            ('min_Rjb', 'max_Rjb'), ('min_Rrup', 'max_Rrup')
-        ]
-        
-        for min_field, max_field in distance_fields:
-            min_val = getattr(self, min_field, None)
-            max_val = getattr(self, max_field, None)
-            
-            if min_val is not None and max_val is not None and min_val > max_val:
-                raise ValueError(f"{min_field} {max_field}'den büyük olamaz.")
-            if min_val is not None and min_val < 0:
-                raise ValueError(f"{min_field} negatif olamaz.")
-        return self
-
-    @model_validator(mode='after')
-    def check_depths(self):
-        if self.min_depth is not None and self.max_depth is not None:
-            if self.min_depth > self.max_depth:
-                raise ValueError("Minimum derinlik maksimum derinlikten büyük olamaz.")
-            if self.min_depth < 0 or self.max_depth > 700:
-                raise ValueError("Derinlik değerleri 0-700 km aralığında olmalıdır.")
-        return self
-
-    @model_validator(mode='after')
-    def check_pga_pgv_pgd(self):
-        if self.min_pga is not None and self.max_pga is not None:
-            if self.min_pga > self.max_pga:
-                raise ValueError("Minimum PGA maksimum PGA'dan büyük olamaz.")
-            if self.min_pga < 0 or self.max_pga > 10000:
-                raise ValueError("PGA değerleri 0-10000 cm/s² aralığında olmalıdır.")
-        
-        if self.min_pgv is not None and self.max_pgv is not None:
-            if self.min_pgv > self.max_pgv:
-                raise ValueError("Minimum PGV maksimum PGV'den büyük olamaz.")
-            if self.min_pgv < 0 or self.max_pgv > 1000:
-                raise ValueError("PGV değerleri 0-1000 cm/s aralığında olmalıdır.")
-        
-        if self.min_pgd is not None and self.max_pgd is not None:
-            if self.min_pgd > self.max_pgd:
-                raise ValueError("Minimum PGD maksimum PGD'den büyük olamaz.")
-            if self.min_pgd < 0 or self.max_pgd > 1000:
-                raise ValueError("PGD değerleri 0-1000 cm aralığında olmalıdır.")
-        return self
-
-    @model_validator(mode='after')
-    def check_circle_search(self):
-        if (self.circleLatitude is not None or self.circleLongitude is not None or self.circleRadius is not None):
-            if self.circleLatitude is None or self.circleLongitude is None or self.circleRadius is None:
-                raise ValueError("Dairesel arama için circleLatitude, circleLongitude ve circleRadius birlikte sağlanmalıdır.")
-            if not (-90 <= self.circleLatitude <= 90):
-                raise ValueError("circleLatitude -90 ile 90 arasında olmalıdır.")
-            if not (-180 <= self.circleLongitude <= 180):
-                raise ValueError("circleLongitude -180 ile 180 arasında olmalıdır.")
-            if self.circleRadius < 0:
-                raise ValueError("circleRadius negatif olamaz.")
-        return self
+@dataclass(frozen=True)
+class ScoringPlan:
+    """Aktif sayısal kriterlerin hedef/ölçek/ağırlık dizileri (kriter başına bir kez hesaplanır)"""
+    columns: Tuple[str, ...]
+    targets: np.ndarray
+    neg_inv_two_sigma_sq: np.ndarray   # -1 / (2 * sigma^2)
+    weights: np.ndarray
 
 class ISelectionStrategy(Protocol):
     """Seçim stratejisi interface'i"""
@@ -398,91 +409,110 @@ class BaseSelectionStrategy(ISelectionStrategy, ABC):
     def __init__(self, config: SelectionConfig):
         self.config = config
 
-    def _gaussian_score(self, value: float, target: float, sigma: float) -> float:
+    def _gaussian_score(self, values: np.ndarray, targets: np.ndarray, neg_inv_two_sigma_sq: np.ndarray) -> np.ndarray:
         """Çan Eğrisi (Gaussian) Puanlama Fonksiyonu. Hedef değere tam isabet = 1.0 puan. Uzaklaştıkça puan yumuşak bir şekilde düşer.
             Gaussian Formülü: e^(-(x-u)^2 / (2*sigma^2))
+            NumPy sürümüdür; numba kuruluysa (opsiyonel 'fast' eki) yerine ScoreKernel.gaussian_weighted_scores kullanılır.
         Args:
-            value (float): _description_
-            target (float): _description_
-            sigma (float): _description_
+            values (np.ndarray): (N, M) kayıt değerleri matrisi
+            targets (np.ndarray): (M,) parametre başına hedef değerler
+            neg_inv_two_sigma_sq (np.ndarray): (M,) parametre başına -1 / (2*sigma^2)
 
         Returns:
-            float: _description_
+            np.ndarray: (N, M) puan matrisi (NaN değerler NaN kalır)
         """
-        if value is None or target is None or pd.isna(value):
-            return 0.0
-        # Çan eğrisi formülü
-        diff = value - target
-        return math.exp(- (diff * diff) / (2 * sigma * sigma))
-
-    def _categorical_score(self, record_val: str, target_list: list) -> float:
-        """Metinsel eşleşme puanı (Mekanizma vb için)"""
-        if not record_val or not target_list:
-            return 0.0
-        
-        record_val_str = str(record_val)
-        # Tam eşleşme
-        if any(t == record_val_str for t in target_list):
-            return 1.0
-        # Kısmi eşleşme (Örn: "Reverse" arıyoruz, kayıt "Reverse-Oblique")
-        if any(t in record_val_str for t in target_list):
-            return 0.7
-        return 0.0
-
-    def _calculate_total_score(self, record: pd.Series, criteria: SearchCriteria) -> float:
+        # Tek (N, M) ara dizi ayrılır; kare, ölçek ve exp aynı tampon üzerinde yapılır
+        scores = np.subtract(values, targets, dtype=SCORING_DTYPE)
+        np.square(scores, out=scores)
+        scores *= neg_inv_two_sigma_sq
+        return np.exp(scores, out=scores)
+
+    def _categorical_scores(self, column: pd.Series, target_list: list) -> np.ndarray:
+        """Metinsel eşleşme puanı (Mekanizma vb için). Tam eşleşme 1.0, kısmi eşleşme 0.7
+        (Örn: "Reverse" arıyoruz, kayıt "Reverse/Oblique"), aksi halde 0.0.
+        Kademe yalnızca tekil değerler için hesaplanır, sonra tüm kayıtlara dağıtılır."""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Kategorik kolonda kodlar hazır: tekrar hash'leme yok, kategoriler üzerinden puanlanır
+            codes, uniques = column.cat.codes.to_numpy(), column.cat.categories
+        else:
+            codes, uniques = pd.factorize(column)
+        if not target_list or len(uniques) == 0:
+            return np.zeros(len(column), dtype=SCORING_DTYPE)
+
+        values = [str(v) if v else "" for v in uniques]
+        exact_targets = frozenset(target_list)
+        contains_target = _substring_pattern(tuple(target_list)).search
+        exact = np.array([v in exact_targets for v in values], dtype=np.intp)
+        partial = np.array([v != "" and contains_target(v) is not None for v in values], dtype=np.intp)
+        # Kademe indeksi: 2 = tam, 1 = kısmi, 0 = yok
+        unique_scores = CATEGORICAL_TIER_SCORES[np.maximum(2 * exact, partial)]
+        # NaN kayıtlar (kod -1) 0 puan alır
+        return np.where(codes >= 0, unique_scores[codes], SCORING_DTYPE(0))
+
+    def _build_scoring_plan(self, available_columns: pd.Index, criteria: SearchCriteria) -> Optional[ScoringPlan]:
         """
-        DİNAMİK PUANLAMA MOTORU
-        Config'deki tüm parametreleri tarar, kullanıcı ne girdiyse ona göre puanlar.
+        Sayısal kriterler için puanlama planı: hedefi, ağırlığı ve DataFrame'de kolonu olan parametreler.
+        Kullanıcı target girmediyse veya min-max aralığı vermediyse parametre ELİMİNE olur. Hiçbiri yoksa None.
         """
-        total_weighted_score = 0.0
-        total_active_weight = 0.0
-        
-        # Config'deki tüm parametreler üzerinde dönüyoruz (Magnitude, Rjb, Rrup, Vs30...)
-        for key, config in SCORING_MAP.items():
-            
-            # 1. Bu parametre için bir hedef (Target) var mı?
-            # Kullanıcı target girmediyse veya min-max aralığı vermediyse bu parametreyi ELİMİNE ET.
-            if key == 'mechanism':
-                # Mekanizma özel durumu: liste boşsa geç
-                if not criteria.mechanisms:
-                    continue
-                target_val = criteria.mechanisms
-            else:
-                target_val = criteria.get_effective_target(key)
-                if target_val is None:
-                    continue
-
-            # 2. DataFrame'de bu veri var mı?
-            col_name = config['column']
-            if col_name not in record or pd.isna(record[col_name]):
-                # Kullanıcı hedef istemiş ama veri setinde (örneğin PEER'de) bu kolon yoksa puanlamaya katma
+        columns, targets, sigmas, weights = [], [], [], []
+        for key, col_name in zip(NUMERIC_SCORE_KEYS, NUMERIC_SCORE_COLUMNS):
+            if col_name not in available_columns:
                 continue
-
-            # 3. Ağırlığı al
             weight = criteria.weights.get_weight(key)
-            if weight <= 0:
+            target = criteria.get_effective_target(key) if weight > 0 else None
+            if target is None:
                 continue
+            columns.append(col_name)
+            targets.append(target)
+            sigmas.append(criteria.get_sigma(key))
+            weights.append(weight)
+        if not columns:
+            return None
 
-            # 4. Puanı Hesapla
-            score = 0.0
-            if config['type'] == 'numeric':
-                sigma = criteria.get_sigma(key)
-                score = self._gaussian_score(record[col_name], target_val, sigma)
-            
-            elif config['type'] == 'categorical':
-                score = self._categorical_score(record[col_name], target_val)
+        sigmas = np.asarray(sigmas, dtype=SCORING_DTYPE)
+        return ScoringPlan(columns=tuple(columns),
+                           targets=np.asarray(targets, dtype=SCORING_DTYPE),
+                           neg_inv_two_sigma_sq=SCORING_DTYPE(-0.5) / (sigmas * sigmas),
+                           weights=np.asarray(weights, dtype=SCORING_DTYPE))
 
-            # 5. Toplama Ekle
-            total_weighted_score += score * weight
-            total_active_weight += weight
+    def _calculate_total_scores(self, df: pd.DataFrame, criteria: SearchCriteria) -> np.ndarray:
+        """
+        DİNAMİK PUANLAMA MOTORU (vektörize)
+        Config'deki tüm parametreleri tarar, kullanıcı ne girdiyse ona göre tüm kayıtları tek seferde puanlar.
+        """
+        total_weighted_score = np.zeros(len(df), dtype=SCORING_DTYPE)
+        total_active_weight = np.zeros(len(df), dtype=SCORING_DTYPE)
+
+        # 1. Sayısal parametreler: plan kriterlerden bir kez çıkarılır, sonra tüm kayıtlar tek seferde puanlanır
+        plan = self._build_scoring_plan(df.columns, criteria)
+        if plan is not None:
+            values = extract_score_matrix(df, plan.columns)
+            kernel = _load_numba_score_kernel() if USE_NUMBA else None
+            if kernel is not None:
+                # Tek paralel geçiş: ara (N, M) matris ayrılmaz
+                kernel(values, plan.targets, plan.neg_inv_two_sigma_sq, plan.weights,
+                       total_weighted_score, total_active_weight)
+            else:
+                # Veri setinde değeri olmayan (NaN) hücreler o kaydın puanlamasına katılmaz
+                present = ~np.isnan(values)
+                scores = self._gaussian_score(values, plan.targets, plan.neg_inv_two_sigma_sq)
+                np.copyto(scores, SCORING_DTYPE(0), where=~present)
+                total_weighted_score += scores @ plan.weights
+                total_active_weight += present.astype(SCORING_DTYPE) @ plan.weights
+
+        # 2. Kategorik parametre (mekanizma): liste boşsa geç
+        col_name = SCORING_MAP['mechanism'].column
+        weight = criteria.weights.get_weight('mechanism')
+        if criteria.mechanisms and col_name in df.columns and weight > 0:
+            column = df[col_name]
+            present = column.notna().to_numpy()
+            total_weighted_score += self._categorical_scores(column, criteria.mechanisms) * SCORING_DTYPE(weight)
+            total_active_weight += present * SCORING_DTYPE(weight)
+
+        # 3. Normalizasyon (0-100 arası). Hiçbir kriter girilmediyse 0.
+        return np.divide(total_weighted_score, total_active_weight,
+                         out=np.zeros(len(df), dtype=SCORING_DTYPE), where=total_active_weight > 0) * SCORING_DTYPE(MAX_SCORE)
 
-        # 6. Normalizasyon (0-100 arası)
-        # Eğer hiçbir kriter girilmediyse 0 döndür
-        if total_active_weight == 0:
-            return 0.0
-            
-        return (total_weighted_score / total_active_weight) * 100.0
-    
     def select_and_score(self, df: pd.DataFrame, criteria: SearchCriteria) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """ Kayıtları puanla ve seç. 
 
@@ -496,44 +526,64 @@ class BaseSelectionStrategy(ISelectionStrategy, ABC):
         if df.empty:
             return pd.DataFrame(), pd.DataFrame()
         
-        scored_df = df.copy()
-        
-        # Vektörize işlem yerine apply kullanıyoruz (karmaşık mantık için daha güvenli)
-        # Performans gerekirse numpy ile vektörize edilebilir.
-        scored_df['SCORE'] = scored_df.apply(
-            lambda row: self._calculate_total_score(row, criteria), axis=1
-        )
+        # assign yalnızca SCORE kolonunu ekler; mevcut kolonlar kopyalanmaz (girdi df değişmez)
+        scored_df = df.assign(SCORE=self._calculate_total_scores(df, criteria))
         
         selected_df = self._apply_selection_rules(scored_df)
         return selected_df, scored_df
     
     def _apply_selection_rules(self, df_scored: pd.DataFrame) -> pd.DataFrame:
         """Seçim kurallarını uygula"""
-        filtered_df = df_scored[df_scored['SCORE'] >= self.config.min_score]
-        if filtered_df.empty:
+        # min_score ulaşılabilir en yüksek puanı aşıyorsa filtre/sıralama yapmadan çık
+        if self.config.min_score > MAX_SCORE:
             return pd.DataFrame()
+        scores = df_scored['SCORE'].to_numpy()
+        eligible = scores >= self.config.min_score
+        if not eligible.any():
+            return pd.DataFrame()
+        filtered_df = df_scored if eligible.all() else df_scored[eligible]
+
+        # Aday sayısı num_records'tan çok büyükse yalnızca en yüksek puanlı pencere sıralanır (partition, O(N + K log K)).
+        # Pencere sınır puanına eşit tüm kayıtları da içerir ve her iki yol da kararlı sıralar (eşitlikte özgün sıra);
+        # böylece pencere, tam sıralamanın öneki olur. Açgözlü seçim yalnızca önceki kayıtlara baktığından
+        # pencere yeterli kaydı veriyorsa sonuç tam sıralamayla aynıdır
+        n_candidates = len(filtered_df)
+        window = min(self.config.num_records * SELECTION_WINDOW_FACTOR, n_candidates)
+        if n_candidates > 4 * self.config.num_records and window > 0:
+            candidate_scores = filtered_df['SCORE'].to_numpy()
+            kth = window - 1
+            boundary = -np.partition(-candidate_scores, kth)[kth]
+            top = np.flatnonzero(candidate_scores >= boundary)
+            top = top[np.argsort(-candidate_scores[top], kind="stable")]
+            selected_df = self._select_from_sorted(filtered_df.iloc[top])
+            if len(selected_df) >= self.config.num_records:
+                return selected_df
+
+        return self._select_from_sorted(filtered_df.sort_values('SCORE', ascending=False, kind='stable'))
+
+    def _select_from_sorted(self, sorted_df: pd.DataFrame) -> pd.DataFrame:
+        """Puana göre azalan sıralı kayıtlarda istasyon/deprem kotalı açgözlü seçim"""
+        # İstasyon/deprem adları yoğun tamsayı kodlarına çevrilir; sayaçlar düz diziler olur
+        n = len(sorted_df)
+        station_codes, station_uniques = (pd.factorize(sorted_df['STATION'], use_na_sentinel=False)
+                                          if 'STATION' in sorted_df.columns else (np.zeros(n, dtype=np.intp), [None]))
+        event_codes, event_uniques = (pd.factorize(sorted_df['EVENT'], use_na_sentinel=False)
+                                      if 'EVENT' in sorted_df.columns else (np.zeros(n, dtype=np.intp), [None]))
+
+        # Kotalardan biri hiçbir grupta aşılamıyorsa seçim tek kotalı olur: grup içi sıra (cumcount) ile döngüsüz seçilir
+        if np.bincount(event_codes).max() <= self.config.max_per_event:
+            selected_positions = _single_quota_positions(station_codes, self.config.max_per_station, self.config.num_records)
+        elif np.bincount(station_codes).max() <= self.config.max_per_station:
+            selected_positions = _single_quota_positions(event_codes, self.config.max_per_event, self.config.num_records)
+        else:
+            kernel = _load_numba_selection_kernel() if USE_NUMBA else None
+            select = kernel if kernel is not None else _select_with_quotas
+            selected_positions = select(station_codes.astype(np.int64, copy=False), event_codes.astype(np.int64, copy=False),
+                                        len(station_uniques), len(event_uniques), self.config.num_records,
+                                        self.config.max_per_station, self.config.max_per_event)
         
-        sorted_df = filtered_df.sort_values('SCORE', ascending=False)
-        selected_records = []
-        station_counts = {}
-        event_counts = {}
-        
-        for _, record in sorted_df.iterrows():
-            if len(selected_records) >= self.config.num_records:
-                break
-            
-            station = record.get('STATION', '')
-            event = record.get('EVENT', '')
-            
-            if (station_counts.get(station, 0) >= self.config.max_per_station or 
-                event_counts.get(event, 0) >= self.config.max_per_event):
-                continue
-            
-            selected_records.append(record)
-            station_counts[station] = station_counts.get(station, 0) + 1
-            event_counts[event] = event_counts.get(event, 0) + 1
-        
-        return pd.DataFrame(selected_records)
+        # Satırları yeniden kurmak yerine dilimle: kolon dtype'ları (Categorical, Arrow) korunur
+        return sorted_df.iloc[selected_positions]
         
     def get_name(self) -> str:
         return str(self.config.design_code.value)
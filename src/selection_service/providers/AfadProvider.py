@@ -1,23 +1,102 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import partial
 import io
 import os
+import random
+import shutil
 import time
-from typing import Any, Dict, List, Type
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type, Union
+import uuid
 import zipfile
 import aiohttp
 import pandas as pd
 import requests
+try:
+    import orjson as _json  # Büyük JSON yanıtları için hızlı çözümleyici (opsiyonel)
+except ImportError:
+    import json as _json
 from ..providers.IProvider import IDataProvider
 from ..enums.Enums import ProviderName
-from ..processing.Mappers import IColumnMapper
+from ..processing.Mappers import IColumnMapper, normalize_station_codes
 from ..processing.Selection import SearchCriteria
 from ..core.ErrorHandle import NetworkError, ProviderError
-from ..processing.ResultHandle import async_result_decorator, result_decorator
+from ..processing.ResultHandle import Result, async_result_decorator, result_decorator
+from ..core.Config import (AFAD_DOWNLOAD_WORKERS, DOWNLOAD_CHUNK_BYTES, EVENT_DETAIL_CACHE_SIZE,
+                           HTTP_KEEPALIVE_S, HTTP_MAX_CONNECTIONS, HTTP_PER_HOST, HTTP_TIMEOUT_S,
+                           INMEMORY_ZIP_MAX_BYTES, RETRY_BACKOFF_MAX_S, constant_category)
+
+# Bundan küçük zip yanıtları şüpheli kabul edilir (hata sayfası vb.), bytes
+MIN_ZIP_SIZE = 1024
+
+# Kayıt başına AFAD detay sayfası linkinin ön eki
+AFAD_WAVEFORM_DETAIL_URL = "https://tadas.afad.gov.tr/waveform-detail/"
+AFAD_EVENT_DETAIL_URL = "https://ivmeservis.afad.gov.tr/Event/GetEventById/"
+AFAD_EVENT_REFERER_URL = "https://tadas.afad.gov.tr/event-detail/"
+
+# Event detay isteklerinin sabit başlıkları (Referer istek başına eklenir)
+_EVENT_DETAIL_HEADERS = {
+    'Accept': 'application/json, text/plain, */*',
+    'Origin': 'https://tadas.afad.gov.tr',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Username': 'GuestUser',
+    'IsGuest': 'true'
+}
+
+# event_id -> detay; başarılı yanıtlar saklanır, ekleme sırasına göre en eskisi atılır
+_EVENT_DETAIL_CACHE: Dict[int, Dict[str, Any]] = {}
+
+
+def _remember_event_detail(event_id: int, detail: Dict[str, Any]) -> None:
+    """Event detayını sınırlı süreç içi önbelleğe ekler"""
+    if len(_EVENT_DETAIL_CACHE) >= EVENT_DETAIL_CACHE_SIZE:
+        _EVENT_DETAIL_CACHE.pop(next(iter(_EVENT_DETAIL_CACHE)))
+    _EVENT_DETAIL_CACHE[event_id] = detail
+
+
+def _write_chunks(path: str, content: Union[bytes, Iterable[bytes]]) -> None:
+    """Tek bir bytes nesnesini ya da parça akışını dosyaya yazar"""
+    with open(path, 'wb') as f:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            f.write(content)
+            return
+        for chunk in content:
+            if chunk:
+                f.write(chunk)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Yeniden deneme beklemesi: üstel artış + sapma (jitter), RETRY_BACKOFF_MAX_S ile sınırlı"""
+    return min(RETRY_BACKOFF_MAX_S, 2 ** attempt + random.uniform(0, 1))
+
+
+def _station_id_from_member(filename: str) -> Optional[str]:
+    """Zip üye adından istasyon kodunu çıkarır (uzantısız adın '_' sonrası son parçası); yoksa None"""
+    if '_' not in filename:
+        return None
+    parts = os.path.splitext(filename)[0].split('_')
+    # Station ID'yi al (genellikle son parça)
+    return parts[-1] if len(parts) >= 2 else None
+
+
+def _extract_member(zip_ref: zipfile.ZipFile, member_name: str, target_path: str) -> None:
+    """Zip üyesini belleğe tamamen okumadan, DOWNLOAD_CHUNK_BYTES'lık tamponla diske kopyalar"""
+    with zip_ref.open(member_name) as src, open(target_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_BYTES)
+
+
+@contextmanager
+def _open_zip(zip_path: str) -> Iterator[zipfile.ZipFile]:
+    """Zip'i DOWNLOAD_CHUNK_BYTES'lık tamponlu dosya üzerinden açar (merkez dizin ve üye okumalarında az syscall)"""
+    with open(zip_path, 'rb', buffering=DOWNLOAD_CHUNK_BYTES) as fh, zipfile.ZipFile(fh, 'r') as zip_ref:
+        yield zip_ref
 
 
 class AFADDataProvider(IDataProvider):
     """AFAD veri sağlayıcı"""
 
-    def __init__(self, column_mapper: Type[IColumnMapper], timeout: int = 30):
+    def __init__(self, column_mapper: Type[IColumnMapper], timeout: int = HTTP_TIMEOUT_S):
         self.timeout = timeout
         self.column_mapper = column_mapper
         self.name = ProviderName.AFAD.value
@@ -34,6 +113,31 @@ class AFADDataProvider(IDataProvider):
             'Username': 'GuestUser',
             'IsGuest': 'true'
         }
+        # Async bağlantılar (TLS el sıkışması dahil) çağrılar arasında yeniden kullanılır
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Senkron çağrılar (arama, dalga formu indirme) için bağlantı havuzlu oturum
+        self._http_session = requests.Session()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Çalışan event loop'a bağlı paylaşımlı aiohttp oturumunu döndür, yoksa oluştur.
+        Oturum tek bir event loop içinde yaşar; loop bitmeden close() çağrılmalıdır (run_async bunu yapar)."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=HTTP_MAX_CONNECTIONS,
+                                             limit_per_host=HTTP_PER_HOST,
+                                             keepalive_timeout=HTTP_KEEPALIVE_S)
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """Açık aiohttp ve requests oturumlarını kapat"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+        self._http_session.close()
 
     def map_criteria(self, criteria: SearchCriteria) -> Dict[str, Any]:
         """Genel arama kriterlerini provider'a özel formata dönüştür"""
@@ -51,27 +155,28 @@ class AFADDataProvider(IDataProvider):
             payload = criteria
             print(f"AFAD arama kriterleri: {payload}")
 
-            async with aiohttp.ClientSession(headers=self.headers) as session:
-                async with session.post(
-                    self.base_url,
-                    json=payload,
-                    timeout=self.timeout
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json() #AFAD API'si JSON formatında veri döndürüyor
-                        self.response_df = pd.DataFrame(data) #JSON verisini DataFrame'e dönüştür
-                        self.mapped_df = self.column_mapper.map_columns(df=self.response_df) #Verileri standart kolonlara eşleştir
-                        self.mapped_df['PROVIDER'] = str(self.name) #Sağlayıcı adını ekle
-                        print(f"AFAD'dan {len(self.mapped_df)} kayıt alındı.")
-                        self.mapped_df['ENDPOINTSOURCE'] = "https://tadas.afad.gov.tr/waveform-detail/" + self.mapped_df['RSN'].astype(str) #Kayıtlara AFAD detay sayfası linki ekle
-                        return self.mapped_df
-                    else:
-                        error_text = await response.text()
-                        raise NetworkError(
-                            self.name,
-                            Exception(f"HTTP {response.status}: {error_text}"),
-                            "AFAD API request failed"
-                        )
+            session = self._get_session()
+            async with session.post(
+                self.base_url,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 200:
+                    data = _json.loads(await response.read()) #AFAD API'si JSON formatında veri döndürüyor
+                    self.response_df = self._records_to_frame(data) #JSON verisini DataFrame'e dönüştür
+                    self.mapped_df = self.column_mapper.map_columns(df=self.response_df) #Verileri standart kolonlara eşleştir
+                    self.mapped_df['PROVIDER'] = constant_category(str(self.name), len(self.mapped_df)) #Sağlayıcı adını ekle
+                    print(f"AFAD'dan {len(self.mapped_df)} kayıt alındı.")
+                    # Kayıtlara AFAD detay sayfası linki ekle (Arrow string kolonunda tek geçişte birleştirilir)
+                    self.mapped_df['ENDPOINTSOURCE'] = self.mapped_df['RSN'].astype(pd.StringDtype("pyarrow")).radd(AFAD_WAVEFORM_DETAIL_URL)
+                    return self.mapped_df
+                else:
+                    error_text = await response.text()
+                    raise NetworkError(
+                        self.name,
+                        Exception(f"HTTP {response.status}: {error_text}"),
+                        "AFAD API request failed"
+                    )
         except aiohttp.ClientError as e:
             raise NetworkError(self.name, e, "AFAD network error")
         except Exception as e:
@@ -84,10 +189,10 @@ class AFADDataProvider(IDataProvider):
             response = self._search_afad(criteria=criteria,
                                          headers=self.headers)
             if response.status_code == 200:
-                data = response.json()
-                self.response_df = pd.DataFrame(data)
+                data = _json.loads(response.content)
+                self.response_df = self._records_to_frame(data)
                 self.mapped_df = self.column_mapper.map_columns(df=self.response_df)
-                self.mapped_df['PROVIDER'] = str(self.name)
+                self.mapped_df['PROVIDER'] = constant_category(str(self.name), len(self.mapped_df))
                 print(f"AFAD'dan {len(self.mapped_df)} kayıt alındı.")
                 return self.mapped_df
             else:
@@ -101,6 +206,19 @@ class AFADDataProvider(IDataProvider):
         except Exception as e:
             raise ProviderError(self.name, e, f"AFAD data processing failed: {e}")
 
+    def _records_to_frame(self, data: List[Dict[str, Any]]) -> pd.DataFrame:
+        """AFAD JSON kayıtlarından DataFrame kurar. Mapper okuduğu ham alanları (source_columns) bildiriyorsa
+        yalnızca o kolonlar oluşturulur; eşlemede atılacak kolonlar için tip çıkarımı yapılmaz."""
+        source_columns = getattr(self.column_mapper, "source_columns", None)
+        if source_columns is not None and data:
+            # Alan herhangi bir kayıtta varsa kolon oluşturulur (ilk kayıtta eksikse diğerlerininki kaybolmasın);
+            # içermeyen kayıtlar için from_records NaN yazar
+            present = set().union(*data)
+            df = pd.DataFrame.from_records(data, columns=[c for c in source_columns if c in present])
+        else:
+            df = pd.DataFrame(data)
+        return normalize_station_codes(df)
+
     def _search_afad(self,
                      criteria: Dict[str, Any],
                      headers: dict) -> requests.Response:
@@ -108,7 +226,7 @@ class AFADDataProvider(IDataProvider):
         payload = criteria
         print(f"AFAD arama kriterleri: {payload}")
                 
-        response = requests.post(
+        response = self._http_session.post(
             self.base_url,
             json=payload,
             headers=headers,
@@ -122,61 +240,80 @@ class AFADDataProvider(IDataProvider):
 
     @result_decorator
     def get_event_details(self, event_ids: List[int]) -> pd.DataFrame:
-        """Birden fazla event için detaylı bilgileri alır"""
-        all_details = []
-        
-        for event_id in event_ids:
-            detail_url = f"https://ivmeservis.afad.gov.tr/Event/GetEventById/{event_id}"
-            
-            headers = {
-                'Accept': 'application/json, text/plain, */*',
-                'Origin': 'https://tadas.afad.gov.tr',
-                'Referer': f'https://tadas.afad.gov.tr/event-detail/{event_id}',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Username': 'GuestUser',
-                'IsGuest': 'true'
-            }
-            
-            try:
-                response = requests.get(url=detail_url, headers=headers, timeout=30)
-                if response.status_code == 200:
-                    detail_data = response.json()
-                    if isinstance(detail_data, dict):
-                        all_details.append(detail_data)
-                    elif isinstance(detail_data, list) and len(detail_data) > 0:
-                        all_details.append(detail_data[0])
-                
-                time.sleep(0.1)
-                
-            except Exception as e:
-                raise ProviderError(self.name, e, f"Event {event_id} details failed")
-        
+        """Birden fazla event için detaylı bilgileri alır (istekler eşzamanlı gönderilir).
+        Çalışan bir event loop içinden (Jupyter, run_async) çağrılırsa istekler ayrı bir thread'in loop'unda yürür;
+        async kodda doğrudan get_event_details_async kullanılabilir."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._get_event_details_async(event_ids))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self._get_event_details_async(event_ids)).result()
+
+    @async_result_decorator
+    async def get_event_details_async(self, event_ids: List[int]) -> pd.DataFrame:
+        """get_event_details'in async karşılığı; çağıranın event loop'unda çalışır"""
+        return await self._get_event_details_async(event_ids)
+
+    async def _get_event_details_async(self, event_ids: List[int]) -> pd.DataFrame:
+        """Tek oturum üzerinden en fazla HTTP_PER_HOST eşzamanlı istekle event detaylarını toplar.
+        Önbellekte olan event'ler için istek atılmaz; aynı event bir çağrıda bir kez istenir."""
+        missing = list(dict.fromkeys(event_id for event_id in event_ids if event_id not in _EVENT_DETAIL_CACHE))
+        if missing:
+            semaphore = asyncio.Semaphore(HTTP_PER_HOST)
+            async with aiohttp.ClientSession(headers=_EVENT_DETAIL_HEADERS,
+                                             timeout=aiohttp.ClientTimeout(total=30)) as session:
+                # URL ve Referer'lar gönderimden önce tek geçişte hazırlanır
+                id_strs = [str(event_id) for event_id in missing]
+                fetched = await asyncio.gather(*(
+                    self._fetch_event_detail(session, semaphore, event_id,
+                                             AFAD_EVENT_DETAIL_URL + id_str,
+                                             {'Referer': AFAD_EVENT_REFERER_URL + id_str})
+                    for event_id, id_str in zip(missing, id_strs)))
+            for event_id, detail in zip(missing, fetched):
+                if detail is not None:
+                    _remember_event_detail(event_id, detail)
+        all_details = [_EVENT_DETAIL_CACHE[event_id] for event_id in event_ids if event_id in _EVENT_DETAIL_CACHE]
         return pd.DataFrame(all_details) if all_details else pd.DataFrame()
 
+    async def _fetch_event_detail(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                  event_id: int, url: str, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Tek bir event'in detayını getirir; HTTP 200 dışındaki yanıtlar atlanır.
+        Sabit başlıklar oturumda; headers yalnızca istek başına değişen Referer'ı taşır."""
+        try:
+            async with semaphore, session.get(url, headers=headers) as response:
+                if response.status != 200:
+                    return None
+                detail_data = _json.loads(await response.read())
+        except Exception as e:
+            raise ProviderError(self.name, e, f"Event {event_id} details failed")
+
+        if isinstance(detail_data, dict):
+            return detail_data
+        if isinstance(detail_data, list) and len(detail_data) > 0:
+            return detail_data[0]
+        return None
+
     def _waveform_folder_route(self, event_id: int) -> str:
         """AFAD dalga formu dosyalarının kaydedileceği klasör yapısını oluşturur"""
         event_dir = os.path.join(self.base_download_dir, f"event_{event_id}")
         os.makedirs(event_dir, exist_ok=True)
         return event_dir
     
-    def save_waveform_zipfile(self, zip_content: bytes, event_id: int, station_id: str) -> str:
+    def save_waveform_zipfile(self, zip_content: Union[bytes, Iterable[bytes]], event_id: int, station_id: str) -> str:
         """AFAD'dan indirilen zip dosyasını kaydeder geriye dosya yolunu döndürür
         Args:
-            zip_content (bytes): AFAD API'sinden gelen zip dosyasının içeriği
+            zip_content (bytes | Iterable[bytes]): Zip içeriği ya da akış parçaları (ör. response.iter_content)
             event_id (int): İlgili deprem olayının ID'si (klasör yapısı için)
             station_id (str): İstasyon kodu (dosya adlandırması için)
         """
         folder_dir = self._waveform_folder_route(event_id=event_id)
         zip_path = os.path.join(folder_dir, f"waveforms_{event_id}_{station_id}.zip")
-        with open(zip_path, 'wb') as f:
-            f.write(zip_content)
+        _write_chunks(zip_path, zip_content)
         return zip_path
 
     def extract_and_organize_zip(self, zip_path: str, export_type: str) -> List[str]:
         """Zip dosyasını açar ve içindeki dosyaları organize eder"""
-        extracted_files = []
-        MIN_ZIP_SIZE = 1024  # bytes, treat much smaller files as suspicious
-
         # Quick size sanity check
         try:
             size = os.path.getsize(zip_path)
@@ -186,15 +323,32 @@ class AFADDataProvider(IDataProvider):
             # If we can't stat the file, let the normal zip handling surface the error
             pass
 
+        # Extract all top-level files into the same folder as the zip
+        extracted_files = self._organize_zip(zip_path, os.path.dirname(zip_path), export_type, label=zip_path)
+
+        # Optionally remove the original zip if extraction succeeded
+        try:
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+        except Exception:
+            pass
+
+        return extracted_files
+
+    def extract_zip_from_bytes(self, zip_bytes: bytes, event_id: int, station_id: str, export_type: str) -> List[str]:
+        """Bellekteki zip içeriğini event klasörüne açar; zip'in kendisi diske yazılmaz"""
+        label = f"waveforms_{event_id}_{station_id}.zip"
+        if len(zip_bytes) < MIN_ZIP_SIZE:
+            raise ProviderError(self.name, None, f"[WARNING] İndirilen zip dosyası çok küçük ({len(zip_bytes)} bytes): {label}")
+        return self._organize_zip(io.BytesIO(zip_bytes), self._waveform_folder_route(event_id=event_id),
+                                  export_type, label=label)
+
+    def _organize_zip(self, source: Union[str, io.BytesIO], target_dir: str, export_type: str, label: str) -> List[str]:
+        """Zip'i (dosya yolu ya da bellek tamponu) target_dir'e açar; ASCII iç zip'leri de çıkarır"""
+        extracted_files = []
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # Test for first bad file inside the zip (returns name of bad file or None)
-                bad_file = zip_ref.testzip()
-                if bad_file is not None:
-                    raise ProviderError(self.name, None, f"[ERROR] Hasarlı zip içeriği: {bad_file} in {zip_path}")
-
-                # Extract all top-level files into the same folder as the zip
-                target_dir = os.path.dirname(zip_path)
+            with (_open_zip(source) if isinstance(source, str) else zipfile.ZipFile(source)) as zip_ref:
+                # Ayrı testzip() geçişi yok: CRC hatası extractall sırasında BadZipFile olarak yükselir
                 zip_ref.extractall(target_dir)
 
                 for file_info in zip_ref.infolist():
@@ -204,13 +358,12 @@ class AFADDataProvider(IDataProvider):
                     # If the member is itself a zip and ascii export requested, extract nested zip
                     if member_name.endswith('.zip') and export_type in ("asc", "asc2"):
                         try:
-                            # Read inner zip bytes and open with BytesIO for safety
-                            inner_bytes = zip_ref.read(member_name)
-                            with zipfile.ZipFile(io.BytesIO(inner_bytes), 'r') as inner_zip:
+                            # extractall iç zip'i zaten diske yazdı; belleğe okumak yerine oradan aç
+                            with _open_zip(abs_path) as inner_zip:
                                 inner_zip.extractall(target_dir)
                                 extracted_files.extend([os.path.join(target_dir, f) for f in inner_zip.namelist()])
                         except zipfile.BadZipFile:
-                            raise ProviderError(self.name, None, f"[ERROR] İç zip hasarlı: {member_name} inside {zip_path}")
+                            raise ProviderError(self.name, None, f"[ERROR] İç zip hasarlı: {member_name} inside {label}")
                         except Exception as e:
                             # don't stop processing other files for a single nested failure
                             print(f"[ERROR] İç zip çıkarma hatası: {member_name} -> {e}")
@@ -219,20 +372,13 @@ class AFADDataProvider(IDataProvider):
                         extracted_files.append(abs_path)
 
         except zipfile.BadZipFile:
-            raise ProviderError(self.name, None, f"[ERROR] Hasarlı zip dosyası: {zip_path}")
+            raise ProviderError(self.name, None, f"[ERROR] Hasarlı zip dosyası: {label}")
         except ProviderError:
             # re-raise ProviderError unchanged
             raise
         except Exception as e:
             raise ProviderError(self.name, e, f"Zip extraction failed: {e}")
 
-        # Optionally remove the original zip if extraction succeeded
-        try:
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-        except Exception:
-            pass
-
         return extracted_files
 
     @result_decorator
@@ -260,15 +406,6 @@ class AFADDataProvider(IDataProvider):
 
         url = "https://ivmeprocessguest.afad.gov.tr/ExportData"
 
-        headers = {
-            'Accept': 'application/json, text/plain, */*',
-            'Content-Type': 'application/json',
-            'Origin': 'https://tadas.afad.gov.tr',
-            'Referer': 'https://tadas.afad.gov.tr/',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Username': 'GuestUser',
-            'IsGuest': 'true'
-        }
         payload = {
                 "filename": [filename],
                 "file_type": [file_type],
@@ -280,10 +417,22 @@ class AFADDataProvider(IDataProvider):
 
         try:
             # POST isteği gönder
-            response = requests.post(url, headers=headers, json=payload, timeout=50)
-            response.raise_for_status()
-            zip_path = self.save_waveform_zipfile(zip_content=response.content, event_id=event_id, station_id=station_id)
-            extr_files = self.extract_and_organize_zip(zip_path=zip_path, export_type=export_type)
+            with self._http_session.post(url, headers=self.headers, json=payload, timeout=50, stream=True) as response:
+                response.raise_for_status()
+                content_length = int(response.headers.get('Content-Length') or 0)
+                if 0 < content_length < INMEMORY_ZIP_MAX_BYTES:
+                    # Küçük zip: diske yazıp geri okumak yerine bellekten açılır
+                    zip_bytes = response.content
+                else:
+                    # Boyutu bilinmeyen/büyük zip diske parça parça akıtılır; tüm içerik bellekte tutulmaz
+                    zip_bytes = None
+                    zip_path = self.save_waveform_zipfile(zip_content=response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES),
+                                                          event_id=event_id, station_id=station_id)
+            if zip_bytes is not None:
+                extr_files = self.extract_zip_from_bytes(zip_bytes, event_id=event_id, station_id=station_id,
+                                                         export_type=export_type)
+            else:
+                extr_files = self.extract_and_organize_zip(zip_path=zip_path, export_type=export_type)
             return True
         
                 
@@ -304,6 +453,7 @@ class AFADDataProvider(IDataProvider):
             user_name (str, optional): Name of the user requesting the download. Defaults to 'GuestUser'.
             event_id (str or int, optional): Event ID for organizing downloaded files. If not provided, a timestamp is used.
             batch_size (int, optional): Number of files per batch. Defaults to 10, maximum allowed is 10.
+            retry_failed (bool, optional): Retry files missing from the zips once all batches finish. Defaults to True.
         Returns:
             Dict: A dictionary containing download statistics and batch results, including:
                 - total_files: Total number of files requested.
@@ -321,21 +471,12 @@ class AFADDataProvider(IDataProvider):
         user_name   = kwargs.get('user_name', 'GuestUser')
         event_id    = kwargs.get('event_id')
         batch_size  = kwargs.get('batch_size', 10)
+        retry_failed = kwargs.get('retry_failed', True)
 
         batch_size = min(batch_size, 10) # Batch size'ı maximum 10 ile sınırla
 
         url = "https://ivmeprocessguest.afad.gov.tr/ExportData"
 
-        headers = {
-            'Accept': 'application/json, text/plain, */*',
-            'Content-Type': 'application/json',
-            'Origin': 'https://tadas.afad.gov.tr',
-            'Referer': 'https://tadas.afad.gov.tr/',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Username': 'GuestUser',
-            'IsGuest': 'true'
-        }
-        
         all_results = {
             'total_files': len(filenames),
             'batches': [],
@@ -346,86 +487,94 @@ class AFADDataProvider(IDataProvider):
         
         # Dosyaları batch'lere ayır
         batches = [filenames[i:i + batch_size] for i in range(0, len(filenames), batch_size)]
-        
+
+        # Event ID'yi kullanarak klasör yapısı oluştur (Event ID yoksa timestamp kullan); tüm partiler aynı klasöre iner
+        event_dir = os.path.join(self.base_download_dir, str(event_id) if event_id else f"event_{int(time.time())}")
+        os.makedirs(event_dir, exist_ok=True)
+
+        download_batch = partial(self._download_one_batch, url=url, headers=self.headers, event_id=event_id,
+                                 event_dir=event_dir, file_type=file_type, file_status=file_status,
+                                 export_type=export_type, user_name=user_name)
+
         print(f"[INFO] {len(filenames)} dosya, {len(batches)} parti halinde indirilecek (max {batch_size}/parti)")
-        for batch_index, batch_filenames in enumerate(batches, 1):
-            print(f"[INFO] PARTİ {batch_index}/{len(batches)} - {len(batch_filenames)} dosya")
-            
-            # Request payload
-            payload = {
-                "filename": batch_filenames,
-                "file_type": [file_type] * len(batch_filenames),
-                "file_status": file_status,
-                "export_type": export_type,
-                "user_name": user_name,
-                "call": "afad"
-            }
-            try:
-                # POST isteği gönder
-                    response = requests.post(url, headers=headers, json=payload, timeout=50)
-                    response.raise_for_status()
-                    
-                    # Event ID'yi kullanarak klasör yapısı oluştur
-                    if event_id:
-                        event_dir = os.path.join(self.base_download_dir, str(event_id))
-                    else:
-                        # Event ID yoksa timestamp kullan
-                        event_dir = os.path.join(self.base_download_dir, f"event_{int(time.time())}")
-                    
-                    # # Batch klasörü oluştur
-                    # batch_dir = os.path.join(event_dir, f"batch_{batch_index}")
-                    os.makedirs(event_dir, exist_ok=True)
-                    
-                    # Zip dosyasını kaydet
-                    zip_filename = f"part_{batch_index}.zip"
-                    zip_path = os.path.join(event_dir, zip_filename)
-                    
-                    with open(zip_path, 'wb') as f:
-                        f.write(response.content) # Zip dosyasını kaydet
-                    
-                    # Zip dosyasını aç ve organize et
-                    extracted_files = self.extract_and_organize_zip_batch(event_path=event_dir, zip_path=zip_path, expected_filenames=batch_filenames,export_type=export_type)
-                    
-                    batch_result = {
-                        'batch_number': batch_index,
-                        'filenames': batch_filenames,
-                        'batch_size': len(batch_filenames),
-                        'zip_file': zip_path,
-                        'extracted_files': extracted_files,
-                        'extracted_count': len(extracted_files),
-                        'success': True,
-                        'error': None
-                    }
-
-                    # Başarısız dosyaları kontrol et ve yeniden dene
-                    if len(extracted_files) < len(batch_filenames):
-                        failed_files = [f for f in batch_filenames if f not in [os.path.basename(x) for x in extracted_files]]
-                        if failed_files:
-                            print(f"[ERROR]  {len(failed_files)} dosya çıkarılamadı, yeniden deneniyor...")
-                            successful_retries = self.retry_failed_downloads(
-                                event_id=event_id,
-                                failed_filenames=failed_files,
-                                export_type='mseed',
-                                file_status=file_status
-                            )
-                            extracted_files.extend(successful_retries)
-                    
-                    all_results['batches'].append(batch_result)
-                    all_results['successful_batches'] += 1
-                    all_results['downloaded_files'] += len(extracted_files)
-                    
-                    print(f"[OK] Parti {batch_index} başarılı: {len(extracted_files)} dosya")
-                    
-                    # Partiler arasında bekle (sunucu yükünü azaltmak için)
-                    if batch_index < len(batches):
-                        wait_time = 10
-                        print(f"[INFO]{wait_time} saniye bekleniyor...")
-                        time.sleep(wait_time)
-                    
-            except Exception as e:
-                raise ProviderError(self.name, e, f"Waveform download failed: {e}")
+        # Partiler arasında sabit bekleme yerine eşzamanlı istek sayısı AFAD_DOWNLOAD_WORKERS ile sınırlanır
+        with ThreadPoolExecutor(max_workers=AFAD_DOWNLOAD_WORKERS) as executor:
+            futures = [executor.submit(download_batch, batch_index, batch_filenames)
+                       for batch_index, batch_filenames in enumerate(batches, 1)]
+            for future in as_completed(futures):
+                try:
+                    batch_result = future.result()
+                except Exception as e:
+                    for pending in futures:
+                        pending.cancel()
+                    raise ProviderError(self.name, e, f"Waveform download failed: {e}")
+
+                all_results['batches'].append(batch_result)
+                all_results['successful_batches'] += 1
+                all_results['downloaded_files'] += len(batch_result['extracted_files'])
+
+        all_results['batches'].sort(key=lambda batch_result: batch_result['batch_number'])
+
+        # Eksik dosyalar havuz kapandıktan sonra yeniden denenir: işçi içinde ikinci havuz açılmaz,
+        # AFAD'a giden eşzamanlı istek sınırı korunur
+        failed_files = [f for batch_result in all_results['batches'] for f in batch_result['failed_files']]
+        if failed_files and retry_failed:
+            print(f"[ERROR]  {len(failed_files)} dosya çıkarılamadı, yeniden deneniyor...")
+            recovered = set(self.retry_failed_downloads(event_id=event_id,
+                                                        failed_filenames=failed_files,
+                                                        export_type=export_type,
+                                                        file_status=file_status))
+            for batch_result in all_results['batches']:
+                retried = [f for f in batch_result['failed_files'] if f in recovered]
+                batch_result['extracted_files'].extend(retried)
+                all_results['downloaded_files'] += len(retried)
+        return all_results
+
+    def _download_one_batch(self, batch_index: int, batch_filenames: List[str], *, url: str, headers: dict,
+                            event_id: Optional[int], event_dir: str, file_type: str, file_status: str,
+                            export_type: str, user_name: str) -> Dict[str, Any]:
+        """Tek bir partiyi indirir ve zip'i çıkarır; eksik dosyalar failed_files ile döner"""
+        print(f"[INFO] PARTİ {batch_index} - {len(batch_filenames)} dosya")
+
+        # Request payload
+        payload = {
+            "filename": batch_filenames,
+            "file_type": [file_type] * len(batch_filenames),
+            "file_status": file_status,
+            "export_type": export_type,
+            "user_name": user_name,
+            "call": "afad"
+        }
+        # POST isteği gönder
+        response = self._http_session.post(url, headers=headers, json=payload, timeout=50, stream=True)
+        response.raise_for_status()
+
+        # Zip dosyasını kaydet (partiler ve yeniden denemeler aynı klasöre eşzamanlı yazar; ad çakışmasın)
+        zip_path = os.path.join(event_dir, f"part_{batch_index}_{uuid.uuid4().hex}.zip")
+        with response:
+            _write_chunks(zip_path, response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES)) # Zip dosyasını parça parça kaydet
+
+        # Zip dosyasını aç ve organize et
+        extracted_files = self.extract_and_organize_zip_batch(event_path=event_dir, zip_path=zip_path, expected_filenames=batch_filenames,export_type=export_type)
+
+        # Zip'ten çıkmayan dosyalar; yeniden deneme çağıran tarafından tüm partiler bitince yapılır
+        extracted_names = {os.path.basename(x) for x in extracted_files}
+        failed_files = [f for f in batch_filenames if f not in extracted_names]
+
+        batch_result = {
+            'batch_number': batch_index,
+            'filenames': batch_filenames,
+            'batch_size': len(batch_filenames),
+            'zip_file': zip_path,
+            'extracted_files': extracted_files,
+            'extracted_count': len(extracted_files),
+            'failed_files': failed_files,
+            'success': True,
+            'error': None
+        }
 
-            return all_results
+        print(f"[OK] Parti {batch_index} başarılı: {len(extracted_files)} dosya")
+        return batch_result
 
     def extract_and_organize_zip_batch(self,
                                    event_path: str,
@@ -441,61 +590,21 @@ class AFADDataProvider(IDataProvider):
         extracted_files = []
         
         try:
-            # Önce zip dosyasının geçerli olup olmadığını kontrol et
-            try:
-                with zipfile.ZipFile(zip_path, 'r') as test_zip:
-                    test_zip.testzip()  # Hasarlı dosyaları kontrol et
-            except zipfile.BadZipFile:
-                print(f"[ERROR] Hasarlı zip dosyası: {zip_path}")
-                # Hasarlı dosyayı sil ve None döndür (yeniden deneme için)
-                try:
-                    os.remove(zip_path)
-                except:
-                    pass
-                return []
-
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            # Ayrı testzip() geçişi yapılmaz (tüm zip'i bir kez daha okur); hasarlı arşiv açılışta,
+            # hasarlı üye (CRC) çıkarma sırasında hata verir ve o üye başarısız sayılır
+            with _open_zip(zip_path) as zip_ref:
                 # Zip içindeki tüm dosyaları listele
                 zip_files = zip_ref.namelist()
-                
-                for filename in zip_files:
-                    try:
-                        # Dosya adından station ID'yi çıkar
-                        if '_' in filename:
-                            base_name = os.path.splitext(filename)[0]
-                            parts = base_name.split('_')
-                            
-                            if len(parts) >= 2:
-                                # Station ID'yi al (genellikle son parça)
-                                station_id = parts[-1]
-                                
-                                # Hedef klasörü oluştur
-                                target_dir = os.path.join(event_path, f"{station_id}")
-                                os.makedirs(target_dir, exist_ok=True)
-                                
-                                target_path = os.path.join(target_dir, filename)
-                                
-                                # Dosyayı çıkar
-                                with open(target_path, 'wb') as f:
-                                    f.write(zip_ref.read(filename))
-                                
-                                # Eğer çıkarılan dosya bir zip ise, içindekileri de çıkar
-                                if filename.endswith('.zip') and export_type in ["asc","asc2"]:
-                                    nested_zip_path = target_path
-                                    nested_extracted = self.extract_nested_zip(nested_zip_path, target_dir)
-                                    extracted_files.extend(nested_extracted)
-                                    
-                                    # İç zip dosyasını temizle (opsiyonel)
-                                    # try:
-                                    #     os.remove(nested_zip_path)
-                                    # except:
-                                    #     pass
-                                else:
-                                    extracted_files.append(target_path)
-                                    
-                    except Exception as e:
-                        print(f"[ERROR] {filename} işlenirken hata: {e}")
-                        continue
+
+            # İstasyon klasörleri üye başına değil, tekil istasyon başına bir kez oluşturulur
+            for station_id in {_station_id_from_member(name) for name in zip_files} - {None}:
+                os.makedirs(os.path.join(event_path, station_id), exist_ok=True)
+
+            # Üyeler iş parçacıklarında çıkarılır (zlib ve dosya G/Ç GIL'i bırakır); sıra korunur
+            extract_one = partial(self._extract_batch_member, zip_path, event_path, export_type)
+            with ThreadPoolExecutor(max_workers=max(1, min(len(zip_files), os.cpu_count() or 1))) as executor:
+                for member_files in executor.map(extract_one, zip_files):
+                    extracted_files.extend(member_files)
             
             # Başarılı çıkarma sonrası zip'i temizle
             try:
@@ -515,6 +624,33 @@ class AFADDataProvider(IDataProvider):
         
         return extracted_files
 
+    def _extract_batch_member(self, zip_path: str, event_path: str, export_type: str, filename: str) -> List[str]:
+        """Tek bir zip üyesini istasyon klasörüne çıkarır. ZipFile aynı tutamaktan eşzamanlı okumaya
+        uygun olmadığından her çağrı kendi tutamağını açar."""
+        station_id = _station_id_from_member(filename)
+        if station_id is None:
+            return []
+        # Klasör extract_and_organize_zip_batch tarafından önceden oluşturuldu
+        target_dir = os.path.join(event_path, station_id)
+        target_path = os.path.join(target_dir, filename)
+        try:
+            # Dosyayı çıkar
+            with _open_zip(zip_path) as zip_ref:
+                _extract_member(zip_ref, filename, target_path)
+
+            # Eğer çıkarılan dosya bir zip ise, içindekileri de çıkar
+            if filename.endswith('.zip') and export_type in ["asc", "asc2"]:
+                return self.extract_nested_zip(target_path, target_dir)
+            return [target_path]
+        except Exception as e:
+            print(f"[ERROR] {filename} işlenirken hata: {e}")
+            # Yarım kalan (ör. CRC hatalı) dosyayı bırakma; yeniden deneme listesine düşsün
+            try:
+                os.remove(target_path)
+            except OSError:
+                pass
+            return []
+
     def retry_failed_downloads(self, event_id: int,
                                failed_filenames: List[str],
                                export_type: str,
@@ -531,37 +667,39 @@ class AFADDataProvider(IDataProvider):
                 
             print(f"🔄 {len(failed_filenames)} dosya için {retry + 1}. yeniden deneme...")
             
-            # 10'arli gruplar halinde yeniden dene
-            batches = [failed_filenames[i:i + 10] for i in range(0, len(failed_filenames), 10)]
-            
-            for batch in batches:
-                try:
-                    result = self.download_afad_waveforms_batch(
-                        event_id=event_id,
-                        filenames=batch,
-                        export_type=export_type,
-                        file_status=file_status
-                    )
-                    
-                    # Başarılı indirmeleri listeden çıkar
-                    if result and 'batches' in result:
-                        for batch_result in result['batches']:
-                            if batch_result.get('success', False):
-                                successful_downloads.extend(batch_result.get('filenames', []))
-                                # Başarılı dosyaları failed listesinden çıkar
-                                failed_filenames = [f for f in failed_filenames if f not in batch_result.get('filenames', [])]
-                    
-                    # Yeniden denemeler arasında bekle
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    print(f"[ERROR] Yeniden deneme hatası: {e}")
+            # Partilere bölme ve eşzamanlılık sınırı download_afad_waveforms_batch'te; iç çağrı kendisi yeniden denemez
+            recovered = set()
+            try:
+                result = self.download_afad_waveforms_batch(
+                    event_id=event_id,
+                    filenames=failed_filenames,
+                    export_type=export_type,
+                    file_status=file_status,
+                    retry_failed=False
+                )
+                if isinstance(result, Result):
+                    result = result.unwrap()
+
+                # Başarılı indirmeleri listeden çıkar
+                for batch_result in result.get('batches', []):
+                    if batch_result.get('success', False):
+                        still_failed = set(batch_result.get('failed_files', []))
+                        done = [f for f in batch_result.get('filenames', []) if f not in still_failed]
+                        successful_downloads.extend(done)
+                        recovered.update(done)
+
+            except Exception as e:
+                print(f"[ERROR] Yeniden deneme hatası: {e}")
+
+            # Başarılı dosyaları failed listesinden tek geçişte çıkar
+            failed_filenames = [f for f in failed_filenames if f not in recovered]
             
             if not failed_filenames:
                 break
                 
-            # Sonraki deneme öncesi bekle
-            time.sleep(2)
+            # Sonraki deneme öncesi bekle (geçici hata hızlı düzelirse kısa, sürerse giderek uzun)
+            if retry < max_retries - 1:
+                time.sleep(_backoff_delay(retry))
         
         return successful_downloads
 
@@ -572,7 +710,7 @@ class AFADDataProvider(IDataProvider):
         extracted_files = []
 
         try:
-            with zipfile.ZipFile(zip_path, 'r') as nested_zip:
+            with _open_zip(zip_path) as nested_zip:
                 nested_files = nested_zip.namelist()
 
                 for nested_file in nested_files:
@@ -581,8 +719,7 @@ class AFADDataProvider(IDataProvider):
                                                           nested_file)
 
                         # İç zip'teki dosyayı çıkar
-                        with open(nested_target_path, 'wb') as f:
-                            f.write(nested_zip.read(nested_file))
+                        _extract_member(nested_zip, nested_file, nested_target_path)
 
                         extracted_files.append(nested_target_path)
 
@@ -1,52 +1,79 @@
 import hashlib
+import json
 import os
 import time
+import uuid
 import pandas as pd
 from typing import Optional
 
+from ..core.Config import CACHE_COMPRESSION, CACHE_DIR, CACHE_TTL_SECONDS
+
 class CacheManager:
-    def __init__(self, cache_dir: str = ".cache", expiry_hours: int = 24):
+    def __init__(self, cache_dir: str = CACHE_DIR, expiry_hours: float = CACHE_TTL_SECONDS / 3600):
         self.cache_dir = cache_dir
         self.expiry_seconds = expiry_hours * 3600
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
 
     def _generate_key(self, provider_name: str, criteria: any) -> str:
-        # Pydantic SearchCriteria kullanıyorsan model_dump_json() en güvenli yoldur
-        criteria_json = criteria.model_dump_json()
-        raw_key = f"{provider_name}_{criteria_json}"
-        return hashlib.md5(raw_key.encode()).hexdigest()
-
-    def get(self, provider_name: str, criteria: any) -> Optional[pd.DataFrame]:
-        key = self._generate_key(provider_name, criteria)
-        file_path = os.path.join(self.cache_dir, f"{key}.parquet")
-        
-        if not os.path.exists(file_path):
-            return None
+        # Pipeline provider'a map_criteria() çıktısı (dict) verir; SearchCriteria da desteklenir.
+        # İkisi de sıralı anahtarlı kanonik JSON'a indirgenir.
+        if hasattr(criteria, "model_dump"):
+            criteria = criteria.model_dump()
+        # blake2b (stdlib) MD5'ten hızlı; 16 baytlık özet dosya adı uzunluğunu korur
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(provider_name.encode())
+        hasher.update(b"_")
+        hasher.update(json.dumps(criteria, sort_keys=True, default=str, separators=(",", ":")).encode())
+        return hasher.hexdigest()
 
-        # --- ZAMAN AŞIMI KONTROLÜ ---
-        file_mod_time = os.path.getmtime(file_path) # Dosyanın son değiştirilme zamanı
-        if (time.time() - file_mod_time) > self.expiry_seconds:
-            print(f"[CACHE] {provider_name} verisi çok eski (expired). Siliniyor...")
-            os.remove(file_path)
-            return None
-        # ----------------------------
+    def get(self, provider_name: str, criteria: any, key: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Önbellekteki sonucu okur. key önceden _generate_key ile hesaplandıysa kriterler yeniden serileştirilmez."""
+        if key is None:
+            key = self._generate_key(provider_name, criteria)
 
-        try:
-            return pd.read_parquet(file_path, engine='pyarrow')
-        except Exception as e:
-            print(f"[CACHE ERROR] Okuma hatası: {e}")
-            return None
+        # Feather (Arrow IPC) öncelikli; önceki sürümlerin yazdığı .parquet girdileri de okunur
+        for extension in (".feather", ".parquet"):
+            file_path = os.path.join(self.cache_dir, f"{key}{extension}")
+
+            # Varlık ve değiştirilme zamanı tek stat çağrısıyla
+            try:
+                file_mod_time = os.stat(file_path).st_mtime
+            except FileNotFoundError:
+                continue
+
+            # --- ZAMAN AŞIMI KONTROLÜ ---
+            if (time.time() - file_mod_time) > self.expiry_seconds:
+                print(f"[CACHE] {provider_name} verisi çok eski (expired). Siliniyor...")
+                os.remove(file_path)
+                return None
+            # ----------------------------
+
+            try:
+                if extension == ".feather":
+                    return pd.read_feather(file_path)
+                return pd.read_parquet(file_path, engine='pyarrow')
+            except Exception as e:
+                print(f"[CACHE ERROR] Okuma hatası: {e}")
+                return None
+        return None
 
-    def set(self, provider_name: str, criteria: any, df: pd.DataFrame):
+    def set(self, provider_name: str, criteria: any, df: pd.DataFrame, key: Optional[str] = None):
         if df is None or df.empty:
             return
             
-        key = self._generate_key(provider_name, criteria)
-        file_path = os.path.join(self.cache_dir, f"{key}.parquet")
+        if key is None:
+            key = self._generate_key(provider_name, criteria)
+        file_path = os.path.join(self.cache_dir, f"{key}.feather")
         
+        # Önce geçici dosyaya yazılır, sonra atomik olarak yerine konur: eşzamanlı okuyucu yarım dosya görmez
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
         try:
-            # engine='pyarrow' için pip install pyarrow gerekli
-            df.to_parquet(file_path, engine='pyarrow', index=False)
+            # Feather (Arrow IPC) Parquet'ten hızlı yazılıp okunur; sonuç zaten hep pandas'a geri okunuyor
+            df.reset_index(drop=True).to_feather(tmp_path, compression=CACHE_COMPRESSION)
+            os.replace(tmp_path, file_path)
         except Exception as e:
-            print(f"[CACHE ERROR] Yazma hatası: {e}")
\ No newline at end of file
+            print(f"[CACHE ERROR] Yazma hatası: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -3,6 +3,7 @@ from typing import Any, Dict, Type
 import pandas as pd
 from selection_service.processing.ResultHandle import Result
 from ..processing.Mappers import IColumnMapper
+from ..core.Config import constant_category
 from ..core.ErrorHandle import ProviderError
 from ..providers.IProvider import IDataProvider
 from obspy.clients.fdsn import Client
@@ -78,7 +79,7 @@ class FDSNProvider(IDataProvider):
 
             df = pd.DataFrame(records)
             standartized_df = self.column_mapper.map_columns(df=df)
-            standartized_df['PROVIDER'] = str(f"FDSN_{self._name}")
+            standartized_df['PROVIDER'] = constant_category(f"FDSN_{self._name}", len(standartized_df))
             return Result.ok(standartized_df)
         except Exception as e:
             return Result.fail(e)
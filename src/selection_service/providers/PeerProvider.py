@@ -1,28 +1,45 @@
 import asyncio
 from functools import partial
+import operator
 from typing import Any, Dict, Type
 import numpy as np
 import pandas as pd
 
-from ..utility.path_utils import load_csv
+from ..utility.path_utils import load_csv, load_csv_cached
 from ..enums.Enums import ProviderName
 from ..processing.Mappers import IColumnMapper
-from ..core.Config import convert_mechanism_to_text
+from ..core.Config import FLATFILE_PARQUET_CACHE, constant_category, convert_mechanism_to_text
 from ..processing.Selection import SearchCriteria
 from ..core.ErrorHandle import DataProcessingError, ProviderError
 from ..processing.ResultHandle import async_result_decorator, result_decorator
 from ..providers.IProvider import IDataProvider
 
 
+# (kriter anahtarı, kolon, karşılaştırma): büyüklük, mesafe (RJB/RRUP), VS30, derinlik, PGA/PGV/PGD aralıkları
+_RANGE_FILTERS = (
+    ('min_magnitude', 'MAGNITUDE', operator.ge), ('max_magnitude', 'MAGNITUDE', operator.le),
+    ('min_Rjb', 'RJB(km)', operator.ge), ('max_Rjb', 'RJB(km)', operator.le),
+    ('min_Rrup', 'RRUP(km)', operator.ge), ('max_Rrup', 'RRUP(km)', operator.le),
+    ('min_vs30', 'VS30(m/s)', operator.ge), ('max_vs30', 'VS30(m/s)', operator.le),
+    ('min_depth', 'HYPO_DEPTH(km)', operator.ge), ('max_depth', 'HYPO_DEPTH(km)', operator.le),
+    ('min_pga', 'PGA(cm2/sec)', operator.ge), ('max_pga', 'PGA(cm2/sec)', operator.le),
+    ('min_pgv', 'PGV(cm/sec)', operator.ge), ('max_pgv', 'PGV(cm/sec)', operator.le),
+    ('min_pgd', 'PGD(cm)', operator.ge), ('max_pgd', 'PGD(cm)', operator.le),
+)
+
+
 class PeerWest2Provider(IDataProvider):
     """PEER NGA-West2 veri sağlayıcı"""
 
     def __init__(self, column_mapper: Type[IColumnMapper], **kwargs):
         self.column_mapper = column_mapper
         self.name = ProviderName.PEER.value
-        self.flatfile_df = load_csv("NGA-West2_flatfile.csv")
-        self.mapped_df = None
-        self.response_df = None
+        self.flatfile_df = (load_csv_cached if FLATFILE_PARQUET_CACHE else load_csv)("NGA-West2_flatfile.csv")
+        # Eşlenmiş flatfile istekler arasında ortak; filtreler maskeyle dilimlediği için değiştirilmez
+        self._mapped_flatfile = None
+        self._mapped_source = None
+        # MECHANISM sayısal kodlarsa sonuçlar metne çevrilir; eşleme sırasında bir kez belirlenir
+        self._needs_mechanism_text = False
 
     def map_criteria(self, criteria: SearchCriteria) -> Dict[str, Any]:
         """Genel arama kriterlerini provider'a özel formata dönüştür"""
@@ -33,14 +50,8 @@ class PeerWest2Provider(IDataProvider):
         """NGA-West2 verilerini getir"""
         try:
             loop = asyncio.get_event_loop()
-            self.mapped_df = await loop.run_in_executor(None, partial(self.column_mapper.map_columns, self.flatfile_df.copy()))
-            filtered_df = await loop.run_in_executor(None, partial(self._apply_filters, self.mapped_df, criteria))
-            filtered_df['PROVIDER'] = str(self.name)
-
-            # Mekanizma dönüşümü
-            if filtered_df['MECHANISM'].dtype in [np.int64, np.float64, int, float]:
-                filtered_df = convert_mechanism_to_text(filtered_df)
-            return filtered_df
+            # Eşleme, filtre ve dönüşümler tek bir iş olarak executor'da çalışır (event loop'a tek geçiş)
+            return await loop.run_in_executor(None, partial(self._filtered_records, criteria))
         except Exception as e:
             raise ProviderError(self.name,
                                 e,
@@ -50,83 +61,51 @@ class PeerWest2Provider(IDataProvider):
     def fetch_data_sync(self, criteria: Dict[str, Any]) -> pd.DataFrame:
         """NGA-West2 verilerini getir (senkron)"""
         try:
-            df = self.flatfile_df.copy()
-            self.mapped_df = self.column_mapper.map_columns(df=df)
-            self.mapped_df = self._apply_filters(self.mapped_df, criteria)
-            print(f"PEER'dan {len(self.mapped_df)} kayıt alındı.")
-            self.mapped_df['PROVIDER'] = str(self.name)
-
-            # Mekanizma dönüşümü
-            if self.mapped_df['MECHANISM'].dtype in [np.int64, np.float64, int, float]:
-                self.mapped_df = convert_mechanism_to_text(self.mapped_df)
-            return self.mapped_df
+            filtered_df = self._filtered_records(criteria)
+            print(f"PEER'dan {len(filtered_df)} kayıt alındı.")
+            return filtered_df
         except Exception as e:
             raise ProviderError(self.name, 
                                 e,
                                 f"PEER sync data fetch failed: {e}")
 
+    def _get_mapped_flatfile(self) -> pd.DataFrame:
+        """Flatfile'ın kolon eşlemesini bir kez yapar; flatfile_df yeniden atanırsa eşleme yenilenir"""
+        if self._mapped_flatfile is None or self._mapped_source is not self.flatfile_df:
+            self._mapped_flatfile = self.column_mapper.map_columns(df=self.flatfile_df)
+            self._mapped_source = self.flatfile_df
+            self._needs_mechanism_text = self._mapped_flatfile['MECHANISM'].dtype in [np.int64, np.float64, int, float]
+        return self._mapped_flatfile
+
+    def _filtered_records(self, criteria: Dict[str, Any]) -> pd.DataFrame:
+        """Eşlenmiş flatfile'ı filtreler, PROVIDER ekler ve sayısal mekanizmayı metne çevirir"""
+        filtered_df = self._apply_filters(self._get_mapped_flatfile(), criteria)
+        filtered_df['PROVIDER'] = constant_category(str(self.name), len(filtered_df))
+
+        # Mekanizma dönüşümü
+        if self._needs_mechanism_text:
+            filtered_df = convert_mechanism_to_text(filtered_df)
+        return filtered_df
+
     def _apply_filters(self,
                        df: pd.DataFrame,
                        criteria: Dict[str, Any]) -> pd.DataFrame:
         """Filtreleme uygula"""
         try:
             if df.empty:
-                return df
-            filtered_df = df.copy()
-            
-            # Büyüklük filtreleme
-            if criteria['min_magnitude'] is not None:
-                filtered_df = filtered_df[filtered_df['MAGNITUDE'] >= criteria['min_magnitude']]
-            if criteria['max_magnitude'] is not None:
-                filtered_df = filtered_df[filtered_df['MAGNITUDE'] <= criteria['max_magnitude']]
-
-            # Mesafe filtreleme (RJB)
-            if criteria['min_Rjb'] is not None:
-                filtered_df = filtered_df[filtered_df['RJB(km)'] >= criteria['min_Rjb']]
-            if criteria['max_Rjb'] is not None:
-                filtered_df = filtered_df[filtered_df['RJB(km)'] <= criteria['max_Rjb']]
-
-            # Mesafe filtreleme (RRUP)
-            if criteria['min_Rrup'] is not None:
-                filtered_df = filtered_df[filtered_df['RRUP(km)'] >= criteria['min_Rrup']]
-            if criteria['max_Rrup'] is not None:
-                filtered_df = filtered_df[filtered_df['RRUP(km)'] <= criteria['max_Rrup']]
-
-            # VS30 filtreleme
-            if criteria['min_vs30'] is not None:
-                filtered_df = filtered_df[filtered_df['VS30(m/s)'] >= criteria['min_vs30']]
-            if criteria['max_vs30'] is not None:
-                filtered_df = filtered_df[filtered_df['VS30(m/s)'] <= criteria['max_vs30']]
-
-            # Derinlik filtreleme
-            if criteria['min_depth'] is not None:
-                filtered_df = filtered_df[filtered_df['HYPO_DEPTH(km)'] >= criteria['min_depth']]
-            if criteria['max_depth'] is not None:
-                filtered_df = filtered_df[filtered_df['HYPO_DEPTH(km)'] <= criteria['max_depth']]
-
-            # PGA filtreleme
-            if criteria['min_pga'] is not None:
-                filtered_df = filtered_df[filtered_df['PGA(cm2/sec)'] >= criteria['min_pga']]
-            if criteria['max_pga'] is not None:
-                filtered_df = filtered_df[filtered_df['PGA(cm2/sec)'] <= criteria['max_pga']]
-
-            # PGV filtreleme
-            if criteria['min_pgv'] is not None:
-                filtered_df = filtered_df[filtered_df['PGV(cm/sec)'] >= criteria['min_pgv']]
-            if criteria['max_pgv'] is not None:
-                filtered_df = filtered_df[filtered_df['PGV(cm/sec)'] <= criteria['max_pgv']]
-
-            # PGD filtreleme
-            if criteria['min_pgd'] is not None:
-                filtered_df = filtered_df[filtered_df['PGD(cm)'] >= criteria['min_pgd']]
-            if criteria['max_pgd'] is not None:
-                filtered_df = filtered_df[filtered_df['PGD(cm)'] <= criteria['max_pgd']]
+                return df.copy()
+            # Tüm kriterler tek bir boolean maskede birleştirilir; DataFrame yalnızca sonda bir kez dilimlenir
+            mask = np.ones(len(df), dtype=bool)
+            for key, column, compare in _RANGE_FILTERS:
+                value = criteria[key]
+                if value is not None:
+                    mask &= compare(df[column].to_numpy(), value)
 
             # Mekanizma filtreleme
             if criteria['mechanisms']:
-                filtered_df = filtered_df[filtered_df['MECHANISM'].isin(criteria['mechanisms'])]
+                mask &= df['MECHANISM'].isin(criteria['mechanisms']).to_numpy()
 
-            return filtered_df
+            return df[mask]
         except Exception as e:
             raise DataProcessingError(self.name, e, "Filter application failed")
 
@@ -1,5 +1,12 @@
+import asyncio
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import pandas as pd
 from .CacheManager import CacheManager
-from ..processing.Selection import SearchCriteria
+from ..core.Config import MEMORY_CACHE_SIZE
+from ..processing.ResultHandle import Result
 from ..providers.AfadProvider import AFADDataProvider
 from ..providers.IProvider import IDataProvider
 from ..providers.PeerProvider import PeerWest2Provider
@@ -7,26 +14,89 @@ from ..enums.Enums import ProviderName
 from ..processing.Mappers import ColumnMapperFactory
 
 class CachedProviderProxy:
-    def __init__(self, provider: IDataProvider, cache_manager: CacheManager):
+    def __init__(self, provider: IDataProvider, cache_manager: CacheManager, memory_size: int = MEMORY_CACHE_SIZE):
         self._provider = provider
         self._cache = cache_manager
+        # Süreç içi LRU: anahtar -> (kayıt zamanı, DataFrame); en son kullanılan sonda
+        self._memory: "OrderedDict[str, Tuple[float, pd.DataFrame]]" = OrderedDict()
+        self._memory_size = memory_size
+        # Aynı anahtar için süren async fetch'ler: eşzamanlı aynı istekler tek hesaplamayı paylaşır
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _memory_get(self, key: str) -> Optional[pd.DataFrame]:
+        """Bellekteki sonucu kopya olarak döndür (çağıran değiştirse de önbellek bozulmaz); süresi dolmuşsa at"""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        stored_at, df = entry
+        if (time.time() - stored_at) > self._cache.expiry_seconds:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return df.copy()
+
+    def _memory_set(self, key: str, df: pd.DataFrame) -> None:
+        if self._memory_size <= 0 or df is None or df.empty:
+            return
+        self._memory[key] = (time.time(), df.copy())
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._memory_size:
+            self._memory.popitem(last=False)
+
+    def _get_cached(self, key: str, criteria: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Önce bellek, sonra disk önbelleği (anahtar istek başına bir kez hesaplanır)"""
+        cached_df = self._memory_get(key)
+        if cached_df is None:
+            cached_df = self._cache.get(self._provider.get_name(), criteria, key=key)
+            if cached_df is not None:
+                self._memory_set(key, cached_df)
+        return cached_df
+
+    def _store(self, key: str, criteria: Dict[str, Any], df: pd.DataFrame) -> None:
+        self._cache.set(self._provider.get_name(), criteria, df, key=key)
+        self._memory_set(key, df)
+
+    async def fetch_data_async(self, criteria: Dict[str, Any]):
+        # 1. Cache'den oku (bellek, sonra disk)
+        key = self._cache._generate_key(self._provider.get_name(), criteria)
+        cached_df = self._get_cached(key, criteria)
 
-    async def fetch_data_async(self, criteria: SearchCriteria):
-        # 1. Cache'den oku
-        cached_df = self._cache.get(self._provider.get_name(), criteria)
-        
         if cached_df is not None:
-            # ResultHandle.py içindeki Result sınıfına sarmalayarak döndür
-            from ..processing.ResultHandle import Result
             return Result.ok(cached_df)
 
-        # 2. Cache'de yoksa veya eskimişse (expired) asıl provider'a git
-        result = await self._provider.fetch_data_async(criteria)
-        
-        # 3. Başarılı sonucu cache'e kaydet
+        # 2. Aynı istek zaten sürüyorsa onun sonucunu bekle (kontrol ve kayıt arasında await yok, kilit gerekmez)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            result = await asyncio.shield(pending)
+            return Result.ok(result.value.copy()) if result.success else result
+
+        # 3. Cache'de yoksa veya eskimişse (expired) asıl provider'a git
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._provider.fetch_data_async(criteria)
+            # 4. Başarılı sonucu cache'e kaydet
+            if result.success:
+                self._store(key, criteria, result.value)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # bekleyen yoksa "never retrieved" uyarısı basılmasın
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        return result
+
+    def fetch_data_sync(self, criteria: Dict[str, Any]):
+        key = self._cache._generate_key(self._provider.get_name(), criteria)
+        cached_df = self._get_cached(key, criteria)
+        if cached_df is not None:
+            return Result.ok(cached_df)
+
+        result = self._provider.fetch_data_sync(criteria)
         if result.success:
-            self._cache.set(self._provider.get_name(), criteria, result.value)
-            
+            self._store(key, criteria, result.value)
         return result
 
     def __getattr__(self, name):
@@ -35,7 +105,17 @@ class CachedProviderProxy:
     
 class ProviderFactory:
     """Provider factory sınıfı"""
-    _cache_manager = CacheManager() # Singleton benzeri tek bir cache yönetimi
+    # Singleton benzeri tek bir cache yönetimi; ilk cache'li provider'da oluşturulur (import'ta klasör açılmaz)
+    _cache_manager: Optional[CacheManager] = None
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def _get_cache_manager(cls) -> CacheManager:
+        if cls._cache_manager is None:
+            with cls._cache_lock:
+                if cls._cache_manager is None:
+                    cls._cache_manager = CacheManager()
+        return cls._cache_manager
 
     @staticmethod
     def create_provider(provider_type: ProviderName, use_cache: bool = False, **kwargs) -> IDataProvider:
@@ -51,6 +131,6 @@ class ProviderFactory:
 
         # Eğer cache isteniyorsa Proxy ile sarmala
         if use_cache:
-            return CachedProviderProxy(provider, ProviderFactory._cache_manager)
+            return CachedProviderProxy(provider, ProviderFactory._get_cache_manager())
             
         return provider
@@ -1,6 +1,15 @@
+from importlib.util import find_spec
+import os
+from pathlib import Path
+from typing import Callable, Optional
+import uuid
 import pandas as pd
 import importlib.resources as pkg_resources
 from selection_service import data  # paket içinde data klasörü
+from ..core.Config import DATA_CACHE_DIR, PARQUET_COMPRESSION
+
+# python-calamine kuruluysa Excel okumada (openpyxl'den çok daha hızlı) kullanılır
+_EXCEL_ENGINE_KWARGS = {"engine": "calamine"} if find_spec("python_calamine") else {}
 
 def load_csv(filename: str) -> pd.DataFrame:
     """
@@ -20,5 +29,59 @@ def load_excel(filename: str) -> pd.DataFrame:
         pd.DataFrame: Excel içeriği
     """
     with pkg_resources.files(data).joinpath(filename).open('rb') as f:
-        df = pd.read_excel(f)
-    return df
\ No newline at end of file
+        df = pd.read_excel(f, **_EXCEL_ENGINE_KWARGS)
+    return df
+
+def load_excel_cached(filename: str, cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    load_excel ile aynı; ilk okumada içeriği cache_dir altına Parquet olarak yazar,
+    sonraki süreçler kaynak dosya daha yeni değilse Parquet'ten okur.
+
+    Args:
+        filename (str): Kaynak dosya adı (örn: 'stations.xlsx')
+        cache_dir (Path): Parquet önbellek klasörü (None ise DATA_CACHE_DIR)
+
+    Returns:
+        pd.DataFrame: Excel içeriği
+    """
+    return _load_parquet_cached(filename, load_excel, cache_dir)
+
+def load_csv_cached(filename: str, cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    load_csv ile aynı; CSV her süreçte yeniden ayrıştırılmaz, Parquet önbelleğinden okunur
+    (bkz. load_excel_cached).
+
+    Args:
+        filename (str): Kaynak dosya adı (örn: 'NGA-West2_flatfile.csv')
+        cache_dir (Path): Parquet önbellek klasörü (None ise DATA_CACHE_DIR)
+
+    Returns:
+        pd.DataFrame: CSV içeriği
+    """
+    return _load_parquet_cached(filename, load_csv, cache_dir)
+
+def _load_parquet_cached(filename: str, loader: Callable[[str], pd.DataFrame], cache_dir: Optional[Path]) -> pd.DataFrame:
+    """Kaynak dosyadan daha yeni bir Parquet kopyası varsa onu, yoksa loader ile okuyup Parquet'e yazar"""
+    cache_path = Path(DATA_CACHE_DIR if cache_dir is None else cache_dir) / f"{Path(filename).stem}.parquet"
+    try:
+        with pkg_resources.as_file(pkg_resources.files(data).joinpath(filename)) as source:
+            source_mtime = source.stat().st_mtime
+        if cache_path.exists() and cache_path.stat().st_mtime >= source_mtime:
+            return pd.read_parquet(cache_path)
+    except Exception as e:
+        print(f"Parquet önbelleği okunamadı, kaynak dosyadan okunuyor: {e}")
+
+    df = loader(filename)
+    # Önce geçici dosyaya yazılır, sonra atomik olarak yerine konur: eşzamanlı süreç yarım dosya okumaz
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp_path, engine='pyarrow', compression=PARQUET_COMPRESSION, index=False)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Parquet önbelleği yazılamadı: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return df
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_data_cache(tmp_path_factory):
+    # Paket verisinin Parquet kopyaları kullanıcı önbelleğine değil testin geçici klasörüne yazılır
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("selection_service.utility.path_utils.DATA_CACHE_DIR", tmp_path_factory.mktemp("data_cache"))
+        yield
@@ -1,12 +1,13 @@
 import os
 import io
+import json
 import pytest
 import zipfile
 import pandas as pd
 import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
 from selection_service.processing.ResultHandle import Result
-from selection_service.providers.AfadProvider import AFADDataProvider
+from selection_service.providers.AfadProvider import _EVENT_DETAIL_CACHE, AFADDataProvider
 from selection_service.processing.Selection import SearchCriteria
 from selection_service.core.ErrorHandle import NetworkError, ProviderError
 
@@ -19,6 +20,13 @@ class DummyMapper:
         return df
 
 
+@pytest.fixture(autouse=True)
+def clear_event_cache():
+    _EVENT_DETAIL_CACHE.clear()
+    yield
+    _EVENT_DETAIL_CACHE.clear()
+
+
 @pytest.fixture
 def provider(tmp_path):
     p = AFADDataProvider(column_mapper=DummyMapper)
@@ -32,11 +40,11 @@ def test_map_criteria(provider):
     assert isinstance(mapped, dict)
 
 
-@patch("selection_service.providers.AfadProvider.requests.post")
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
 def test_fetch_data_sync_success(mock_post, provider):
     mock_resp = MagicMock()
     mock_resp.status_code = 200
-    mock_resp.json.return_value = [{"a": 1}, {"a": 2}]
+    mock_resp.content = b'[{"a": 1}, {"a": 2}]'
     mock_post.return_value = mock_resp
 
     result = provider.fetch_data_sync({"dummy": "x"})
@@ -46,7 +54,7 @@ def test_fetch_data_sync_success(mock_post, provider):
     assert "PROVIDER" in df.columns
 
 
-@patch("selection_service.providers.AfadProvider.requests.post")
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
 def test_fetch_data_sync_failure(mock_post, provider):
     mock_resp = MagicMock()
     mock_resp.status_code = 500
@@ -98,20 +106,92 @@ async def test_fetch_data_async_failure(provider):
         assert isinstance(result.error, Exception)
 
 
-@patch("selection_service.providers.AfadProvider.requests.get")
-def test_get_event_details_success(mock_get, provider):
-    mock_resp = MagicMock()
-    mock_resp.status_code = 200
-    mock_resp.json.return_value = {"id": 1, "name": "test"}
-    mock_get.return_value = mock_resp
+@pytest.mark.asyncio
+async def test_fetch_data_async_adds_endpoint_source(tmp_path):
+    class RsnMapper:
+        @staticmethod
+        def map_columns(df: pd.DataFrame) -> pd.DataFrame:
+            return df.rename(columns={"waveformId": "RSN"})
 
-    result = provider.get_event_details([123])
+    provider = AFADDataProvider(column_mapper=RsnMapper)
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.read = AsyncMock(return_value=b'[{"waveformId": 101}, {"waveformId": 202}]')
+
+    mock_session = MagicMock()
+    mock_session.closed = False
+    mock_session.post.return_value.__aenter__.return_value = mock_response
+
+    with patch("selection_service.providers.AfadProvider.aiohttp.ClientSession", return_value=mock_session):
+        result = await provider.fetch_data_async({"y": 1})
+    df = result.unwrap()
+    assert df["ENDPOINTSOURCE"].tolist() == ["https://tadas.afad.gov.tr/waveform-detail/101",
+                                             "https://tadas.afad.gov.tr/waveform-detail/202"]
+
+
+def _mock_detail_session(payloads):
+    """event_id -> (status, json) eşlemesinden aiohttp oturumu taklidi"""
+    def get(url, headers=None):
+        status, body = payloads[int(url.rsplit("/", 1)[-1])]
+        response = MagicMock(status=status)
+        response.read = AsyncMock(return_value=json.dumps(body).encode())
+        ctx = MagicMock()
+        ctx.__aenter__ = AsyncMock(return_value=response)
+        ctx.__aexit__ = AsyncMock(return_value=False)
+        return ctx
+
+    session = MagicMock()
+    session.get.side_effect = get
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return session
+
+
+def test_get_event_details_success(provider):
+    session = _mock_detail_session({123: (200, {"id": 1, "name": "test"})})
+    with patch("selection_service.providers.AfadProvider.aiohttp.ClientSession", return_value=session):
+        result = provider.get_event_details([123])
     assert result.success
     df = result.unwrap()
     assert not df.empty
     assert "id" in df.columns
 
 
+def test_get_event_details_keeps_order_and_skips_failures(provider):
+    session = _mock_detail_session({1: (200, {"id": 1}), 2: (404, None), 3: (200, [{"id": 3}])})
+    with patch("selection_service.providers.AfadProvider.aiohttp.ClientSession", return_value=session):
+        df = provider.get_event_details([1, 2, 3]).unwrap()
+    assert df["id"].tolist() == [1, 3]
+    assert session.get.call_count == 3
+
+
+def test_get_event_details_served_from_cache(provider):
+    session = _mock_detail_session({5: (200, {"id": 5}), 6: (200, {"id": 6})})
+    with patch("selection_service.providers.AfadProvider.aiohttp.ClientSession", return_value=session):
+        provider.get_event_details([5, 5]).unwrap()
+        df = provider.get_event_details([6, 5]).unwrap()
+    assert df["id"].tolist() == [6, 5]
+    assert session.get.call_count == 2
+
+
+def test_get_event_details_sends_only_referer_per_request(provider):
+    session = _mock_detail_session({7: (200, {"id": 7})})
+    with patch("selection_service.providers.AfadProvider.aiohttp.ClientSession", return_value=session) as cls:
+        provider.get_event_details([7]).unwrap()
+    assert cls.call_args.kwargs["headers"]["IsGuest"] == "true"
+    assert session.get.call_args.kwargs["headers"] == {"Referer": "https://tadas.afad.gov.tr/event-detail/7"}
+
+
+@pytest.mark.asyncio
+async def test_get_event_details_inside_running_loop(provider):
+    session = _mock_detail_session({8: (200, {"id": 8}), 9: (200, {"id": 9})})
+    with patch("selection_service.providers.AfadProvider.aiohttp.ClientSession", return_value=session):
+        sync_df = provider.get_event_details([8]).unwrap()
+        async_df = (await provider.get_event_details_async([9, 8])).unwrap()
+    assert sync_df["id"].tolist() == [8]
+    assert async_df["id"].tolist() == [9, 8]
+
+
 def test_extract_and_organize_zip_batch(provider, tmp_path):
     # fake zip dosyası oluştur
     zip_path = tmp_path / "test.zip"
@@ -126,3 +206,226 @@ def test_extract_and_organize_zip_batch(provider, tmp_path):
     )
     assert len(extracted) == 1
     assert os.path.exists(extracted[0])
+
+
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
+def test_sync_calls_reuse_one_http_session(mock_post, provider):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.content = b'[{"a": 1}]'
+    mock_post.return_value = mock_resp
+
+    http_session = provider._http_session
+    provider.fetch_data_sync({"dummy": "x"})
+    provider.fetch_data_sync({"dummy": "y"})
+    assert provider._http_session is http_session
+    assert mock_post.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_session_is_shared_and_closed(provider):
+    first = provider._get_session()
+    assert provider._get_session() is first
+    await provider.close()
+    assert first.closed
+    assert provider._get_session() is not first
+    await provider.close()
+
+
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
+def test_download_single_waveforms_streams_to_disk(mock_post, provider, tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("wave_STA1.mseed", b"x" * 4096)
+    payload = buffer.getvalue()
+
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.headers = {}  # boyut bilinmiyor -> diske akıtılır
+    response.iter_content.return_value = [payload[:1000], payload[1000:]]
+    mock_post.return_value = response
+
+    result = provider.download_single_waveforms("wave_STA1", event_id=7, export_type="mseed")
+    assert result.success
+    assert mock_post.call_args.kwargs["stream"] is True
+    assert os.path.exists(os.path.join(str(tmp_path), "event_7", "wave_STA1.mseed"))
+
+
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
+def test_download_single_waveforms_small_zip_extracted_in_memory(mock_post, provider, tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("wave_STA1.mseed", b"x" * 4096)
+    payload = buffer.getvalue()
+
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.headers = {"Content-Length": str(len(payload))}
+    response.content = payload
+    mock_post.return_value = response
+
+    with patch.object(provider, "save_waveform_zipfile") as save:
+        result = provider.download_single_waveforms("wave_STA1", event_id=8, export_type="mseed")
+    assert result.success
+    save.assert_not_called()
+    assert os.listdir(os.path.join(str(tmp_path), "event_8")) == ["wave_STA1.mseed"]
+
+
+def test_extract_and_organize_zip_nested_ascii(provider, tmp_path):
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as zf:
+        zf.writestr("wave_STA1_E.asc", "1 2 3")
+        zf.writestr("wave_STA1_N.asc", "4 5 6")
+    zip_path = tmp_path / "outer.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("wave_STA1.zip", inner.getvalue())
+        zf.writestr("readme.txt", "x" * 2048)
+
+    extracted = provider.extract_and_organize_zip(str(zip_path), export_type="asc2")
+    assert sorted(os.path.basename(p) for p in extracted) == ["readme.txt", "wave_STA1_E.asc", "wave_STA1_N.asc"]
+    with open(tmp_path / "wave_STA1_N.asc") as f:
+        assert f.read() == "4 5 6"
+
+
+def test_extract_and_organize_zip_batch_many_members(provider, tmp_path):
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as zf:
+        zf.writestr("wave_STA9_E.asc", "1 2 3")
+    zip_path = tmp_path / "part_1.zip"
+    names = [f"wave_STA{i}.mseed" for i in range(8)]
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name in names:
+            zf.writestr(name, name * 100)
+        zf.writestr("wave_STA9.zip", inner.getvalue())
+        zf.writestr("notes.txt", "skipped")
+
+    extracted = provider.extract_and_organize_zip_batch(event_path=str(tmp_path), zip_path=str(zip_path),
+                                                        expected_filenames=names, export_type="asc2")
+    assert [os.path.basename(p) for p in extracted] == names + ["wave_STA9_E.asc"]
+    with open(tmp_path / "STA3" / "wave_STA3.mseed") as f:
+        assert f.read() == "wave_STA3.mseed" * 100
+    assert not zip_path.exists()
+
+
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
+def test_download_batches_run_without_fixed_sleep(mock_post, provider, tmp_path):
+    def respond(url, headers=None, json=None, timeout=None, stream=False):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for name in json["filename"]:
+                zf.writestr(name, name)
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [buffer.getvalue()]
+        return response
+
+    mock_post.side_effect = respond
+    filenames = [f"wave_STA{i}.mseed" for i in range(23)]
+    with patch("selection_service.providers.AfadProvider.time.sleep") as sleep:
+        result = provider.download_afad_waveforms_batch(filenames, event_id=42)
+    summary = result.unwrap()
+    assert sleep.call_count == 0
+    assert mock_post.call_count == 3
+    assert [b["batch_number"] for b in summary["batches"]] == [1, 2, 3]
+    assert summary["successful_batches"] == 3
+    assert summary["downloaded_files"] == 23
+    assert os.path.exists(os.path.join(str(tmp_path), "42", "STA22", "wave_STA22.mseed"))
+
+
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
+def test_missing_files_retried_after_all_batches(mock_post, provider, tmp_path):
+    requested = []
+
+    def respond(url, headers=None, json=None, timeout=None, stream=False):
+        requested.append(list(json["filename"]))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for name in json["filename"]:
+                # İlk istekte STA3 zip'te yok; yeniden denemede gelir
+                if name != "wave_STA3.mseed" or len(requested) > 2:
+                    zf.writestr(name, name)
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [buffer.getvalue()]
+        return response
+
+    mock_post.side_effect = respond
+    filenames = [f"wave_STA{i}.mseed" for i in range(12)]
+    with patch("selection_service.providers.AfadProvider.time.sleep"):
+        summary = provider.download_afad_waveforms_batch(filenames, event_id=7).unwrap()
+
+    assert len(requested) == 3
+    assert requested[2] == ["wave_STA3.mseed"]
+    assert summary["downloaded_files"] == 12
+    assert summary["batches"][0]["failed_files"] == ["wave_STA3.mseed"]
+    assert os.path.exists(os.path.join(str(tmp_path), "7", "STA3", "wave_STA3.mseed"))
+    assert not [f for f in os.listdir(os.path.join(str(tmp_path), "7")) if f.endswith(".zip")]
+
+
+def test_extract_and_organize_zip_batch_skips_corrupt_member(provider, tmp_path):
+    zip_path = tmp_path / "part_1.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("wave_STA1.mseed", b"A" * 64)
+        zf.writestr("wave_STA2.mseed", b"B" * 64)
+    # İkinci üyenin verisini boz: CRC çıkarma sırasında tutmaz
+    raw = bytearray(zip_path.read_bytes())
+    raw[raw.index(b"B" * 64)] = ord("C")
+    zip_path.write_bytes(bytes(raw))
+
+    extracted = provider.extract_and_organize_zip_batch(event_path=str(tmp_path), zip_path=str(zip_path),
+                                                        expected_filenames=["wave_STA1.mseed", "wave_STA2.mseed"],
+                                                        export_type="mseed")
+    assert [os.path.basename(p) for p in extracted] == ["wave_STA1.mseed"]
+    assert not (tmp_path / "STA2" / "wave_STA2.mseed").exists()
+
+
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
+def test_response_frame_limited_to_mapper_source_columns(mock_post):
+    class SourceMapper(DummyMapper):
+        source_columns = ("waveformId", "stationCode", "missingField")
+
+    provider = AFADDataProvider(column_mapper=SourceMapper)
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.content = b'[{"waveformId": 1, "stationCode": " 0101", "unused": "x"}]'
+    mock_post.return_value = mock_resp
+
+    provider.fetch_data_sync({"dummy": "x"}).unwrap()
+    assert list(provider.response_df.columns) == ["waveformId", "stationCode"]
+    assert provider.response_df["stationCode"].tolist() == ["0101"]
+
+
+@patch("selection_service.providers.AfadProvider.requests.Session.post")
+def test_response_frame_keeps_fields_missing_from_first_record(mock_post):
+    class SourceMapper(DummyMapper):
+        source_columns = ("waveformId", "stationCode", "pga")
+
+    provider = AFADDataProvider(column_mapper=SourceMapper)
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.content = b'[{"waveformId": 1, "stationCode": "0101"}, {"waveformId": 2, "stationCode": "0102", "pga": 5.5}]'
+    mock_post.return_value = mock_resp
+
+    provider.fetch_data_sync({"dummy": "x"}).unwrap()
+    assert list(provider.response_df.columns) == ["waveformId", "stationCode", "pga"]
+    assert provider.response_df["pga"].isna().tolist() == [True, False]
+    assert provider.response_df["pga"].iloc[1] == 5.5
+
+
+def test_retry_failed_downloads_backs_off_exponentially(provider):
+    with patch.object(provider, "download_afad_waveforms_batch", return_value={"batches": []}), \
+         patch("selection_service.providers.AfadProvider.time.sleep") as sleep, \
+         patch("selection_service.providers.AfadProvider.random.uniform", return_value=0.5):
+        provider.retry_failed_downloads(event_id=1, failed_filenames=["wave_STA1.mseed"],
+                                        export_type="mseed", file_status="Acc", max_retries=3)
+    assert [c.args[0] for c in sleep.call_args_list] == [1.5, 2.5]
+
+
+def test_retry_failed_downloads_drops_recovered_files(provider):
+    result = {"batches": [{"success": True, "filenames": ["wave_STA1.mseed"]}]}
+    with patch.object(provider, "download_afad_waveforms_batch", return_value=result) as download, \
+         patch("selection_service.providers.AfadProvider.time.sleep"):
+        provider.retry_failed_downloads(event_id=1,
+                                        failed_filenames=["wave_STA1.mseed", "wave_STA2.mseed"],
+                                        export_type="mseed", file_status="Acc", max_retries=2)
+    assert download.call_args_list[1].kwargs["filenames"] == ["wave_STA2.mseed"]
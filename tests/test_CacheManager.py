@@ -0,0 +1,136 @@
+import os
+import time
+import pandas as pd
+import pytest
+from selection_service.providers.CacheManager import CacheManager
+from selection_service.processing.Selection import SearchCriteria
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheManager(cache_dir=str(tmp_path))
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"RSN": [1, 2], "MAGNITUDE": [6.1, 7.0], "PROVIDER": ["PEER", "PEER"]})
+
+
+def test_dict_criteria_roundtrip(cache, df):
+    criteria = {"min_magnitude": 6.0, "mechanisms": [1, 2]}
+    assert cache.get("PEER", criteria) is None
+    cache.set("PEER", criteria, df)
+    pd.testing.assert_frame_equal(cache.get("PEER", criteria), df)
+
+
+def test_key_ignores_dict_order_and_separates_providers(cache):
+    a = {"min_magnitude": 6.0, "max_magnitude": 7.0}
+    b = {"max_magnitude": 7.0, "min_magnitude": 6.0}
+    assert cache._generate_key("PEER", a) == cache._generate_key("PEER", b)
+    assert cache._generate_key("PEER", a) != cache._generate_key("AFAD", a)
+
+
+def test_search_criteria_key(cache, df):
+    criteria = SearchCriteria(start_date="2020-01-01", end_date="2021-01-01", min_magnitude=5, max_magnitude=7)
+    cache.set("AFAD", criteria, df)
+    assert cache.get("AFAD", criteria) is not None
+
+
+def test_expired_entry_is_removed(tmp_path, df):
+    cache = CacheManager(cache_dir=str(tmp_path), expiry_hours=1)
+    cache.set("PEER", {"a": 1}, df)
+    path = os.path.join(str(tmp_path), f"{cache._generate_key('PEER', {'a': 1})}.feather")
+    old = time.time() - 7200
+    os.utime(path, (old, old))
+    assert cache.get("PEER", {"a": 1}) is None
+    assert not os.path.exists(path)
+
+
+def test_proxy_serves_repeated_criteria_from_memory(cache, df):
+    from unittest.mock import MagicMock, patch
+    from selection_service.processing.ResultHandle import Result
+    from selection_service.providers.ProvidersFactory import CachedProviderProxy
+
+    provider = MagicMock()
+    provider.get_name.return_value = "PEER"
+    provider.fetch_data_sync.return_value = Result.ok(df)
+    proxy = CachedProviderProxy(provider, cache)
+    criteria = {"min_magnitude": 6.0}
+    expected = df.copy()
+
+    first = proxy.fetch_data_sync(criteria).unwrap()
+    first["MAGNITUDE"] = 0.0  # çağıranın değişikliği önbelleğe sızmamalı
+    with patch.object(cache, "get", wraps=cache.get) as disk_get:
+        second = proxy.fetch_data_sync(criteria).unwrap()
+    disk_get.assert_not_called()
+    assert provider.fetch_data_sync.call_count == 1
+    pd.testing.assert_frame_equal(second, expected)
+
+
+def test_proxy_hashes_criteria_once_per_request(cache, df):
+    from unittest.mock import MagicMock, patch
+    from selection_service.processing.ResultHandle import Result
+    from selection_service.providers.ProvidersFactory import CachedProviderProxy
+
+    provider = MagicMock()
+    provider.get_name.return_value = "PEER"
+    provider.fetch_data_sync.return_value = Result.ok(df)
+    proxy = CachedProviderProxy(provider, cache, memory_size=0)
+    with patch.object(cache, "_generate_key", wraps=cache._generate_key) as generate_key:
+        proxy.fetch_data_sync({"min_magnitude": 6.0})  # miss: disk get + set
+    assert generate_key.call_count == 1
+    assert cache.get("PEER", {"min_magnitude": 6.0}) is not None
+
+
+def test_proxy_shares_concurrent_identical_fetches(cache, df):
+    import asyncio
+    from unittest.mock import MagicMock
+    from selection_service.processing.ResultHandle import Result
+    from selection_service.providers.ProvidersFactory import CachedProviderProxy
+
+    calls = 0
+
+    async def fetch(criteria):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return Result.ok(df.copy())
+
+    provider = MagicMock()
+    provider.get_name.return_value = "PEER"
+    provider.fetch_data_async = fetch
+    proxy = CachedProviderProxy(provider, cache)
+
+    async def burst():
+        return await asyncio.gather(*(proxy.fetch_data_async({"min_magnitude": 6.0}) for _ in range(5)))
+
+    results = asyncio.run(burst())
+    assert calls == 1
+    assert not proxy._inflight
+    for result in results:
+        pd.testing.assert_frame_equal(result.unwrap(), df)
+
+
+def test_factory_cache_manager_is_lazy_singleton(monkeypatch, tmp_path):
+    from selection_service.providers.ProvidersFactory import ProviderFactory
+    import selection_service.providers.ProvidersFactory as factory_module
+
+    monkeypatch.setattr(ProviderFactory, "_cache_manager", None)
+    monkeypatch.setattr(factory_module, "CacheManager", lambda: CacheManager(cache_dir=str(tmp_path / "c")))
+    assert not (tmp_path / "c").exists()
+    first = ProviderFactory._get_cache_manager()
+    assert first is ProviderFactory._get_cache_manager()
+    assert (tmp_path / "c").is_dir()
+
+
+def test_set_replaces_file_atomically(cache, df, tmp_path):
+    cache.set("PEER", {"a": 1}, df)
+    cache.set("PEER", {"a": 1}, df.iloc[:1])
+    assert sorted(os.listdir(tmp_path)) == [f"{cache._generate_key('PEER', {'a': 1})}.feather"]
+    assert len(cache.get("PEER", {"a": 1})) == 1
+
+
+def test_get_reads_legacy_parquet_entry(cache, df, tmp_path):
+    key = cache._generate_key("PEER", {"a": 1})
+    df.to_parquet(os.path.join(str(tmp_path), f"{key}.parquet"), index=False)
+    pd.testing.assert_frame_equal(cache.get("PEER", {"a": 1}), df)
@@ -4,6 +4,10 @@ from selection_service.core.Config import convert_mechanism_to_text, MECHANISM_M
 from selection_service.core.Config import convert_mechanism_to_numeric, REVERSE_MECHANISM_MAP
 from selection_service.core.Config import get_mechanism_text, MECHANISM_MAP
 from selection_service.core.Config import get_mechanism_numeric, REVERSE_MECHANISM_MAP
+from selection_service.core.Config import get_mechanism_text_vec, get_mechanism_numeric_vec
+import numpy as np
+from selection_service.core.Config import to_categoricals, extract_score_matrix, NUMERIC_SCORE_COLUMNS, SCORING_DTYPE
+from selection_service.core.Config import constant_category
 
 def test_convert_mechanism_to_text_basic():
     df = pd.DataFrame({'MECHANISM': [0, 1, 2, 3, 4, 5, -999]})
@@ -23,6 +27,12 @@ def test_convert_mechanism_to_text_custom_column():
     expected = [MECHANISM_MAP[v] for v in [0, 1, 2]]
     assert result['MECH'].tolist() == expected
 
+def test_convert_mechanism_to_text_returns_categorical():
+    df = pd.DataFrame({'MECHANISM': [0, 2.0, float('nan'), 2.5, 6]})
+    result = convert_mechanism_to_text(df)
+    assert isinstance(result['MECHANISM'].dtype, pd.CategoricalDtype)
+    assert result['MECHANISM'].tolist() == ['StrikeSlip', 'Reverse', 'Unknown', 'Unknown', 'Unknown']
+
 def test_convert_mechanism_to_text_does_not_modify_original():
     df = pd.DataFrame({'MECHANISM': [0, 1]})
     df_copy = df.copy()
@@ -87,4 +97,52 @@ def test_get_mechanism_numeric(text_value, expected):
         assert get_mechanism_numeric(text_value) == expected
 
 
+def test_get_mechanism_vec_matches_scalar():
+    codes = [0, 1, 2, 3, 4, 5, -999, 42, None]
+    texts = ['StrikeSlip', 'Normal', 'Reverse', 'Reverse/Oblique', 'Normal/Oblique', 'Oblique', 'Unknown', 'NotAType', '', None]
+    assert get_mechanism_text_vec(codes).tolist() == [get_mechanism_text(c) for c in codes]
+    assert get_mechanism_numeric_vec(texts).tolist() == [get_mechanism_numeric(t) for t in texts]
+
+
+def test_to_categoricals_only_touches_present_columns():
+    df = pd.DataFrame({'PROVIDER': ['AFAD', 'PEER', 'AFAD'], 'MAGNITUDE': [6.0, 6.5, 7.0]})
+    result = to_categoricals(df)
+    assert isinstance(result['PROVIDER'].dtype, pd.CategoricalDtype)
+    assert result['MAGNITUDE'].dtype == df['MAGNITUDE'].dtype
+    assert result['PROVIDER'].tolist() == df['PROVIDER'].tolist()
+
+
+def test_extract_score_matrix_fills_missing_columns_with_nan():
+    df = pd.DataFrame({'MAGNITUDE': [6.0, None], 'VS30(m/s)': pd.array([400, 760], dtype='Int64'), 'PROVIDER': ['AFAD', 'PEER']})
+    matrix = extract_score_matrix(df, ['MAGNITUDE', 'VS30(m/s)', 'PGA(cm2/sec)'])
+    assert matrix.dtype == SCORING_DTYPE and matrix.shape == (2, 3)
+    assert matrix.flags['C_CONTIGUOUS']
+    np.testing.assert_array_equal(matrix, np.array([[6.0, 400, np.nan], [np.nan, 760, np.nan]], dtype=SCORING_DTYPE))
+    assert extract_score_matrix(df).shape == (2, len(NUMERIC_SCORE_COLUMNS))
+
+
+def test_scoring_map_entries_are_frozen():
+    from dataclasses import FrozenInstanceError
+    from selection_service.core.Config import SCORING_MAP, NUMERIC_SCORE_KEYS
+    assert SCORING_MAP['magnitude'].column == 'MAGNITUDE'
+    assert not SCORING_MAP['mechanism'].is_numeric
+    assert 'mechanism' not in NUMERIC_SCORE_KEYS
+    with pytest.raises(FrozenInstanceError):
+        SCORING_MAP['magnitude'].weight = 1.0
+
+
+def test_mechanism_dtype_survives_provider_concat():
+    from selection_service.core.Config import MECHANISM_DTYPE
+    peer = convert_mechanism_to_text(pd.DataFrame({'MECHANISM': [0, 2]}))
+    afad = pd.DataFrame({'MECHANISM': pd.Categorical(['Reverse-StrikeSlip'], dtype=MECHANISM_DTYPE)})
+    combined = pd.concat([peer, afad], ignore_index=True)
+    assert combined['MECHANISM'].dtype == MECHANISM_DTYPE
+    assert to_categoricals(combined)['MECHANISM'].dtype == MECHANISM_DTYPE
+    assert to_categoricals(pd.DataFrame({'MECHANISM': ['Custom']}))['MECHANISM'].tolist() == ['Custom']
+
 
+def test_constant_category_single_category_int8_codes():
+    cat = constant_category("AFAD", 4)
+    assert list(cat) == ["AFAD"] * 4
+    assert list(cat.categories) == ["AFAD"]
+    assert cat.codes.dtype == np.int8
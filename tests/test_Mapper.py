@@ -3,8 +3,16 @@ import pandas as pd
 import numpy as np
 from unittest.mock import patch
 from selection_service.processing.Mappers import AFADColumnMapper
-from selection_service.processing.Mappers import AFADColumnMapper
-from selection_service.core.Config import MECHANISM_MAP
+from selection_service.processing.Mappers import STATION_CODES_NORMALIZED, _load_station_info_df, haversine_vec, normalize_station_codes
+from selection_service.core.Config import MECHANISM_MAP, STANDARD_COLUMNS
+
+@pytest.fixture(autouse=True)
+def clear_station_cache(monkeypatch):
+    # İstasyon tablosu süreç boyunca (ve diskte Parquet olarak) önbellekli; read_excel'i patch'leyen testler için kapat
+    monkeypatch.setattr("selection_service.processing.Mappers.STATION_PARQUET_CACHE", False)
+    _load_station_info_df.cache_clear()
+    yield
+    _load_station_info_df.cache_clear()
 
 @pytest.fixture
 def mapper():
@@ -31,6 +39,24 @@ def test_classify_fault_type(mapper, dip, rake, expected):
     result = mapper._classify_fault_type(dip, rake)
     assert result == expected
 
+def test_handle_mechanisms_matches_scalar(mapper):
+    rakes = [-180, -150, -120, -90, -60, -45, -30, 0, 30, 45, 60, 90, 120, 150, 180, 210, -390]
+    dips = [0, 20, 29.9, 30, 45, 90]
+    grid = [(d, r) for d in dips for r in rakes]
+    df = pd.DataFrame({
+        "relatedDip1": [d for d, _ in grid], "relatedRake1": [r for _, r in grid],
+        "relatedDip2": [d for d, _ in reversed(grid)], "relatedRake2": [r for _, r in reversed(grid)],
+    })
+    df.loc[::7, "relatedDip1"] = np.nan
+    df.loc[::5, "relatedRake2"] = np.nan
+
+    expected = [mapper._classify_fault_planes(*(0 if pd.isna(v) else v for v in row))
+                for row in df.itertuples(index=False)]
+    result = mapper._handle_mechanisms(df.copy())["MECHANISM"]
+
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert result.astype(str).tolist() == expected
+
 #-----------------------------------------------------------------------------------------------
 def test_haversine_zero_distance(mapper):
     # Same point, distance should be 0
@@ -58,6 +84,13 @@ def test_haversine_antipodal_points(mapper):
     expected = earth_radius * 3.141592653589793
     assert pytest.approx(dist, 0.1) == expected
 
+def test_haversine_vec_broadcasts(mapper):
+    lats, lons = np.array([41.0082, 0.0, 40.0]), np.array([28.9784, 0.0, 29.0])
+    dists = haversine_vec(lats[:, None], lons[:, None], np.array([39.9334, 90.0]), np.array([32.8597, 0.0]))
+    assert dists.shape == (3, 2)
+    assert dists[0, 0] == pytest.approx(mapper._haversine(41.0082, 28.9784, 39.9334, 32.8597))
+    assert dists[1, 1] == pytest.approx(6371.0 * np.pi / 2)
+
 #-----------------------------------------------------------------------------------------------
 
 @pytest.fixture
@@ -113,4 +146,113 @@ def test_no_missing_vs30(mock_excel):
     with patch("selection_service.processing.Mappers.pd.read_excel", return_value=pd.DataFrame(valid_data)):
         mapper = AFADColumnMapper()
         df = mapper._build_station_info_df("dummy_path.xlsx")
-        assert (df["Vs30"] == pd.Series([500, 600])).all()
\ No newline at end of file
+        assert (df["Vs30"] == pd.Series([500, 600])).all()
+
+def test_station_infos_lookup(sample_station_df):
+    with patch("selection_service.processing.Mappers.pd.read_excel", return_value=sample_station_df):
+        mapper = AFADColumnMapper()
+    df = pd.DataFrame({"stationCode": [" STA1", "STA3 ", "NOPE"]})
+    out = mapper._handle_station_infos(df)
+    assert out["STATION"].tolist() == ["Loc1", "Loc3", ""]
+    assert out["VS30(m/s)"].iloc[0] == 760
+    assert out["VS30(m/s)"].iloc[2] == 0.0
+
+@patch("pandas.read_excel", side_effect=Exception("File not found"))
+def test_station_infos_without_station_file(mock_excel):
+    mapper = AFADColumnMapper()
+    out = mapper._handle_station_infos(pd.DataFrame({"stationCode": ["STA1"]}))
+    assert out["VS30(m/s)"].tolist() == [0.0]
+    assert out["STATION"].tolist() == [""]
+
+def test_map_columns_leaves_input_untouched(mapper):
+    raw = pd.DataFrame({"stationCode": [" STA1"], "eventDate": ["2020-01-01"], "recordFilename": ["a"], "mvalue": [6.1]})
+    before = raw.copy()
+    out = mapper.map_columns(raw)
+    pd.testing.assert_frame_equal(raw, before)
+    assert out["MAGNITUDE"].tolist() == [6.1]
+    assert out["YEAR"].tolist() == [2020]
+
+def test_t90_average_skips_missing(mapper):
+    df = pd.DataFrame({"t90e": [1.0, np.nan, np.nan], "t90n": [3.0, 4.0, np.nan], "t90u": [5.0, 6.0, np.nan]})
+    out = mapper._handle_t90_duration(df)["T90_avg(sec)"]
+    assert out.iloc[0] == pytest.approx(3.0)
+    assert out.iloc[1] == pytest.approx(5.0)
+    assert np.isnan(out.iloc[2])
+
+@pytest.mark.parametrize("max_distance_km, expected", [(20.0, 760.0), (0.001, 0.0)])
+def test_fill_missing_vs30_from_nearest(sample_station_df, max_distance_km, expected):
+    with patch("selection_service.processing.Mappers.pd.read_excel", side_effect=lambda *a, **k: sample_station_df.copy()):
+        mapper = AFADColumnMapper()
+        df = mapper._build_station_info_df(max_distance_km=max_distance_km)
+    assert df.loc[0, "Vs30"] == 760
+    assert df.loc[1, "Vs30"] == expected
+    assert df.loc[2, "Vs30"] == expected
+
+def test_fill_missing_vs30_uses_great_circle_km(sample_station_df):
+    # STA2 ~14 km, STA3 ~7 km away from STA1
+    with patch("selection_service.processing.Mappers.pd.read_excel", side_effect=lambda *a, **k: sample_station_df.copy()):
+        df = AFADColumnMapper()._build_station_info_df(max_distance_km=10.0)
+    assert df.loc[1, "Vs30"] == 0.0
+    assert df.loc[2, "Vs30"] == 760
+
+def test_normalized_station_codes_are_not_stripped_again(mapper):
+    df = normalize_station_codes(pd.DataFrame({"stationCode": [" STA1 "]}))
+    assert df["stationCode"].tolist() == ["STA1"]
+    assert df.attrs[STATION_CODES_NORMALIZED] is True
+
+    # İşaretli DataFrame'de kodlara tekrar dokunulmaz
+    flagged = pd.DataFrame({"stationCode": [" STA1"]})
+    flagged.attrs[STATION_CODES_NORMALIZED] = True
+    assert mapper._handle_station_infos(flagged)["stationCode"].tolist() == [" STA1"]
+
+def test_duplicate_station_codes_keep_last(sample_station_df, capsys):
+    stations = pd.concat([sample_station_df, sample_station_df.iloc[[0]].assign(Location="Loc1-new")], ignore_index=True)
+    with patch("selection_service.processing.Mappers.pd.read_excel", return_value=stations):
+        mapper = AFADColumnMapper()
+    assert "STA1" in capsys.readouterr().out
+    out = mapper._handle_station_infos(pd.DataFrame({"stationCode": ["STA1"]}))
+    assert out["STATION"].tolist() == ["Loc1-new"]
+
+def test_station_table_is_loaded_once(sample_station_df):
+    with patch("selection_service.processing.Mappers.pd.read_excel", side_effect=lambda *a, **k: sample_station_df.copy()) as read_excel:
+        first, second = AFADColumnMapper(), AFADColumnMapper()
+    assert read_excel.call_count == 1
+    first.station_df.loc[0, "Vs30"] = -1
+    assert second.station_df.loc[0, "Vs30"] == 760
+
+def test_create_mapper_uses_registry():
+    from selection_service.enums.Enums import ProviderName
+    from selection_service.processing.Mappers import BaseColumnMapper, ColumnMapperFactory, PEERColumnMapper
+    assert isinstance(ColumnMapperFactory.create_mapper(ProviderName.PEER), PEERColumnMapper)
+    fallback = ColumnMapperFactory.create_mapper("UNKNOWN")
+    assert type(fallback) is BaseColumnMapper
+    assert tuple(fallback.map_columns(pd.DataFrame({"x": [1]})).columns) == STANDARD_COLUMNS
+
+def test_load_excel_cached_writes_and_reuses_parquet(tmp_path, sample_station_df):
+    from selection_service.utility.path_utils import load_excel_cached
+    with patch("selection_service.utility.path_utils.pd.read_excel", return_value=sample_station_df) as read_excel:
+        first = load_excel_cached("stations.xlsx", cache_dir=tmp_path)
+        second = load_excel_cached("stations.xlsx", cache_dir=tmp_path)
+    assert read_excel.call_count == 1
+    assert (tmp_path / "stations.parquet").exists()
+    pd.testing.assert_frame_equal(first, second)
+
+def test_load_csv_cached_writes_and_reuses_parquet(tmp_path):
+    from selection_service.utility.path_utils import load_csv_cached
+    flatfile = pd.DataFrame({"Earthquake Magnitude": [6.1, 7.0], "Station Name": ["A", "B"]})
+    with patch("selection_service.utility.path_utils.pd.read_csv", return_value=flatfile) as read_csv:
+        first = load_csv_cached("NGA-West2_flatfile.csv", cache_dir=tmp_path)
+        second = load_csv_cached("NGA-West2_flatfile.csv", cache_dir=tmp_path)
+    assert read_csv.call_count == 1
+    assert (tmp_path / "NGA-West2_flatfile.parquet").exists()
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_load_excel_cached_defaults_to_data_cache_dir(tmp_path, monkeypatch, sample_station_df):
+    from selection_service.utility.path_utils import load_excel_cached
+    monkeypatch.setattr("selection_service.utility.path_utils.DATA_CACHE_DIR", tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    with patch("selection_service.utility.path_utils.pd.read_excel", return_value=sample_station_df):
+        load_excel_cached("stations.xlsx")
+    assert [p.name for p in (tmp_path / "data").iterdir()] == ["stations.parquet"]
+    assert not (tmp_path / ".cache").exists()
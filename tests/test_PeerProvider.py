@@ -34,7 +34,7 @@ def provider(tmp_path, dummy_df, dummy_mapper):
     # file_path = tmp_path / "nga.csv"
     # dummy_df.to_csv(file_path, index=False)
     # return PeerWest2Provider(column_mapper=dummy_mapper, file_path=str(file_path))
-     with patch("selection_service.providers.PeerProvider.pd.read_csv", return_value=dummy_df.copy()):
+     with patch("selection_service.providers.PeerProvider.load_csv_cached", return_value=dummy_df.copy()):
         prov = PeerWest2Provider(column_mapper=dummy_mapper, file_path="fake.csv")
         yield prov
 
@@ -220,6 +220,14 @@ def test_apply_filters_min_mag(provider, dummy_df, empty_criteria):
     assert (filtered["MAGNITUDE"] >= 6.0).all()
 
 
+def test_apply_filters_combined_criteria(provider, dummy_df, empty_criteria):
+    crit = empty_criteria.to_peer_params()
+    crit.update(min_magnitude=5.0, max_vs30=500, min_pga=150, mechanisms=[1, 2])
+    filtered = provider._apply_filters(dummy_df, crit)
+    assert list(filtered.index) == [1]
+    assert dummy_df.shape == (3, 9)
+
+
 def test_apply_filters_with_mechanisms(provider, dummy_df, empty_criteria):
     crit = empty_criteria.to_peer_params()
     crit["mechanisms"] = [1, 3]
@@ -253,6 +261,18 @@ async def test_fetch_data_async(provider, empty_criteria):
     assert result.value["PROVIDER"].iloc[0] == "PEER"
 
 
+def test_flatfile_mapped_once_across_fetches(provider, dummy_mapper, dummy_df, empty_criteria):
+    params = empty_criteria.to_peer_params()
+    provider.fetch_data_sync(params).unwrap()
+    provider.fetch_data_sync(params).unwrap()
+    assert dummy_mapper.map_columns.call_count == 1
+    assert "PROVIDER" not in provider._get_mapped_flatfile().columns
+
+    provider.flatfile_df = dummy_df.iloc[:1].copy()
+    assert len(provider.fetch_data_sync(params).unwrap()) == 1
+    assert dummy_mapper.map_columns.call_count == 2
+
+
 def test_fetch_data_sync_raises(provider):
     provider.flatfile_df = None  # bozuyoruz
     result = provider.fetch_data_sync({"min_magnitude": 5})
@@ -275,3 +295,13 @@ def test_convert_mechanism_numeric(provider, empty_criteria):
     df = result.unwrap()
     assert all(isinstance(m, str) for m in df["MECHANISM"])
 
+
+def test_flatfile_cache_is_written_outside_working_directory(tmp_path, monkeypatch, dummy_df, dummy_mapper):
+    monkeypatch.setattr("selection_service.utility.path_utils.DATA_CACHE_DIR", tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    with patch("selection_service.utility.path_utils.pd.read_csv", return_value=dummy_df.copy()) as read_csv:
+        PeerWest2Provider(column_mapper=dummy_mapper)
+        PeerWest2Provider(column_mapper=dummy_mapper)
+    assert read_csv.call_count == 1
+    assert [p.name for p in (tmp_path / "data").iterdir()] == ["NGA-West2_flatfile.parquet"]
+    assert not (tmp_path / ".cache").exists()
@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 
-from selection_service.core.Pipeline import EarthquakePipeline
+from selection_service.core.Pipeline import EarthquakeAPI, EarthquakePipeline
 from selection_service.processing.ResultHandle import Result
 from selection_service.core.ErrorHandle import ProviderError, StrategyError
 
@@ -136,3 +136,238 @@ async def test_execute_async_multiple_providers():
     # combined = result.value["combined_data"]
     # assert len(combined) == 2
     # assert set(combined["MAGNITUDE"]) == {5.0, 6.0}
+
+
+class MockDownloadProvider:
+    def __init__(self, name):
+        self._name = name
+        self.calls = []
+
+    def get_name(self):
+        return self._name
+
+    def download_single_waveforms(self, filename, **kwargs):
+        self.calls.append((filename, kwargs["event_id"], kwargs["station_code"]))
+        return Result.ok(True)
+
+
+def test_download_waveforms_groups_rows_by_provider():
+    p1, p2 = MockDownloadProvider("p1"), MockDownloadProvider("p2")
+    api = EarthquakeAPI.__new__(EarthquakeAPI)
+    api.providers = [p1, p2]
+    df = pd.DataFrame({"PROVIDER": pd.Categorical(["p1", "p2", "p1"]),
+                       "FILE_NAME_H1": ["a", "b", "c"],
+                       "EVENT": ["e1", "e2", "e3"],
+                       "SSN": ["s1", "s2", "s3"]})
+
+    result = api.download_waveforms(df)
+
+    assert result.success
+    assert sorted(p1.calls) == [("a", "e1", "s1"), ("c", "e3", "s3")]
+    assert p2.calls == [("b", "e2", "s2")]
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather", ".csv", ".xlsx"])
+def test_export_dispatches_on_suffix(tmp_path, suffix):
+    api = EarthquakeAPI.__new__(EarthquakeAPI)
+    df = pd.DataFrame({"PROVIDER": pd.Categorical(["AFAD", "PEER"]), "SCORE": [91.5, 80.0]})
+
+    result = api.export(df, tmp_path / f"events{suffix}")
+
+    assert result.success
+    assert result.value.exists()
+    if suffix == ".parquet":
+        pd.testing.assert_frame_equal(pd.read_parquet(result.value), df)
+
+
+def test_export_rejects_unknown_suffix(tmp_path):
+    api = EarthquakeAPI.__new__(EarthquakeAPI)
+    result = api.export(pd.DataFrame({"A": [1]}), tmp_path / "events.json")
+    assert not result.success
+    assert isinstance(result.error, ValueError)
+
+
+def test_combine_data_drops_all_nan_columns_and_frames():
+    from selection_service.core.Pipeline import PipelineContext
+    df1 = pd.DataFrame({"MAGNITUDE": [5.0, 6.0], "EMPTY": [None, None]})
+    df2 = pd.DataFrame({"MAGNITUDE": [7.0], "RJB(km)": [12.0]})
+    only_nan = pd.DataFrame({"EMPTY": [None]})
+    context = PipelineContext(providers=[], strategy=MockStrategy(), search_criteria=MockCriteria(),
+                              data=[df1, only_nan, df2])
+
+    result = EarthquakePipeline()._combine_data(context)
+
+    assert result.success
+    combined = result.value.combined_df
+    assert "EMPTY" not in combined.columns
+    assert combined["MAGNITUDE"].tolist() == [5.0, 6.0, 7.0]
+    assert combined["RJB(km)"].tolist() == [0.0, 0.0, 12.0]
+
+
+def test_align_columns_matches_plain_concat():
+    df1 = pd.DataFrame({"A": [1.0], "B": ["x"], "I": [1], "F": [True], "M": pd.Categorical(["Reverse"])})
+    df2 = pd.DataFrame({"C": [2.0], "A": [3.0]})
+    aligned = EarthquakePipeline._align_columns([df1, df2])
+    assert all(list(df.columns) == ["A", "B", "I", "F", "M", "C"] for df in aligned)
+    for dfs in ([df1, df2], [df2, df1]):
+        pd.testing.assert_frame_equal(pd.concat(EarthquakePipeline._align_columns(dfs), ignore_index=True),
+                                      pd.concat(dfs, ignore_index=True))
+
+
+def test_records_are_built_lazily_from_selected_df():
+    from selection_service.core.Pipeline import PipelineContext
+    df = pd.DataFrame({"MAGNITUDE": [5.0, 6.0], "RJB(km)": [10.0, 20.0], "SCORE": [90.0, 80.0]})
+    context = PipelineContext(providers=[MockProvider("p1")], strategy=MockStrategy(), search_criteria=MockCriteria(),
+                              selected_df=df, scored_df=df)
+
+    result = EarthquakePipeline()._generate_final_result(context)
+
+    assert result.success
+    assert "records" not in result.value.report
+    assert result.value.report["records_view"] is result.value.selected_df
+    records = result.value.records
+    assert records == df.to_dict("records")
+    assert result.value.records is records
+    assert result.value.report["statistics"] == {"magnitude_range": (5.0, 6.0),
+                                                 "distance_range": (10.0, 20.0),
+                                                 "score_range": (80.0, 90.0)}
+    import json
+    json.dumps(result.value.report["statistics"])
+
+
+@pytest.mark.asyncio
+async def test_fetch_logs_match_providers_after_a_failure():
+    from selection_service.core.Pipeline import PipelineContext
+    providers = [MockProvider("p1", should_fail=True), MockProvider("p2")]
+    context = PipelineContext(providers=providers, strategy=MockStrategy(), search_criteria=MockCriteria())
+
+    result = await EarthquakePipeline()._fetch_data_async(context)
+
+    assert result.success
+    assert result.value.failed_providers == ["p1"]
+    assert "[OK] p2 success" in result.value.logs
+    assert len(result.value.data) == 1
+
+
+def test_combine_data_single_provider_does_not_touch_source():
+    from selection_service.core.Pipeline import PipelineContext
+    source = pd.DataFrame({"MAGNITUDE": [5.0, None], "EVENT": ["a", None]}, index=[7, 9])
+    snapshot = source.copy()
+    context = PipelineContext(providers=[], strategy=MockStrategy(), search_criteria=MockCriteria(), data=[source])
+
+    combined = EarthquakePipeline()._combine_data(context).value.combined_df
+
+    assert list(combined.index) == [0, 1]
+    assert combined["MAGNITUDE"].tolist() == [5.0, 0.0]
+    assert combined["EVENT"].tolist() == ["a", ""]
+    pd.testing.assert_frame_equal(source, snapshot)
+
+
+def test_combine_data_converts_text_object_columns_to_arrow_strings():
+    from selection_service.core.Pipeline import PipelineContext
+    df = pd.DataFrame({"MAGNITUDE": [5.0, 6.0],
+                       "STATION": pd.Series(["A", "B"], dtype=object),
+                       "MIXED": pd.Series(["A", 1], dtype=object)})
+    context = PipelineContext(providers=[], strategy=MockStrategy(), search_criteria=MockCriteria(), data=[df])
+
+    combined = EarthquakePipeline()._combine_data(context).value.combined_df
+
+    assert combined["STATION"].dtype == "string[pyarrow]"
+    assert combined["MIXED"].dtype == object
+    assert combined["MIXED"].tolist() == ["A", 1]
+
+
+@pytest.mark.asyncio
+async def test_fetch_respects_concurrency_limit_and_keeps_provider_order():
+    import asyncio
+    from selection_service.core.Pipeline import PipelineContext
+
+    running = {"now": 0, "peak": 0}
+
+    class SlowProvider(MockProvider):
+        def __init__(self, name, delay):
+            super().__init__(name, df=pd.DataFrame({"NAME": [name]}))
+            self._delay = delay
+
+        async def fetch_data_async(self, criteria):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(self._delay)
+            running["now"] -= 1
+            return Result.ok(self._df)
+
+    providers = [SlowProvider("slow", 0.03), SlowProvider("fast", 0.0), SlowProvider("mid", 0.01)]
+    pipeline = EarthquakePipeline()
+    pipeline.max_concurrent_fetches = 2
+    context = PipelineContext(providers=providers, strategy=MockStrategy(), search_criteria=MockCriteria())
+
+    result = await pipeline._fetch_data_async(context)
+
+    assert running["peak"] == 2
+    assert [df["NAME"].iloc[0] for df in result.value.data] == ["slow", "fast", "mid"]
+    assert result.value.logs[:3] == ["[OK] fast success", "[OK] mid success", "[OK] slow success"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_survives_a_cancelled_provider():
+    import asyncio
+    from selection_service.core.Pipeline import PipelineContext
+
+    class CancelledProvider(MockProvider):
+        async def fetch_data_async(self, criteria):
+            raise asyncio.CancelledError()
+
+    providers = [CancelledProvider("AFAD"), MockProvider("PEER")]
+    context = PipelineContext(providers=providers, strategy=MockStrategy(), search_criteria=MockCriteria())
+
+    result = await EarthquakePipeline()._fetch_data_async(context)
+
+    assert result.success
+    assert result.value.failed_providers == ["AFAD"]
+    assert "[OK] PEER success" in result.value.logs
+    assert any(log.startswith("[ERROR] AFAD") for log in result.value.logs)
+    assert len(result.value.data) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_async_closes_provider_sessions():
+    from unittest.mock import AsyncMock
+
+    class ClosableProvider(MockProvider):
+        close = AsyncMock()
+
+    provider = ClosableProvider("p1")
+    api = EarthquakeAPI.__new__(EarthquakeAPI)
+    api.providers = [provider]
+    api.strategies = {"mock_strategy": MockStrategy(should_fail=True)}
+    api.pipeline = EarthquakePipeline()
+
+    result = await api.run_async(criteria=MockCriteria(), strategy_name="mock_strategy")
+
+    assert not result.success
+    provider.close.assert_awaited_once()
+
+
+def test_combine_data_fills_categorical_gaps_like_other_missing_values():
+    from selection_service.core.Config import MECHANISM_DTYPE
+    from selection_service.core.Pipeline import PipelineContext
+    from selection_service.processing.Selection import SearchCriteria, SelectionConfig, TBDYSelectionStrategy
+    from selection_service.enums.Enums import DesignCode
+
+    peer = pd.DataFrame({"PROVIDER": pd.Categorical(["PEER"]), "STATION": ["A"], "EVENT": ["E1"],
+                         "MAGNITUDE": [7.0], "MECHANISM": pd.Categorical(["Normal"], dtype=MECHANISM_DTYPE)})
+    afad = pd.DataFrame({"PROVIDER": pd.Categorical(["AFAD"]), "STATION": ["B"], "EVENT": ["E2"],
+                         "MAGNITUDE": [7.0]})
+    context = PipelineContext(providers=[], strategy=MockStrategy(), search_criteria=MockCriteria(), data=[peer, afad])
+
+    combined = EarthquakePipeline()._combine_data(context).value.combined_df
+
+    assert combined["MECHANISM"].tolist() == ["Normal", ""]
+    assert not combined.isna().any().any()
+    # Mekanizması olmayan kayıt, uyuşmayan mekanizmalı kayıtla aynı puanı alır (eksik sayısal değer gibi)
+    strategy = TBDYSelectionStrategy(config=SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=0))
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                              min_magnitude=6.0, max_magnitude=8.0, mechanisms=["StrikeSlip"])
+    _, scored = strategy.select_and_score(combined, criteria)
+    assert scored["SCORE"].nunique() == 1
+
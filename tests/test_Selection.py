@@ -0,0 +1,233 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from selection_service.enums.Enums import DesignCode
+from selection_service.processing.Selection import (SearchCriteria,
+                                                    SelectionConfig,
+                                                    TBDYSelectionStrategy)
+
+
+@pytest.fixture
+def strategy():
+    return TBDYSelectionStrategy(config=SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=0))
+
+
+@pytest.fixture
+def records():
+    return pd.DataFrame({
+        "STATION": ["A", "B", "C"],
+        "EVENT": ["E1", "E2", "E3"],
+        "MAGNITUDE": [7.0, 6.5, np.nan],
+        "VS30(m/s)": [400.0, 300.0, 500.0],
+        "MECHANISM": ["Reverse", "Reverse/Oblique", "Normal"],
+    })
+
+
+def test_scores_match_reference_formula(strategy, records):
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                              min_magnitude=6.0, max_magnitude=8.0,
+                              min_vs30=300, max_vs30=500,
+                              mechanisms=["Reverse"])
+    _, scored = strategy.select_and_score(records, criteria)
+
+    w = criteria.weights
+    sig_m, sig_v = criteria.get_sigma("magnitude"), criteria.get_sigma("vs30")
+    g = lambda x, t, s: math.exp(-((x - t) ** 2) / (2 * s * s))
+    expected_0 = (w.magnitude * g(7.0, 7.0, sig_m) + w.vs30 * g(400, 400, sig_v) + w.mechanism * 1.0) \
+        / (w.magnitude + w.vs30 + w.mechanism) * 100
+    expected_1 = (w.magnitude * g(6.5, 7.0, sig_m) + w.vs30 * g(300, 400, sig_v) + w.mechanism * 0.7) \
+        / (w.magnitude + w.vs30 + w.mechanism) * 100
+    # Büyüklüğü olmayan kayıt, büyüklük ağırlığını paydaya katmaz
+    expected_2 = (w.vs30 * g(500, 400, sig_v)) / (w.vs30 + w.mechanism) * 100
+
+    assert scored["SCORE"].tolist() == pytest.approx([expected_0, expected_1, expected_2])
+
+
+def test_no_active_criteria_scores_zero(strategy, records):
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                              min_magnitude=6.0, max_magnitude=8.0)
+    _, scored = strategy.select_and_score(records.drop(columns=["MAGNITUDE"]), criteria)
+    assert (scored["SCORE"] == 0).all()
+
+
+def test_selection_preserves_column_dtypes(strategy, records):
+    records = records.astype({"MECHANISM": "category"})
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                              min_magnitude=6.0, max_magnitude=8.0)
+    selected, _ = strategy.select_and_score(records, criteria)
+    assert isinstance(selected["MECHANISM"].dtype, pd.CategoricalDtype)
+
+
+def test_numba_kernel_matches_numpy_scores(monkeypatch):
+    pytest.importorskip("numba")
+    import selection_service.processing.Selection as selection
+    assert selection._load_numba_score_kernel() is not None
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"MAGNITUDE": rng.uniform(5, 8, 200), "RJB(km)": rng.uniform(0, 100, 200)})
+    df.loc[::7, "RJB(km)"] = np.nan
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                              min_magnitude=6.0, max_magnitude=7.5, min_Rjb=0.0, max_Rjb=50.0, target_rjb=20.0)
+    strategy = TBDYSelectionStrategy(SelectionConfig(design_code=DesignCode.TBDY_2018))
+
+    compiled = strategy._calculate_total_scores(df, criteria)
+    monkeypatch.setattr(selection, "USE_NUMBA", False)
+    reference = strategy._calculate_total_scores(df, criteria)
+    np.testing.assert_allclose(compiled, reference, rtol=1e-5)
+
+
+def test_selection_respects_station_and_event_quotas():
+    config = SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=0, num_records=4,
+                             max_per_station=2, max_per_event=2)
+    strategy = TBDYSelectionStrategy(config=config)
+    scored = pd.DataFrame({
+        "STATION": ["A", "A", "A", "B", "B", "C"],
+        "EVENT":   ["E1", "E2", "E3", "E1", "E1", "E4"],
+        "SCORE":   [99.0, 98.0, 97.0, 96.0, 95.0, 94.0],
+    })
+    selected = strategy._apply_selection_rules(scored)
+    # A en fazla 2 kez, E1 en fazla 2 kez; açgözlü sırada ilk uygun kayıtlar alınır
+    assert selected["SCORE"].tolist() == [99.0, 98.0, 96.0, 94.0]
+
+
+def test_selection_with_only_station_quota_binding():
+    config = SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=0, num_records=3,
+                             max_per_station=1, max_per_event=5)
+    strategy = TBDYSelectionStrategy(config=config)
+    scored = pd.DataFrame({
+        "STATION": ["A", "A", "B", "C", "D"],
+        "EVENT":   ["E1", "E1", "E1", "E2", "E2"],
+        "SCORE":   [90.0, 99.0, 80.0, 70.0, 60.0],
+    })
+    selected = strategy._apply_selection_rules(scored)
+    assert selected["SCORE"].tolist() == [99.0, 80.0, 70.0]
+
+
+def test_selection_window_falls_back_to_full_sort():
+    config = SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=0, num_records=5,
+                             max_per_station=1, max_per_event=10)
+    strategy = TBDYSelectionStrategy(config=config)
+    # En yüksek puanlı 90 kayıt aynı istasyondan: ilk pencere kotayı dolduramaz
+    stations = ["A"] * 90 + ["B", "C", "D", "E", "F", "G", "H", "I", "J", "K"]
+    scored = pd.DataFrame({
+        "STATION": stations,
+        "EVENT": [f"E{i}" for i in range(100)],
+        "SCORE": np.linspace(100, 1, 100),
+    })
+    selected = strategy._apply_selection_rules(scored)
+    assert selected["STATION"].tolist() == ["A", "B", "C", "D", "E"]
+
+
+@pytest.mark.parametrize("window_factor", [3, 5, 10])
+def test_selection_window_matches_full_sort_with_ties(monkeypatch, window_factor):
+    import selection_service.processing.Selection as selection
+    monkeypatch.setattr(selection, "SELECTION_WINDOW_FACTOR", window_factor)
+    rng = np.random.default_rng(3)
+    # Az sayıda farklı puan: pencere sınırında çok sayıda eşit puanlı kayıt
+    scored = pd.DataFrame({
+        "STATION": rng.choice(list("ABCDEFGHIJ"), 26),
+        "EVENT": rng.choice([f"E{i}" for i in range(8)], 26),
+        "SCORE": rng.choice([90.0, 75.0, 60.0], 26),
+    })
+    strategy = TBDYSelectionStrategy(SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=0, num_records=5,
+                                                     max_per_station=2, max_per_event=2))
+    selected = strategy._apply_selection_rules(scored)
+    reference = strategy._select_from_sorted(scored.sort_values("SCORE", ascending=False, kind="stable"))
+    pd.testing.assert_frame_equal(selected, reference)
+
+
+def test_numba_selection_matches_python(monkeypatch):
+    pytest.importorskip("numba")
+    import selection_service.processing.Selection as selection
+    assert selection._load_numba_selection_kernel() is not None
+
+    rng = np.random.default_rng(1)
+    scored = pd.DataFrame({
+        "STATION": rng.choice(list("ABCDEFG"), 300),
+        "EVENT": rng.choice([f"E{i}" for i in range(12)], 300),
+        "SCORE": rng.permutation(300).astype(float),
+    })
+    strategy = TBDYSelectionStrategy(SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=0, num_records=25,
+                                                     max_per_station=3, max_per_event=4))
+    compiled = strategy._apply_selection_rules(scored)
+    monkeypatch.setattr(selection, "USE_NUMBA", False)
+    reference = strategy._apply_selection_rules(scored)
+    pd.testing.assert_frame_equal(compiled, reference)
+    assert compiled["STATION"].value_counts().max() <= 3
+    assert compiled["EVENT"].value_counts().max() <= 4
+
+
+def test_criteria_range_errors_reported_together():
+    from pydantic import ValidationError
+    with pytest.raises(ValidationError) as exc:
+        SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                       min_magnitude=7.0, max_magnitude=6.0, min_pga=50, max_pga=10, min_Rjb=30, max_Rjb=5)
+    message = str(exc.value)
+    assert "Min büyüklük Max büyüklükten büyük olamaz." in message
+    assert "Minimum PGA maksimum PGA'dan büyük olamaz." in message
+    assert "min_Rjb max_Rjb'den büyük olamaz." in message
+
+
+def test_criteria_bounds_checked_per_field():
+    from pydantic import ValidationError
+    with pytest.raises(ValidationError) as exc:
+        SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                       max_magnitude=11, min_vs30=-10, min_Rjb=-1, circleLatitude=95)
+    assert {err["loc"][0] for err in exc.value.errors()} == {"max_magnitude", "min_vs30", "min_Rjb", "circleLatitude"}
+
+
+def test_criteria_accepts_open_ranges():
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01", min_magnitude=6.0, mechanisms=["Reverse"])
+    assert criteria.max_magnitude is None
+
+
+def test_categorical_scores_same_for_categorical_column(strategy):
+    from selection_service.core.Config import MECHANISM_DTYPE
+    values = ["Reverse", "Reverse/Oblique", "Normal", None, "StrikeSlip-Reverse"]
+    plain = strategy._categorical_scores(pd.Series(values, dtype=object), ["Reverse"])
+    categorical = strategy._categorical_scores(pd.Series(values, dtype=MECHANISM_DTYPE), ["Reverse"])
+    np.testing.assert_array_equal(plain, categorical)
+    np.testing.assert_allclose(plain, [1.0, 0.7, 0.0, 0.0, 0.7])
+
+
+def test_select_and_score_leaves_input_untouched(strategy, records):
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                              min_magnitude=6.0, max_magnitude=8.0)
+    original = records.copy()
+    _, scored = strategy.select_and_score(records, criteria)
+    assert "SCORE" in scored.columns
+    pd.testing.assert_frame_equal(records, original)
+
+
+def test_to_afad_params_drops_missing_values():
+    criteria = SearchCriteria(start_date="2020-01-01", end_date="2021-01-01",
+                              min_magnitude=5.0, max_vs30=800, province="Hatay",
+                              mechanisms=["Reverse", "Normal"])
+    assert criteria.to_afad_params() == {
+        "startDate": "2020-01-01T00:00:00.000Z",
+        "endDate": "2021-01-01T23:59:59.999Z",
+        "fromMagnitude": 5.0,
+        "toVs30": 800,
+        "province": "Hatay",
+        "faultType": "R",
+    }
+
+
+def test_criteria_dates_parsed_once():
+    from selection_service.processing.Selection import _parse_utc_datetime
+    criteria = SearchCriteria(start_date="2011-03-11", end_date="2011-03-12")
+    first = criteria.to_fdsn_params()
+    second = criteria.to_fdsn_params()
+    assert first["starttime"] is second["starttime"]
+    assert str(first["endtime"]).startswith("2011-03-12T00:00:00")
+    assert _parse_utc_datetime.cache_info().hits >= 2
+
+
+def test_unreachable_min_score_selects_nothing(records):
+    strategy = TBDYSelectionStrategy(config=SelectionConfig(design_code=DesignCode.TBDY_2018, min_score=101))
+    criteria = SearchCriteria(start_date="2000-01-01", end_date="2020-01-01",
+                              min_magnitude=6.0, max_magnitude=8.0)
+    selected, scored = strategy.select_and_score(records, criteria)
+    assert selected.empty
+    assert len(scored) == len(records)